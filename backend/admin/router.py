@@ -1,7 +1,9 @@
 # backend/admin/router.py
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func # Import func for database functions
 
@@ -14,10 +16,12 @@ from backend.schemas.user import UserResponse, UserUpdate
 # MODIFIED: Import UserCreate from backend.schemas.auth
 from backend.schemas.auth import UserCreate
 # MODIFIED: Import PodcastResponse from backend.schemas.podcast
-from backend.schemas.podcast import PodcastResponse
+from backend.schemas.podcast import DuplicateCandidateResponse, PodcastResponse
 # MODIFIED: Import LiveStreamResponse from backend.schemas.live_stream
 from backend.schemas.live_stream import LiveStreamResponse
-from backend.models import User as DBUser, Podcast, LiveStream # Import Podcast and LiveStream models
+from backend.schemas.stats import AdminStatsResponse, StatsTotals, LecturerStats
+from backend.models import User as DBUser, Podcast, LiveStream, PlaybackPosition, StatsSummary, ChatMessage, DuplicateCandidate # Import Podcast and LiveStream models
+from backend.services import catalog, chat, entity_cache, exports, feeds, fingerprint, listeners, live_relay, media_gc, rate_limit, runtime, stats, sync
 
 # For password hashing (already in utils, but good to have context if moved here)
 from passlib.context import CryptContext
@@ -31,6 +35,155 @@ router = APIRouter(
     dependencies=[Depends(get_current_active_admin_user)] # All admin routes require admin privileges
 )
 
+# Sizes of the ranked lists on the stats dashboard.
+STATS_TOP_LECTURERS = 50
+STATS_TOP_PODCASTS = 10
+STATS_LIVE_NOW = 50
+
+# --- Dashboard Statistics (Admin Only) ---
+
+@router.get("/stats", response_model=AdminStatsResponse)
+def get_admin_stats(
+    db: Session = Depends(get_db),
+):
+    """
+    Dashboard statistics served from the materialized stats_summary table plus
+    three small indexed queries, so cost does not grow with catalog size.
+    Accessible only by admin users.
+    """
+    summary = db.query(StatsSummary).filter(StatsSummary.owner_id == stats.GLOBAL_OWNER_ID).first()
+    if summary is None:
+        # First request on a fresh database: build the table once.
+        stats.reconcile(db)
+        summary = db.query(StatsSummary).filter(StatsSummary.owner_id == stats.GLOBAL_OWNER_ID).first()
+
+    lecturer_rows = (
+        db.query(StatsSummary, DBUser.username)
+        .outerjoin(DBUser, DBUser.id == StatsSummary.owner_id)
+        .filter(StatsSummary.owner_id != stats.GLOBAL_OWNER_ID)
+        .order_by(StatsSummary.total_plays.desc())
+        .limit(STATS_TOP_LECTURERS)
+        .all()
+    )
+    top_podcasts = db.query(Podcast).order_by(Podcast.plays.desc()).limit(STATS_TOP_PODCASTS).all()
+    live_now = (
+        db.query(LiveStream)
+        .filter(LiveStream.status == "live")
+        .order_by(LiveStream.current_viewers.desc())
+        .limit(STATS_LIVE_NOW)
+        .all()
+    )
+
+    def counters(row):
+        return {column: getattr(row, column) for column in stats.COUNTER_COLUMNS}
+
+    return AdminStatsResponse(
+        totals=StatsTotals(**counters(summary)),
+        lecturers=[
+            LecturerStats(owner_id=row.owner_id, username=username, **counters(row))
+            for row, username in lecturer_rows
+        ],
+        top_podcasts=top_podcasts,
+        live_now=live_now,
+        reconciled_at=summary.reconciled_at,
+    )
+
+@router.post("/stats/reconcile")
+def reconcile_admin_stats(
+    db: Session = Depends(get_db),
+):
+    """
+    Rebuilds the stats summary from source tables immediately instead of
+    waiting for the periodic job. Accessible only by admin users.
+    """
+    owners = stats.reconcile(db)
+    return {"message": "Statistics reconciled", "owners": owners - 1}
+
+@router.get("/cache")
+def get_cache_stats_admin():
+    """
+    Size, hit ratio, eviction and invalidation counts of the in-process
+    entity caches (this worker only), for tuning their sizes.
+    Accessible only by admin users.
+    """
+    return entity_cache.stats()
+
+@router.get("/runtime")
+async def get_runtime_stats_admin():
+    """
+    Threadpool occupancy, event-loop lag, chat connections and audio
+    relays of the worker that answers, for sizing workers and THREADPOOL_SIZE (see backend/serve.py).
+    Async so it reads the threadpool from the event loop instead of
+    taking one of its threads. Accessible only by admin users.
+    """
+    return {**runtime.snapshot(), "chat": chat.hub.stats(), "live_audio": live_relay.hub.stats()}
+
+@router.get("/rate-limits")
+def get_rate_limit_stats_admin():
+    """
+    Configured rate limits with allowed/rejected counts (this worker only).
+    Accessible only by admin users.
+    """
+    return rate_limit.stats()
+
+# --- Media Storage (Admin Only) ---
+
+@router.post("/media/reconcile")
+def reconcile_media_admin(
+    dry_run: bool = True,
+    grace_hours: float = media_gc.DEFAULT_GRACE_SECONDS / 3600,
+    db: Session = Depends(get_db),
+):
+    """
+    Compares the upload directory with the files referenced by podcasts and
+    reports (or, with dry_run=false, deletes) orphaned files older than the
+    grace period. Accessible only by admin users.
+    """
+    if grace_hours < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="grace_hours must not be negative.")
+    return media_gc.reconcile(db, dry_run=dry_run, grace_seconds=int(grace_hours * 3600))
+
+# --- Data Export (Admin Only) ---
+
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+def _export_response(kind: str, fmt: str, build_query, **filters) -> StreamingResponse:
+    return StreamingResponse(
+        exports.stream(fmt, build_query, **filters),
+        media_type=exports.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{exports.filename(kind, fmt)}"'},
+    )
+
+@router.get("/export/users")
+def export_users_admin(
+    format: str = Query(exports.NDJSON, pattern=EXPORT_FORMAT_PATTERN),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+):
+    """
+    Streams every matching user as NDJSON or CSV, in id order, without
+    paging. Accessible only by admin users.
+    """
+    return _export_response("users", format, exports.users_query, role=role, is_active=is_active)
+
+@router.get("/export/podcasts")
+def export_podcasts_admin(
+    format: str = Query(exports.NDJSON, pattern=EXPORT_FORMAT_PATTERN),
+    owner_id: Optional[int] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    min_plays: Optional[int] = None,
+):
+    """
+    Streams podcast statistics as NDJSON or CSV, in id order, without
+    paging. Accessible only by admin users.
+    """
+    return _export_response(
+        "podcasts", format, exports.podcasts_query,
+        owner_id=owner_id, uploaded_after=uploaded_after,
+        uploaded_before=uploaded_before, min_plays=min_plays,
+    )
+
 # --- User Management (Admin Only) ---
 
 @router.get("/users", response_model=List[UserResponse])
@@ -116,8 +269,23 @@ def delete_user_admin(
     if db_user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
+    # Remove the user's content too; leaving it behind orphans rows and media files.
+    purged = []
+    for db_podcast in db.query(Podcast).filter(Podcast.owner_id == db_user.id).all():
+        purged.append(catalog.purge_podcast(db, db_podcast))
+    purged_live_stream_ids = []
+    for db_live_stream in db.query(LiveStream).filter(LiveStream.host_id == db_user.id).all():
+        purged_live_stream_ids.append(db_live_stream.id)
+        catalog.purge_live_stream(db, db_live_stream)
+    db.query(PlaybackPosition).filter(PlaybackPosition.user_id == db_user.id).delete(synchronize_session=False)
+    db.query(ChatMessage).filter(ChatMessage.user_id == db_user.id).delete(synchronize_session=False)
     db.delete(db_user)
     db.commit()
+    for purged_podcast in purged:
+        catalog.finish_podcast_purge(purged_podcast)
+    for live_stream_id in purged_live_stream_ids:
+        catalog.finish_live_stream_purge(live_stream_id)
+    feeds.owner_changed(user_id)
     return {"message": "User deleted successfully"}
 
 # --- Podcast Management (Admin Only) ---
@@ -149,17 +317,53 @@ def delete_podcast_admin(
     if db_podcast is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
 
-    # Delete associated files from the server
-    import os
-    if db_podcast.audio_file_url and os.path.exists(db_podcast.audio_file_url):
-        os.remove(db_podcast.audio_file_url)
-    if db_podcast.cover_art_url and os.path.exists(db_podcast.cover_art_url):
-        os.remove(db_podcast.cover_art_url)
-
-    db.delete(db_podcast)
+    # Stored values are URLs ('/uploads/...'), not filesystem paths; the
+    # catalog helper resolves them and deletes files only after the commit.
+    purged = catalog.purge_podcast(db, db_podcast)
     db.commit()
+    catalog.finish_podcast_purge(purged)
     return {"message": "Podcast deleted successfully by admin"}
 
+@router.get("/podcasts/{podcast_id}/listeners")
+def get_podcast_listeners_admin(
+    podcast_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Approximate unique listeners for a podcast over the last day, week, month and all time.
+    Weekly/monthly figures are unions of daily HyperLogLog sketches, so a user who
+    listens every day is still counted once. Accessible only by admin users.
+    """
+    db_podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
+    if db_podcast is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
+    return {
+        "podcast_id": db_podcast.id,
+        "plays": db_podcast.plays,
+        "unique_listeners": listeners.listener_summary(db, listeners.PODCAST, db_podcast),
+    }
+
+@router.get("/duplicates", response_model=List[DuplicateCandidateResponse])
+def get_duplicate_candidates_admin(
+    status_filter: str = Query(fingerprint.OPEN, alias="status", pattern="^(open|dismissed)$"),
+    db: Session = Depends(get_db),
+):
+    """Podcasts whose audio largely repeats an earlier upload, newest first."""
+    return fingerprint.candidates(db, DuplicateCandidate.status == status_filter)
+
+@router.post("/duplicates/{candidate_id}/dismiss", response_model=DuplicateCandidateResponse)
+def dismiss_duplicate_candidate_admin(
+    candidate_id: int,
+    db: Session = Depends(get_db),
+):
+    """Marks a flagged pair as reviewed and not a duplicate."""
+    candidate = db.query(DuplicateCandidate).filter(DuplicateCandidate.id == candidate_id).first()
+    if candidate is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Duplicate candidate not found")
+    candidate.status = fingerprint.DISMISSED
+    db.commit()
+    return fingerprint.candidates(db, DuplicateCandidate.id == candidate_id)[0]
+
 # NEW: Live Stream Management (Admin Only)
 @router.get("/live-streams", response_model=List[LiveStreamResponse])
 def get_all_live_streams_admin(
@@ -190,17 +394,23 @@ def update_live_stream_status_admin(
     if status_update not in ["live", "offline", "scheduled"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status. Must be 'live', 'offline', or 'scheduled'.")
 
+    status_before = db_live_stream.status
     # Handle status changes (similar to live.py update logic)
     if status_update == "live" and db_live_stream.status != "live":
         db_live_stream.start_time = func.now()
         db_live_stream.end_time = None
     elif status_update == "offline" and db_live_stream.status == "live":
         db_live_stream.end_time = func.now()
+        stats.live_viewers_changed(db, db_live_stream, -(db_live_stream.current_viewers or 0))
         db_live_stream.current_viewers = 0 # Reset viewers when stream goes offline
 
     db_live_stream.status = status_update
+    sync.touch(db_live_stream)
     db.commit()
     db.refresh(db_live_stream)
+    entity_cache.live_stream_changed(db_live_stream)
+    if status_before == "live" and status_update != "live":
+        live_relay.hub.close(stream_id)
     return db_live_stream
 
 @router.delete("/live-streams/{stream_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -216,6 +426,25 @@ def delete_live_stream_admin(
     if db_live_stream is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live stream not found")
 
-    db.delete(db_live_stream)
+    catalog.purge_live_stream(db, db_live_stream)
     db.commit()
+    catalog.finish_live_stream_purge(stream_id)
     return {"message": "Live stream deleted successfully by admin"}
+
+@router.get("/live-streams/{stream_id}/viewers")
+def get_live_stream_viewers_admin(
+    stream_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Approximate unique viewers for a live stream over the last day, week, month and all time.
+    Accessible only by admin users.
+    """
+    db_live_stream = db.query(LiveStream).filter(LiveStream.id == stream_id).first()
+    if db_live_stream is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live stream not found")
+    return {
+        "stream_id": db_live_stream.id,
+        "total_views": db_live_stream.total_views,
+        "unique_viewers": listeners.listener_summary(db, listeners.LIVE_STREAM, db_live_stream),
+    }
@@ -1,9 +1,11 @@
 # backend/schemas.py
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_serializer
 from typing import Optional, List
 from datetime import datetime
 
+from backend.services import media_signing
+
 # --- CORE USER SCHEMAS ---
 
 class UserBase(BaseModel):
@@ -49,6 +51,11 @@ class PodcastResponse(PodcastBase):
     views: int
     plays: int
 
+    # Signed like backend/schemas/podcast.py: plain media URLs answer 403.
+    @field_serializer("audio_file_url", "cover_art_url", when_used="json")
+    def _sign_media_url(self, url: Optional[str]) -> Optional[str]:
+        return media_signing.signed_url(url)
+
     class Config:
         from_attributes = True
 
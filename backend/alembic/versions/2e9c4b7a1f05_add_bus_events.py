@@ -0,0 +1,37 @@
+"""Add bus events for cross-worker invalidation
+
+Revision ID: 2e9c4b7a1f05
+Revises: 8f3a61c2d7b4
+Create Date: 2026-10-18 19:06:52.318804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e9c4b7a1f05'
+down_revision: Union[str, Sequence[str], None] = '8f3a61c2d7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bus_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('origin', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_bus_events_created_at'), 'bus_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_bus_events_created_at'), table_name='bus_events')
+    op.drop_table('bus_events')
@@ -0,0 +1,48 @@
+"""Add HyperLogLog unique listener sketches
+
+Revision ID: 3b8e2c41d7a9
+Revises: f617a6827301
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e2c41d7a9'
+down_revision: Union[str, Sequence[str], None] = 'f617a6827301'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('podcasts', sa.Column('unique_listeners', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('podcasts', sa.Column('listener_sketch', sa.LargeBinary(), nullable=True))
+    op.add_column('live_streams', sa.Column('unique_viewers', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('live_streams', sa.Column('viewer_sketch', sa.LargeBinary(), nullable=True))
+    op.create_table('listener_sketches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('sketch', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity_type', 'entity_id', 'day', name='uq_listener_sketches_entity_day')
+    )
+    op.create_index(op.f('ix_listener_sketches_id'), 'listener_sketches', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_listener_sketches_id'), table_name='listener_sketches')
+    op.drop_table('listener_sketches')
+    with op.batch_alter_table('live_streams') as batch_op:
+        batch_op.drop_column('viewer_sketch')
+        batch_op.drop_column('unique_viewers')
+    with op.batch_alter_table('podcasts') as batch_op:
+        batch_op.drop_column('listener_sketch')
+        batch_op.drop_column('unique_listeners')
@@ -0,0 +1,70 @@
+"""Add audio fingerprint index and duplicate candidates
+
+Revision ID: 4f9a7c3e1d86
+Revises: e8d1b6a4c052
+Create Date: 2026-10-19 12:27:53.104472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f9a7c3e1d86'
+down_revision: Union[str, Sequence[str], None] = 'e8d1b6a4c052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'audio_fingerprints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hash', sa.Integer(), nullable=False),
+        sa.Column('podcast_id', sa.Integer(), nullable=False),
+        sa.Column('offset', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audio_fingerprints_hash', 'audio_fingerprints', ['hash'], unique=False)
+    op.create_index('ix_audio_fingerprints_podcast_id', 'audio_fingerprints', ['podcast_id'], unique=False)
+    op.create_table(
+        'podcast_fingerprints',
+        sa.Column('podcast_id', sa.Integer(), nullable=False),
+        sa.Column('audio_file_url', sa.String(), nullable=False),
+        sa.Column('hash_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ),
+        sa.PrimaryKeyConstraint('podcast_id')
+    )
+    op.create_table(
+        'duplicate_candidates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('podcast_id', sa.Integer(), nullable=False),
+        sa.Column('duplicate_of_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('offset_seconds', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['duplicate_of_id'], ['podcasts.id'], ),
+        sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_duplicate_candidates_podcast_id'), 'duplicate_candidates', ['podcast_id'], unique=False)
+    op.create_index(op.f('ix_duplicate_candidates_duplicate_of_id'), 'duplicate_candidates', ['duplicate_of_id'], unique=False)
+    op.create_index(op.f('ix_duplicate_candidates_status'), 'duplicate_candidates', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_duplicate_candidates_status'), table_name='duplicate_candidates')
+    op.drop_index(op.f('ix_duplicate_candidates_duplicate_of_id'), table_name='duplicate_candidates')
+    op.drop_index(op.f('ix_duplicate_candidates_podcast_id'), table_name='duplicate_candidates')
+    op.drop_table('duplicate_candidates')
+    op.drop_table('podcast_fingerprints')
+    op.drop_index('ix_audio_fingerprints_podcast_id', table_name='audio_fingerprints')
+    op.drop_index('ix_audio_fingerprints_hash', table_name='audio_fingerprints')
+    op.drop_table('audio_fingerprints')
@@ -0,0 +1,43 @@
+"""Add live stream chat
+
+Revision ID: 6b1d0c9e4a27
+Revises: 2e9c4b7a1f05
+Create Date: 2026-10-18 20:14:37.502911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1d0c9e4a27'
+down_revision: Union[str, Sequence[str], None] = '2e9c4b7a1f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('live_streams', sa.Column('chat_enabled', sa.Boolean(), server_default=sa.true(), nullable=False))
+    op.create_table('chat_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('live_stream_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['live_stream_id'], ['live_streams.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_chat_messages_stream_id', 'chat_messages', ['live_stream_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_messages_stream_id', table_name='chat_messages')
+    op.drop_table('chat_messages')
+    with op.batch_alter_table('live_streams') as batch_op:
+        batch_op.drop_column('chat_enabled')
@@ -0,0 +1,42 @@
+"""Add playback positions
+
+Revision ID: 7c1f9a0e5b22
+Revises: 3b8e2c41d7a9
+Create Date: 2026-10-18 10:03:17.502946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f9a0e5b22'
+down_revision: Union[str, Sequence[str], None] = '3b8e2c41d7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('playback_positions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('podcast_id', sa.Integer(), nullable=False),
+    sa.Column('position_seconds', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'podcast_id', name='uq_playback_positions_user_podcast')
+    )
+    op.create_index(op.f('ix_playback_positions_id'), 'playback_positions', ['id'], unique=False)
+    op.create_index(op.f('ix_playback_positions_user_id'), 'playback_positions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_playback_positions_user_id'), table_name='playback_positions')
+    op.drop_index(op.f('ix_playback_positions_id'), table_name='playback_positions')
+    op.drop_table('playback_positions')
@@ -0,0 +1,37 @@
+"""Add podcast_seek_indexes table
+
+Revision ID: 7c2e4f1a9b38
+Revises: a3f58d2e6c19
+Create Date: 2026-10-19 09:12:40.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4f1a9b38'
+down_revision: Union[str, Sequence[str], None] = 'a3f58d2e6c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'podcast_seek_indexes',
+        sa.Column('podcast_id', sa.Integer(), nullable=False),
+        sa.Column('audio_file_url', sa.String(), nullable=False),
+        sa.Column('resolution_seconds', sa.Float(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('offsets', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ),
+        sa.PrimaryKeyConstraint('podcast_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('podcast_seek_indexes')
@@ -0,0 +1,51 @@
+"""Add updated_at and sync tombstones for delta sync
+
+Revision ID: 8f3a61c2d7b4
+Revises: d5e8a3b90c61
+Create Date: 2026-10-18 17:21:08.640127
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a61c2d7b4'
+down_revision: Union[str, Sequence[str], None] = 'd5e8a3b90c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backfill with a bound DateTime value (not CURRENT_TIMESTAMP) so existing
+    # rows share the storage format the application writes.
+    now = sa.bindparam('now', datetime.now(timezone.utc), type_=sa.DateTime(timezone=True))
+    for table in ('podcasts', 'live_streams'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+        op.execute(sa.table(table, sa.column('updated_at')).update().values(updated_at=now))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False)
+
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_sync_tombstones_deleted_at'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    for table in ('live_streams', 'podcasts'):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,31 @@
+"""Add HLS rendition columns to podcasts
+
+Revision ID: a3f58d2e6c19
+Revises: 6b1d0c9e4a27
+Create Date: 2026-10-18 21:02:15.884306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f58d2e6c19'
+down_revision: Union[str, Sequence[str], None] = '6b1d0c9e4a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('podcasts', sa.Column('hls_master_url', sa.String(), nullable=True))
+    op.add_column('podcasts', sa.Column('hls_status', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('podcasts') as batch_op:
+        batch_op.drop_column('hls_status')
+        batch_op.drop_column('hls_master_url')
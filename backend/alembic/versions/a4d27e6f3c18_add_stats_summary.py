@@ -0,0 +1,42 @@
+"""Add materialized admin stats summary
+
+Revision ID: a4d27e6f3c18
+Revises: 7c1f9a0e5b22
+Create Date: 2026-10-18 11:26:51.884310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d27e6f3c18'
+down_revision: Union[str, Sequence[str], None] = '7c1f9a0e5b22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stats_summary',
+    sa.Column('owner_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('podcast_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_views', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_plays', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('live_stream_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('current_viewers', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_live_views', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+    op.create_index(op.f('ix_podcasts_plays'), 'podcasts', ['plays'], unique=False)
+    op.create_index(op.f('ix_live_streams_status'), 'live_streams', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_live_streams_status'), table_name='live_streams')
+    op.drop_index(op.f('ix_podcasts_plays'), table_name='podcasts')
+    op.drop_table('stats_summary')
@@ -0,0 +1,36 @@
+"""Add precomputed similar podcast neighbors
+
+Revision ID: c92b5d17e4f0
+Revises: a4d27e6f3c18
+Create Date: 2026-10-18 13:02:09.371554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c92b5d17e4f0'
+down_revision: Union[str, Sequence[str], None] = 'a4d27e6f3c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('podcast_neighbors',
+    sa.Column('podcast_id', sa.Integer(), nullable=False),
+    sa.Column('neighbor_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['neighbor_id'], ['podcasts.id'], ),
+    sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ),
+    sa.PrimaryKeyConstraint('podcast_id', 'neighbor_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('podcast_neighbors')
@@ -0,0 +1,31 @@
+"""Add podcast content hash for idempotent imports
+
+Revision ID: d5e8a3b90c61
+Revises: c92b5d17e4f0
+Create Date: 2026-10-18 15:47:33.209518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a3b90c61'
+down_revision: Union[str, Sequence[str], None] = 'c92b5d17e4f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('podcasts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_podcasts_content_hash'), 'podcasts', ['content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_podcasts_content_hash'), table_name='podcasts')
+    with op.batch_alter_table('podcasts') as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,37 @@
+"""Add loudness analysis columns to podcasts
+
+Revision ID: e8d1b6a4c052
+Revises: 7c2e4f1a9b38
+Create Date: 2026-10-19 10:41:07.263918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8d1b6a4c052'
+down_revision: Union[str, Sequence[str], None] = '7c2e4f1a9b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('podcasts', sa.Column('loudness_status', sa.String(), nullable=True))
+    op.add_column('podcasts', sa.Column('loudness_lufs', sa.Float(), nullable=True))
+    op.add_column('podcasts', sa.Column('true_peak_dbtp', sa.Float(), nullable=True))
+    op.add_column('podcasts', sa.Column('replay_gain_db', sa.Float(), nullable=True))
+    op.add_column('podcasts', sa.Column('silence_spans', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('podcasts') as batch_op:
+        batch_op.drop_column('silence_spans')
+        batch_op.drop_column('replay_gain_db')
+        batch_op.drop_column('true_peak_dbtp')
+        batch_op.drop_column('loudness_lufs')
+        batch_op.drop_column('loudness_status')
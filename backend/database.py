@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -19,4 +20,15 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def dialect_insert(db, table):
+    """
+    Returns an INSERT construct for `table` that supports
+    `.on_conflict_do_update()` / `.on_conflict_do_nothing()` on the
+    session's backend (SQLite in dev, PostgreSQL in production).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
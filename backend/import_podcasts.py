@@ -0,0 +1,204 @@
+# backend/import_podcasts.py
+#
+# Bulk catalog import, e.g. when onboarding a department:
+#   python -m backend.import_podcasts --owner drsmith ./recordings/
+#   python -m backend.import_podcasts --owner drsmith manifest.csv
+#
+# A manifest (CSV with a header row, NDJSON with one object per line, or a
+# JSON list of objects) has a required "path" column and optional "title",
+# "description", "author" and "cover" columns; relative paths are resolved
+# against the manifest's directory. CSV and NDJSON (.ndjson/.jsonl) are read
+# a row at a time; a JSON list is loaded whole, so use NDJSON for large
+# catalogs.
+# Re-running an import is safe: files whose content hash is already in the
+# catalog are skipped.
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+sys.path.append(os.path.abspath("."))
+
+from backend.database import SessionLocal
+from backend.models import Podcast, User
+from backend.services import feeds, media_tools, stats, storage
+from backend.services.bus import bus
+
+AUDIO_EXTENSIONS = {".mp3", ".m4a", ".aac", ".ogg", ".oga", ".opus", ".wav", ".flac", ".webm"}
+DEFAULT_BATCH_SIZE = 50
+
+
+def _iter_directory(root: str) -> Iterator[Dict]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in AUDIO_EXTENSIONS:
+                yield {"path": os.path.join(dirpath, filename)}
+
+
+def _iter_manifest(manifest_path: str) -> Iterator[Dict]:
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        extension = os.path.splitext(manifest_path)[1].lower()
+        if extension in (".ndjson", ".jsonl"):
+            entries = (json.loads(line) for line in f if line.strip())
+        elif extension == ".json":
+            entries = iter(json.load(f))
+        else:
+            entries = csv.DictReader(f)
+        for entry in entries:
+            entry = {key: (value or None) for key, value in entry.items()}
+            if not entry.get("path"):
+                continue
+            for key in ("path", "cover"):
+                if entry.get(key) and not os.path.isabs(entry[key]):
+                    entry[key] = os.path.join(base, entry[key])
+            yield entry
+
+
+def _analyze(entry: Dict) -> Dict:
+    """Worker: hash and probe one file. Nothing is copied yet."""
+    try:
+        entry["content_hash"] = media_tools.sha256_file(entry["path"])
+        entry["duration_seconds"] = media_tools.probe_duration_seconds(entry["path"])
+    except OSError as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def _place(entry: Dict) -> Dict:
+    """Worker: copy audio (and cover) into upload storage, make cover variants."""
+    try:
+        audio_path, entry["audio_file_url"] = storage.new_media_path(os.path.basename(entry["path"]))
+        shutil.copyfile(entry["path"], audio_path)
+        entry["cover_art_url"] = None
+        if entry.get("cover"):
+            cover_path, entry["cover_art_url"] = storage.new_media_path(os.path.basename(entry["cover"]))
+            shutil.copyfile(entry["cover"], cover_path)
+            media_tools.make_cover_variants(cover_path, storage.COVER_VARIANT_WIDTHS)
+    except OSError as e:
+        entry["error"] = str(e)
+        for url in (entry.get("audio_file_url"), entry.get("cover_art_url")):
+            storage.remove_media(url)
+    return entry
+
+
+def _batches(entries: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    while True:
+        batch = list(islice(entries, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_import(source: str, owner_username: str, batch_size: int = DEFAULT_BATCH_SIZE, workers: Optional[int] = None, dry_run: bool = False) -> Dict:
+    """
+    Streams entries in batches: hash/probe the batch in the process pool,
+    drop anything already imported (one IN query per batch), copy the rest
+    in the pool, then insert the batch's rows in a single transaction.
+    Memory is bounded by batch_size, not by the size of the import.
+    """
+    entries = _iter_directory(source) if os.path.isdir(source) else _iter_manifest(source)
+    totals = {"seen": 0, "imported": 0, "skipped": 0, "failed": 0}
+    started = time.monotonic()
+
+    db = SessionLocal()
+    try:
+        owner = db.query(User).filter(User.username == owner_username).first()
+        if owner is None:
+            raise SystemExit(f"❌ No user named '{owner_username}'.")
+        if owner.role not in ("lecturer", "admin"):
+            raise SystemExit(f"❌ '{owner_username}' is not a lecturer or admin.")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch in _batches(entries, batch_size):
+                totals["seen"] += len(batch)
+                analyzed = list(pool.map(_analyze, batch))
+                failed = [e for e in analyzed if "error" in e]
+                hashes = {e["content_hash"] for e in analyzed if "error" not in e}
+                known = {
+                    h for (h,) in db.query(Podcast.content_hash).filter(Podcast.content_hash.in_(hashes))
+                } if hashes else set()
+
+                fresh, seen_in_batch = [], set()
+                for entry in analyzed:
+                    if "error" in entry:
+                        continue
+                    if entry["content_hash"] in known or entry["content_hash"] in seen_in_batch:
+                        totals["skipped"] += 1
+                        continue
+                    seen_in_batch.add(entry["content_hash"])
+                    fresh.append(entry)
+
+                if not dry_run and fresh:
+                    placed = list(pool.map(_place, fresh))
+                    failed += [e for e in placed if "error" in e]
+                    rows = [e for e in placed if "error" not in e]
+                    try:
+                        db.bulk_insert_mappings(Podcast, [
+                            {
+                                "title": e.get("title") or os.path.splitext(os.path.basename(e["path"]))[0],
+                                "description": e.get("description"),
+                                "author": e.get("author"),
+                                "duration_minutes": round(e["duration_seconds"] / 60) if e.get("duration_seconds") else None,
+                                "audio_file_url": e["audio_file_url"],
+                                "cover_art_url": e["cover_art_url"],
+                                "content_hash": e["content_hash"],
+                                "owner_id": owner.id,
+                                "views": 0,
+                                "plays": 0,
+                            }
+                            for e in rows
+                        ])
+                        stats.bump(db, owner.id, podcast_count=len(rows))
+                        db.commit()
+                    except Exception:
+                        db.rollback()
+                        for e in rows:
+                            storage.remove_media(e["audio_file_url"])
+                            storage.remove_media(e["cover_art_url"])
+                        raise
+                    totals["imported"] += len(rows)
+                    if rows:
+                        # Tells running server workers to refresh this owner's feeds.
+                        feeds.owner_changed(owner.id)
+                        bus.flush()
+                elif dry_run:
+                    totals["imported"] += len(fresh)
+
+                totals["failed"] += len(failed)
+                for e in failed:
+                    print(f"⚠️ {e['path']}: {e['error']}")
+                elapsed = time.monotonic() - started
+                print(
+                    f"… {totals['seen']} seen, {totals['imported']} imported, {totals['skipped']} already present, "
+                    f"{totals['failed']} failed ({totals['seen'] / elapsed:.1f} files/s)"
+                )
+    finally:
+        db.close()
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a directory or manifest of recordings as podcasts.")
+    parser.add_argument("source", help="Directory of audio files, or a .csv/.ndjson/.json manifest")
+    parser.add_argument("--owner", required=True, help="Username of the lecturer who will own the podcasts")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Hash and probe only; copy and insert nothing")
+    args = parser.parse_args(argv)
+
+    totals = run_import(args.source, args.owner, args.batch_size, args.workers, args.dry_run)
+    print(f"✅ Done: {totals['imported']} imported, {totals['skipped']} skipped, {totals['failed']} failed.")
+    print("ℹ️ Search suggestions and recommendations pick up imported podcasts on their next periodic rebuild.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,16 @@
 # backend/main.py
+import os
+
 from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 
-from .routers import auth, podcast, live
+from .routers import auth, podcast, live, chat, live_audio, media, progress, sync, feeds as feeds_router
 from .admin.router import router as admin_router
 from .database import get_db
 from . import models
 from .dependencies import get_current_user, get_current_active_admin_user
+from .services import background, feeds, fingerprint, hls, idempotency, loudness, media_gc, media_signing, rate_limit, runtime, storage, storage_migration, upload_validation
 
 app = FastAPI(
     title="Crawford Podcast App API",
@@ -16,8 +18,32 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Mount the 'uploads' directory
-app.mount("/uploads", StaticFiles(directory="./backend/uploads"), name="uploads")
+# Mount the 'uploads' directory; files are served under signed, expiring URLs
+# only (services/media_signing.py)
+app.mount(
+    storage.URL_PATH_PREFIX,
+    media_signing.SignedStaticFiles(prefix=storage.URL_PATH_PREFIX, directory=storage.UPLOAD_DIRECTORY),
+    name="uploads"
+)
+# HLS renditions of uploads, served with immutable cache headers
+os.makedirs(storage.HLS_DIRECTORY, exist_ok=True)
+app.mount(
+    storage.HLS_URL_PATH_PREFIX,
+    hls.HLSStaticFiles(prefix=storage.HLS_URL_PATH_PREFIX, directory=storage.HLS_DIRECTORY),
+    name="hls"
+)
+
+# Upload checks (services/upload_validation.py) inspect multipart bodies as
+# they arrive; added first so they run after rate limiting and inside CORS.
+app.add_middleware(upload_validation.UploadGuardMiddleware)
+
+# Idempotency-Key replays (services/idempotency.py) answer retries before the
+# upload checks or the handler see them.
+app.add_middleware(idempotency.IdempotencyMiddleware)
+
+# Rate limits (services/rate_limit.py) run before routing and auth; added
+# before CORS so that 429 responses still carry CORS headers.
+app.add_middleware(rate_limit.RateLimitMiddleware)
 
 # Configure CORS
 origins = [
@@ -49,6 +75,24 @@ app.include_router(
     tags=["Live Streams"],
     dependencies=[Depends(get_current_user)]
 )
+# Chat and live audio authenticate themselves (token query parameter), see routers/chat.py.
+app.include_router(chat.router, prefix="/api/live", tags=["Live Chat"])
+app.include_router(live_audio.router, prefix="/api/live", tags=["Live Audio"])
+app.include_router(
+    progress.router,
+    prefix="/api/progress",
+    tags=["Listening Progress"],
+    dependencies=[Depends(get_current_user)]
+)
+app.include_router(
+    sync.router,
+    prefix="/api/sync",
+    tags=["Sync"],
+    dependencies=[Depends(get_current_user)]
+)
+app.include_router(feeds_router.router, prefix="/feeds", tags=["Feeds"])
+# No bearer token: like /uploads, access comes from signed URLs (routers/media.py).
+app.include_router(media.router, prefix=media_signing.MEDIA_URL_PATH_PREFIX, tags=["Media"])
 app.include_router(
     admin_router,
     prefix="/api/admin",
@@ -56,6 +100,30 @@ app.include_router(
     dependencies=[Depends(get_current_active_admin_user)]
 )
 
+# Periodic jobs register themselves with services.background when their
+# modules are imported by the routers above.
+@app.on_event("startup")
+def start_background_tasks():
+    background.start_all()
+
+@app.on_event("startup")
+async def start_runtime():
+    # Sizes this worker's threadpool and starts the event-loop lag monitor.
+    await runtime.start()
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    # Flushes buffered writes (e.g. playback positions) before exit.
+    background.stop_all()
+    feeds.clear()
+    hls.packager.shutdown()
+    loudness.analyzer.shutdown()
+    fingerprint.fingerprinter.shutdown()
+
+@app.on_event("shutdown")
+async def stop_runtime():
+    await runtime.stop()
+
 @app.get("/api/health")
 def health_check(db: Session = Depends(get_db)):
     try:
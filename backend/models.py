@@ -1,10 +1,18 @@
 # backend/models.py
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Float, ForeignKey, Index, Text, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 from backend.database import Base # MODIFIED: Changed to absolute import for database
 
+
+def utcnow():
+    # Set in Python rather than by the database so every row, on every
+    # backend, stores the same microsecond-precision format (see /api/sync).
+    return datetime.now(timezone.utc)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -34,11 +42,29 @@ class Podcast(Base):
 
     # ADDED: New fields for statistics
     views = Column(Integer, default=0) # Number of times podcast has been viewed/loaded
-    plays = Column(Integer, default=0) # Number of times podcast has been played
+    plays = Column(Integer, default=0, index=True) # Number of times podcast has been played
+    # Approximate distinct listeners (HyperLogLog), see backend/services/listeners.py
+    unique_listeners = Column(Integer, default=0)
+    listener_sketch = Column(LargeBinary, nullable=True)
 
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     author = Column(String, nullable=True)
     duration_minutes = Column(Integer, nullable=True)
+    # SHA-256 of the audio file; makes bulk imports idempotent
+    content_hash = Column(String(64), unique=True, index=True, nullable=True)
+    # Bumped on metadata/file changes (not on counters); drives /api/sync
+    updated_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+    # Multi-bitrate HLS renditions made after upload by backend/services/hls.py.
+    # hls_status: None (not packaged yet), "ready" or "failed".
+    hls_master_url = Column(String, nullable=True)
+    hls_status = Column(String, nullable=True)
+    # Loudness measured after upload by backend/services/loudness.py; the
+    # player applies replay_gain_db. loudness_status: None, "ready" or "failed".
+    loudness_status = Column(String, nullable=True)
+    loudness_lufs = Column(Float, nullable=True) # integrated, EBU R128
+    true_peak_dbtp = Column(Float, nullable=True)
+    replay_gain_db = Column(Float, nullable=True)
+    silence_spans = Column(Text, nullable=True) # JSON [[start, end], ...] in seconds
 
     owner = relationship("User", back_populates="podcasts")
 
@@ -50,17 +76,186 @@ class LiveStream(Base):
     title = Column(String, index=True, nullable=False)
     description = Column(Text, nullable=True)
     # Assuming a simple status: "live", "offline", "scheduled"
-    status = Column(String, default="offline", nullable=False)
+    status = Column(String, default="offline", nullable=False, index=True)
     stream_url = Column(String, nullable=True) # URL for the actual live stream content (e.g., YouTube Live embed URL)
     start_time = Column(DateTime(timezone=True), nullable=True)
     end_time = Column(DateTime(timezone=True), nullable=True)
     # ADDED: New fields for live stream statistics
     current_viewers = Column(Integer, default=0)
     total_views = Column(Integer, default=0) # Total views across all live sessions
-    
+    # Approximate distinct viewers (HyperLogLog), see backend/services/listeners.py
+    unique_viewers = Column(Integer, default=0)
+    viewer_sketch = Column(LargeBinary, nullable=True)
+    # Bumped on edits and status changes (not on viewer counts); drives /api/sync
+    updated_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+    chat_enabled = Column(Boolean, default=True, nullable=False)
+
     host_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     host = relationship("User", back_populates="live_streams")
 
     # You might add more fields like:
     # thumbnail_url = Column(String, nullable=True)
-    # chat_enabled = Column(Boolean, default=True)
+
+
+class ListenerSketch(Base):
+    """
+    One HyperLogLog sketch of distinct users per entity per day. Daily sketches
+    are merged on read to answer weekly/monthly unique-listener questions.
+    """
+    __tablename__ = "listener_sketches"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", "day", name="uq_listener_sketches_entity_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String, nullable=False) # "podcast" or "live_stream"
+    entity_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    sketch = Column(LargeBinary, nullable=False)
+
+
+class PlaybackPosition(Base):
+    """
+    Last known playback position per (user, podcast). Written in batches by
+    the coalescer in backend/services/playback.py, never once per report.
+    """
+    __tablename__ = "playback_positions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "podcast_id", name="uq_playback_positions_user_podcast"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    podcast_id = Column(Integer, ForeignKey("podcasts.id"), nullable=False)
+    position_seconds = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class StatsSummary(Base):
+    """
+    Materialized admin dashboard counters, one row per owner plus a global row
+    (owner_id == 0). Kept current by backend/services/stats.py on every write
+    path and periodically rebuilt from scratch by the reconcile job.
+    """
+    __tablename__ = "stats_summary"
+
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)
+    podcast_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_views = Column(Integer, nullable=False, default=0, server_default="0")
+    total_plays = Column(Integer, nullable=False, default=0, server_default="0")
+    live_stream_count = Column(Integer, nullable=False, default=0, server_default="0")
+    current_viewers = Column(Integer, nullable=False, default=0, server_default="0")
+    total_live_views = Column(Integer, nullable=False, default=0, server_default="0")
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PodcastNeighbor(Base):
+    """
+    Precomputed "similar podcasts" list: the top-k TF-IDF cosine neighbors of
+    each podcast, maintained by backend/services/recommendations.py.
+    """
+    __tablename__ = "podcast_neighbors"
+
+    podcast_id = Column(Integer, ForeignKey("podcasts.id"), primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("podcasts.id"), primary_key=True)
+    rank = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+
+
+class SyncTombstone(Base):
+    """
+    Records a deleted podcast or live stream so delta sync clients learn
+    about deletes. Pruned after backend/services/sync.py:TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False) # "podcast" or "live_stream"
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+
+
+class BusEvent(Base):
+    """
+    Short-lived cross-worker event (cache invalidations and the like), see
+    backend/services/bus.py. Rows are deleted after about an hour.
+    """
+    __tablename__ = "bus_events"
+
+    id = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    payload = Column(Text, nullable=False) # JSON object
+    origin = Column(String, nullable=False) # publishing worker
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+
+
+class ChatMessage(Base):
+    """
+    Live stream chat transcript. Messages are broadcast immediately and
+    written here in batches by backend/services/chat.py.
+    """
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_stream_id", "live_stream_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    live_stream_id = Column(Integer, ForeignKey("live_streams.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    username = Column(String, nullable=False) # as of sending, so history needs no join
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+
+class PodcastSeekIndex(Base):
+    """
+    Time -> byte offset table of a podcast's audio file, built by
+    backend/services/seek_index.py. Stale once audio_file_url changes.
+    """
+    __tablename__ = "podcast_seek_indexes"
+
+    podcast_id = Column(Integer, ForeignKey("podcasts.id"), primary_key=True)
+    audio_file_url = Column(String, nullable=False) # the file this was built from
+    resolution_seconds = Column(Float, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    offsets = Column(LargeBinary, nullable=False) # little-endian uint32; empty if unsupported
+
+
+class AudioFingerprint(Base):
+    """
+    Inverted index of spectral-peak hashes (backend/services/fingerprint.py):
+    one row per stored hash of a podcast's audio, looked up by hash.
+    """
+    __tablename__ = "audio_fingerprints"
+    __table_args__ = (
+        Index("ix_audio_fingerprints_hash", "hash"),
+        Index("ix_audio_fingerprints_podcast_id", "podcast_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    hash = Column(Integer, nullable=False)
+    podcast_id = Column(Integer, ForeignKey("podcasts.id"), nullable=False)
+    offset = Column(Integer, nullable=False) # spectrogram frame of the hash's first peak
+
+
+class PodcastFingerprint(Base):
+    """Which audio file a podcast's fingerprint hashes were computed from."""
+    __tablename__ = "podcast_fingerprints"
+
+    podcast_id = Column(Integer, ForeignKey("podcasts.id"), primary_key=True)
+    audio_file_url = Column(String, nullable=False)
+    hash_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+
+class DuplicateCandidate(Base):
+    """A podcast whose audio largely matches an earlier one, for review."""
+    __tablename__ = "duplicate_candidates"
+
+    id = Column(Integer, primary_key=True)
+    podcast_id = Column(Integer, ForeignKey("podcasts.id"), nullable=False, index=True) # the newer upload
+    duplicate_of_id = Column(Integer, ForeignKey("podcasts.id"), nullable=False, index=True)
+    score = Column(Float, nullable=False) # share of the shorter file's hashes that align
+    offset_seconds = Column(Float, nullable=False) # where podcast_id starts within duplicate_of_id
+    status = Column(String, default="open", nullable=False, index=True) # "open" or "dismissed"
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
@@ -1,9 +1,11 @@
 # backend/routers/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 from jose import JWTError, jwt
 
 # MODIFIED: Import Token, UserCreate, TokenData from backend.schemas.auth
@@ -12,7 +14,7 @@ from backend.schemas.auth import Token, UserCreate, TokenData
 from backend.schemas.user import UserResponse
 
 from backend.models import User as DBUser
-from backend.database import get_db
+from backend.database import SessionLocal, get_db
 from backend.utils import (
     authenticate_user,
     create_access_token,
@@ -58,6 +60,9 @@ async def login_for_access_token(
 
 # MODIFIED: get_current_user to return UserResponse with role
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return _user_from_token(token, db)
+
+def _user_from_token(token: str, db: Session) -> UserResponse:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -91,6 +96,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         print(f"JWT Error during decoding: {e}")
         raise credentials_exception
 
+async def get_user_for_token(token: Optional[str]) -> Optional[UserResponse]:
+    """
+    get_current_user for WebSocket and media routes, whose clients (browsers'
+    WebSocket and <audio>) cannot send an Authorization header and pass the
+    token as a query parameter instead. Returns None unless the token belongs
+    to an active user.
+    """
+    # The user lookup is a blocking query, so it runs in the threadpool.
+    return await run_in_threadpool(_active_user_for_token, token)
+
+def _active_user_for_token(token: Optional[str]) -> Optional[UserResponse]:
+    db = SessionLocal()
+    try:
+        user = _user_from_token(token or "", db)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+    return user if user.is_active else None
+
 async def get_current_active_user(current_user: UserResponse = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
@@ -0,0 +1,89 @@
+# backend/routers/chat.py
+#
+# Live stream chat. Browsers cannot send an Authorization header when opening
+# a WebSocket, so the bearer token comes in the `token` query parameter and is
+# checked by get_user_for_token; this router is therefore mounted without a
+# router-level auth dependency.
+#
+# Protocol (JSON text frames):
+#   server -> client  {"type": "history", "messages": [...]}   once, on connect
+#                     {"type": "message", "message": {...}}
+#                     {"type": "error", "detail": "..."}
+#   client -> server  {"body": "..."}
+
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal, get_db
+from backend.routers.auth import get_current_user, get_user_for_token
+from backend.schemas.chat import ChatMessageResponse
+from backend.schemas.user import UserResponse
+from backend.services import chat
+
+router = APIRouter()
+
+
+def _chat_enabled(stream_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        live_stream = db.query(models.LiveStream).filter(models.LiveStream.id == stream_id).first()
+        return live_stream is not None and live_stream.chat_enabled
+    finally:
+        db.close()
+
+
+@router.websocket("/{stream_id}/chat")
+async def live_chat(websocket: WebSocket, stream_id: int, token: Optional[str] = None):
+    user = await get_user_for_token(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+    if not await run_in_threadpool(_chat_enabled, stream_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Chat is not available for this stream")
+        return
+
+    await websocket.accept()
+    connection = await chat.hub.join(stream_id, websocket, user.id)
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                body = json.loads(text).get("body")
+            except (ValueError, AttributeError):
+                body = None
+            if not isinstance(body, str):
+                error = 'Expected {"body": "..."}'
+            else:
+                error = chat.hub.post(stream_id, user.id, user.username, body)
+            if error:
+                connection.offer(json.dumps({"type": "error", "detail": error}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        chat.hub.leave(stream_id, connection)
+
+
+@router.get("/{stream_id}/chat/messages", response_model=List[ChatMessageResponse])
+def get_chat_messages(
+    stream_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Stored chat transcript of a stream, newest first. Pass the smallest `id`
+    received as `before_id` to page back. Messages from the last couple of
+    seconds may not be stored yet.
+    """
+    if db.query(models.LiveStream.id).filter(models.LiveStream.id == stream_id).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live stream not found")
+    query = chat.history_query(db, stream_id)
+    if before_id is not None:
+        query = query.filter(models.ChatMessage.id < before_id)
+    return query.order_by(models.ChatMessage.id.desc()).limit(limit).all()
@@ -0,0 +1,23 @@
+# backend/routers/feeds.py
+#
+# Public RSS feeds for podcast apps. These routes carry no auth dependency:
+# feed readers cannot send bearer tokens. Enclosure URLs are signed with a
+# long expiry (services/media_signing.py).
+
+from fastapi import APIRouter, Request
+
+from backend.services import feeds
+
+router = APIRouter()
+
+
+@router.get("/podcasts.xml")
+def global_feed(request: Request):
+    """Every podcast in the catalog, newest first."""
+    return feeds.feed_response(request, None)
+
+
+@router.get("/lecturers/{owner_id}.xml")
+def lecturer_feed(owner_id: int, request: Request):
+    """One lecturer's podcasts, newest first."""
+    return feeds.feed_response(request, owner_id)
@@ -18,11 +18,12 @@ from backend.schemas.user import UserResponse
 from backend.database import get_db
 # Import role-specific dependencies
 from backend.routers.auth import get_current_user, get_current_lecturer_or_admin_user, get_current_active_admin_user
+from backend.services import catalog, chat, entity_cache, listeners, live_relay, stats, sync
+from backend.services.storage import LIVE_UPLOAD_DIRECTORY
 
 router = APIRouter()
 
-# Define the directory for live stream related files (e.g., thumbnails, if any)
-LIVE_UPLOAD_DIRECTORY = "./backend/uploads/live"
+# Directory for live stream related files (e.g., thumbnails, if any)
 os.makedirs(LIVE_UPLOAD_DIRECTORY, exist_ok=True)
 
 @router.post("/", response_model=LiveStreamResponse, status_code=status.HTTP_201_CREATED)
@@ -52,12 +53,15 @@ async def create_live_stream(
         description=stream_create.description,
         stream_url=stream_create.stream_url,
         status=stream_create.status,
+        chat_enabled=stream_create.chat_enabled,
         host_id=current_user.id,
         start_time=func.now() if stream_create.status == "live" else None,
         current_viewers=0,
         total_views=0
     )
     db.add(db_live_stream)
+    db.flush()
+    stats.live_stream_created(db, db_live_stream)
     db.commit()
     db.refresh(db_live_stream)
     return db_live_stream
@@ -90,7 +94,12 @@ def get_live_stream_by_id(
     Retrieves a single live stream by its ID.
     Requires authentication.
     """
-    live_stream = db.query(models.LiveStream).filter(models.LiveStream.id == stream_id).first()
+    live_stream = entity_cache.live_streams.get_or_load(
+        stream_id,
+        lambda: entity_cache.live_stream_entry(
+            db.query(models.LiveStream).filter(models.LiveStream.id == stream_id).first()
+        ),
+    )
     if live_stream is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live stream not found")
     return live_stream
@@ -118,6 +127,8 @@ async def update_live_stream(
         )
 
     update_data = stream_update.model_dump(exclude_unset=True)
+    viewers_before = db_live_stream.current_viewers or 0
+    status_before = db_live_stream.status
 
     # Handle status changes
     if "status" in update_data:
@@ -132,9 +143,17 @@ async def update_live_stream(
 
     for key, value in update_data.items():
         setattr(db_live_stream, key, value)
+    if update_data.keys() - {"current_viewers"}:
+        sync.touch(db_live_stream)
 
+    stats.live_viewers_changed(db, db_live_stream, (db_live_stream.current_viewers or 0) - viewers_before)
     db.commit()
     db.refresh(db_live_stream)
+    entity_cache.live_stream_changed(db_live_stream)
+    if update_data.get("chat_enabled") is False:
+        chat.hub.close_room(stream_id, "Chat was disabled")
+    if status_before == "live" and db_live_stream.status != "live":
+        live_relay.hub.close(stream_id) # ends relayed audio for every listener
     return db_live_stream
 
 @router.delete("/{stream_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -158,8 +177,9 @@ def delete_live_stream(
             detail="You are not authorized to delete this live stream"
         )
 
-    db.delete(db_live_stream)
+    catalog.purge_live_stream(db, db_live_stream)
     db.commit()
+    catalog.finish_live_stream_purge(stream_id)
     return {"message": "Live stream deleted successfully"}
 
 # NEW: Endpoint to increment live stream viewers (e.g., called by frontend when user joins)
@@ -182,10 +202,17 @@ def join_live_stream(
 
     live_stream.current_viewers += 1
     live_stream.total_views += 1 # Also increment total views
+    stats.live_viewers_changed(db, live_stream, 1, view_delta=1)
+    listeners.record_listener(db, listeners.LIVE_STREAM, live_stream, current_user.id)
     db.add(live_stream)
     db.commit()
     db.refresh(live_stream)
-    return {"message": "Joined stream", "current_viewers": live_stream.current_viewers}
+    entity_cache.live_stream_counters_changed(live_stream)
+    return {
+        "message": "Joined stream",
+        "current_viewers": live_stream.current_viewers,
+        "unique_viewers": live_stream.unique_viewers,
+    }
 
 # NEW: Endpoint to decrement live stream viewers (e.g., called by frontend when user leaves)
 @router.post("/{stream_id}/leave", status_code=status.HTTP_200_OK)
@@ -204,8 +231,10 @@ def leave_live_stream(
 
     if live_stream.current_viewers > 0:
         live_stream.current_viewers -= 1
+        stats.live_viewers_changed(db, live_stream, -1)
     db.add(live_stream)
     db.commit()
     db.refresh(live_stream)
+    entity_cache.live_stream_counters_changed(live_stream)
     return {"message": "Left stream", "current_viewers": live_stream.current_viewers}
 
@@ -0,0 +1,124 @@
+# backend/routers/live_audio.py
+#
+# Live audio relayed by the backend itself (services/live_relay.py), as an
+# alternative to an external `stream_url`. Like chat, these routes take the
+# token as a query parameter (browsers' WebSocket and <audio> cannot send an
+# Authorization header) and are mounted without a router-level auth dependency.
+#
+# Host:      WS /api/live/{id}/audio/ingest?token=..&content_type=audio/mpeg
+#            Binary frames are audio chunks (at most 64 KiB each). A text frame
+#            {"next": "header"} marks the next binary frame as the container
+#            header; {"next": "keyframe"} marks it as a point where listeners
+#            may start. MP3 and ADTS AAC need neither.
+# Listeners: GET /api/live/{id}/audio?token=..  (chunked audio, e.g. <audio src>)
+#
+# Both are served by a single process; in a multi-worker pool they answer 421
+# (see services/live_relay.py for the routing).
+
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from backend import models
+from backend.database import SessionLocal
+from backend.routers.auth import get_user_for_token
+from backend.services import live_relay
+
+router = APIRouter()
+
+NOT_SERVED_HERE = "Live audio is served by the live audio process"
+
+
+def _live_stream(stream_id: int) -> Optional[models.LiveStream]:
+    db = SessionLocal()
+    try:
+        return db.query(models.LiveStream).filter(models.LiveStream.id == stream_id).first()
+    finally:
+        db.close()
+
+
+@router.websocket("/{stream_id}/audio/ingest")
+async def ingest_live_audio(
+    websocket: WebSocket,
+    stream_id: int,
+    token: Optional[str] = None,
+    content_type: str = "audio/mpeg"
+):
+    if not live_relay.served_here():
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=NOT_SERVED_HERE)
+        return
+    user = await get_user_for_token(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+    live_stream = await run_in_threadpool(_live_stream, stream_id)
+    if live_stream is None or (live_stream.host_id != user.id and user.role != "admin"):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Only the host can publish audio")
+        return
+    if live_stream.status != "live":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Stream is not currently live.")
+        return
+    if content_type not in live_relay.CONTENT_TYPES:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="Unsupported content type")
+        return
+
+    relay = live_relay.hub.open(stream_id, content_type)
+    if relay is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Audio is already being published")
+        return
+
+    await websocket.accept()
+    next_frame = None
+    try:
+        while not relay.closed:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") is not None:
+                try:
+                    next_frame = json.loads(message["text"]).get("next")
+                except (ValueError, AttributeError):
+                    next_frame = None
+                continue
+            data = message.get("bytes") or b""
+            try:
+                if next_frame == "header":
+                    relay.set_header(data)
+                else:
+                    relay.write(data, keyframe=next_frame == "keyframe")
+            except ValueError as e:
+                await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG, reason=str(e))
+                return
+            next_frame = None
+        if relay.closed:
+            await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason="Stream ended")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_relay.hub.stop_publishing(relay)
+
+
+@router.get("/{stream_id}/audio")
+async def listen_live_audio(stream_id: int, token: Optional[str] = None):
+    """
+    The stream's audio as it arrives, starting at the most recent join
+    point. Ends when the stream goes offline.
+    """
+    if not live_relay.served_here():
+        raise HTTPException(status_code=status.HTTP_421_MISDIRECTED_REQUEST, detail=NOT_SERVED_HERE)
+    if await get_user_for_token(token) is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    relay = live_relay.hub.get(stream_id)
+    if relay is None or relay.closed:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No live audio for this stream")
+    return StreamingResponse(
+        relay.listen(),
+        media_type=relay.content_type,
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,83 @@
+# backend/routers/media.py
+#
+# Podcast audio with time-based seeking. An <audio> element cannot send a
+# bearer token, so like /uploads these routes take a signed, expiring URL
+# instead (services/media_signing.py); the API hands them out as seek_url.
+#
+#   GET /media/<token>/podcasts/{id}/audio        the whole file (Range
+#                                                 requests work)
+#   GET /media/<token>/podcasts/{id}/audio?t=95   the file from the frame
+#                                                 playing at 95 s; X-Start-Time
+#                                                 says where that is (WAV gets
+#                                                 a rewritten header first)
+#
+# With MEDIA_OFFLOAD set, the web server in front sends the whole file; the
+# part from t onwards is still streamed from here.
+
+import mimetypes
+import os
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import get_db
+from backend.services import media_signing, seek_index, storage
+
+router = APIRouter()
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _read_from(path: str, offset: int, length: int, prefix: bytes = b"") -> Iterator[bytes]:
+    if prefix:
+        yield prefix
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+@router.get("/{expires}/{signature}/podcasts/{podcast_id}/audio")
+def get_podcast_audio(
+    expires: str,
+    signature: str,
+    podcast_id: int,
+    t: Optional[float] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    media_signing.verify_path(media_signing.MEDIA_URL_PATH_PREFIX, f"{expires}/{signature}/podcasts/{podcast_id}/audio")
+    podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+    path = storage.path_for_url(podcast.audio_file_url) if podcast else None
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio not found")
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    index = seek_index.ensure_index(db, podcast) if t else None
+    if index is None or len(index.offsets) == 0:
+        return media_signing.offload_response(path, media_type) or FileResponse(path, media_type=media_type)
+
+    offset, start_time = index.offset_for(t)
+    prefix, length = b"", os.path.getsize(path) - offset
+    if seek_index.detect_format(path) == seek_index.WAV:
+        wav = seek_index.wav_header_for(path, offset)
+        if wav is None:
+            return media_signing.offload_response(path, media_type) or FileResponse(path, media_type=media_type)
+        prefix, length = wav
+    return StreamingResponse(
+        _read_from(path, offset, length, prefix),
+        media_type=media_type,
+        headers={
+            "Content-Length": str(len(prefix) + length),
+            "X-Start-Time": f"{start_time:g}",
+            # Ranges of this response would be relative to t; clients range
+            # over the whole file instead.
+            "Accept-Ranges": "none",
+        },
+    )
@@ -1,25 +1,37 @@
 # backend/routers/podcast.py
 
+import json
 import os
-import shutil
 from typing import List, Optional
-from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from backend import models
-from backend.schemas.podcast import PodcastResponse
+from backend.schemas.podcast import (
+    DuplicateCheckResponse, LoudnessResponse, PodcastEventBatch, PodcastEventBatchResult, PodcastResponse, SeekIndexResponse
+)
 from backend.database import get_db
 from backend.routers.auth import get_current_user, get_current_lecturer_or_admin_user
+from backend.services import autocomplete, catalog, entity_cache, feeds, fingerprint, hls, listeners, loudness, media_signing, rate_limit, recommendations, seek_index, stats, storage, sync, upload_validation, view_counts
+from backend.services.playback import coalescer
+from backend.services.storage import UPLOAD_DIRECTORY, URL_PATH_PREFIX
 
 router = APIRouter()
 
-# Define the directory to save uploaded files on the server
-UPLOAD_DIRECTORY = "./backend/uploads"
-# Define the URL path that the frontend will use to access these files
-URL_PATH_PREFIX = "/uploads"
+# Upper bound on ids per batch read, roughly one page of the podcast list.
+MAX_BATCH_IDS = 200
+# Counted events per batch are capped at one full rate-limit bucket, since the
+# middleware charges those buckets one token per event.
+MAX_EVENTS_PER_BATCH = {
+    "play": rate_limit.PLAY_USER.burst,
+    "view": rate_limit.VIEW_USER.burst,
+}
+
+# UPLOAD_DIRECTORY (where files are saved) and URL_PATH_PREFIX (how the
+# frontend reaches them) live in backend/services/storage.py.
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
@@ -42,9 +54,14 @@ def _fix_podcast_urls(podcast: models.Podcast) -> models.Podcast:
     
     return podcast
 
+def _load_podcast_entry(db: Session, podcast_id: int):
+    podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+    return entity_cache.podcast_entry(_fix_podcast_urls(podcast) if podcast else None)
+
 
 @router.post("/", response_model=PodcastResponse, status_code=status.HTTP_201_CREATED)
 async def create_podcast(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: Optional[str] = Form(None),
     author: Optional[str] = Form(None),
@@ -54,26 +71,21 @@ async def create_podcast(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_lecturer_or_admin_user)
 ):
-    # Generate unique filenames to prevent conflicts
-    audio_filename = f"{uuid4()}_{audio_file.filename}"
-    audio_path = os.path.join(UPLOAD_DIRECTORY, audio_filename)
-    audio_file_url = f"{URL_PATH_PREFIX}/{audio_filename}"
+    # Generate unique, sharded file locations to prevent conflicts
+    audio_path, audio_file_url = storage.new_media_path(audio_file.filename)
 
     cover_art_url = None
     cover_art_path = None
     if cover_art:
-        cover_art_filename = f"{uuid4()}_{cover_art.filename}"
-        cover_art_path = os.path.join(UPLOAD_DIRECTORY, cover_art_filename)
-        cover_art_url = f"{URL_PATH_PREFIX}/{cover_art_filename}"
+        cover_art_path, cover_art_url = storage.new_media_path(cover_art.filename)
 
     try:
-        # Save the actual files to the server's file system
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio_file.file, buffer)
+        # Save the actual files to the server's file system, checking their
+        # type and size on the way (services/upload_validation.py)
+        await run_in_threadpool(upload_validation.save_upload, audio_file, audio_path, upload_validation.AUDIO, current_user.role)
 
         if cover_art and cover_art_path:
-            with open(cover_art_path, "wb") as buffer:
-                shutil.copyfileobj(cover_art.file, buffer)
+            await run_in_threadpool(upload_validation.save_upload, cover_art, cover_art_path, upload_validation.IMAGE, current_user.role)
 
         # Store the correct URL paths in the database
         db_podcast = models.Podcast(
@@ -89,14 +101,25 @@ async def create_podcast(
             plays=0
         )
         db.add(db_podcast)
+        db.flush()
+        stats.podcast_created(db, db_podcast)
         db.commit()
         db.refresh(db_podcast)
+        autocomplete.podcast_changed(db, db_podcast)
+        feeds.owner_changed(db_podcast.owner_id)
+        background_tasks.add_task(recommendations.refresh_podcast, db_podcast.id)
+        background_tasks.add_task(seek_index.build_for_podcast, db_podcast.id)
+        hls.packager.enqueue(db_podcast.id)
+        loudness.analyzer.enqueue(db_podcast.id)
+        fingerprint.fingerprinter.enqueue(db_podcast.id)
         return db_podcast
     except Exception as e:
         if os.path.exists(audio_path):
             os.remove(audio_path)
         if cover_art_path and os.path.exists(cover_art_path):
             os.remove(cover_art_path)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload podcast: {e}"
@@ -114,24 +137,131 @@ def get_all_podcasts(
     fixed_podcasts = [_fix_podcast_urls(p) for p in podcasts]
     return fixed_podcasts
 
+# The literal routes below must be declared before "/{podcast_id}" so "autocomplete"
+# and "batch" are not parsed as ids.
+@router.get("/autocomplete")
+def autocomplete_podcasts(
+    q: str,
+    limit: int = autocomplete.DEFAULT_LIMIT,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Search-as-you-type suggestions over podcast titles, authors and lecturer
+    usernames, ranked by plays. Served from an in-memory prefix index; no
+    query runs against the podcasts table.
+    """
+    return autocomplete.suggest(db, q, max(1, min(limit, 50)))
+
+@router.get("/batch", response_model=List[PodcastResponse])
+def get_podcasts_batch(
+    ids: List[int] = Query(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Resolves many podcasts (?ids=3&ids=1&ids=2) with a single IN query and
+    returns them in the requested order; unknown ids are left out. Unlike
+    GET /{podcast_id} this does not count views: send "view" events to
+    POST /events instead.
+    """
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} podcast ids per request."
+        )
+    podcasts = {
+        p.id: p for p in db.query(models.Podcast).filter(models.Podcast.id.in_(set(ids)))
+    }
+    return [_fix_podcast_urls(podcasts[i]) for i in ids if i in podcasts]
+
+@router.post("/events", response_model=PodcastEventBatchResult)
+def submit_podcast_events(
+    batch: PodcastEventBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Applies many play, view and progress events for the current user in one
+    request. Play and view counters for every podcast involved are updated in
+    a single transaction; progress goes to the playback position coalescer
+    like PUT /api/progress/{podcast_id}. Events for unknown podcasts are
+    skipped and reported back.
+    """
+    for event in batch.events:
+        if event.type == "progress" and event.position_seconds is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Progress event for podcast {event.podcast_id} has no position_seconds."
+            )
+    for event_type, limit in MAX_EVENTS_PER_BATCH.items():
+        if sum(event.type == event_type for event in batch.events) > limit:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {limit} {event_type} events per batch."
+            )
+
+    podcast_ids = {event.podcast_id for event in batch.events}
+    podcasts = {
+        p.id: p for p in db.query(models.Podcast).filter(models.Podcast.id.in_(podcast_ids))
+    } if podcast_ids else {}
+
+    views, plays, positions = {}, {}, {}
+    applied = 0
+    for event in batch.events:
+        if event.podcast_id not in podcasts:
+            continue
+        applied += 1
+        if event.type == "view":
+            views[event.podcast_id] = views.get(event.podcast_id, 0) + 1
+        elif event.type == "play":
+            plays[event.podcast_id] = plays.get(event.podcast_id, 0) + 1
+        else:
+            positions[event.podcast_id] = event.position_seconds
+
+    # Incremented in SQL so concurrent batches for the same podcast add up.
+    for podcast_id, count in views.items():
+        podcast = podcasts[podcast_id]
+        db.query(models.Podcast).filter(models.Podcast.id == podcast_id).update(
+            {models.Podcast.views: models.Podcast.views + count}, synchronize_session=False
+        )
+        stats.podcast_viewed(db, podcast, count)
+    for podcast_id, count in plays.items():
+        podcast = podcasts[podcast_id]
+        db.query(models.Podcast).filter(models.Podcast.id == podcast_id).update(
+            {models.Podcast.plays: models.Podcast.plays + count}, synchronize_session=False
+        )
+        stats.podcast_played(db, podcast, count)
+        listeners.record_listener(db, listeners.PODCAST, podcast, current_user.id)
+    db.commit()
+
+    for podcast_id in views.keys() | plays.keys():
+        entity_cache.podcast_counters_changed(podcasts[podcast_id])
+    for podcast_id, count in plays.items():
+        autocomplete.podcast_played(podcast_id, count)
+    for podcast_id, position_seconds in positions.items():
+        coalescer.report(current_user.id, podcast_id, position_seconds)
+    return PodcastEventBatchResult(
+        applied=applied,
+        unknown_podcast_ids=sorted(podcast_ids - podcasts.keys()),
+    )
+
 @router.get("/{podcast_id}", response_model=PodcastResponse)
 def get_podcast_by_id(
     podcast_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+    # Served from the entity cache; the database is only read on a miss.
+    podcast = entity_cache.podcasts.get_or_load(podcast_id, lambda: _load_podcast_entry(db, podcast_id))
     if podcast is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
 
-    # Increment views before returning
-    podcast.views += 1
-    db.add(podcast)
-    db.commit()
-    db.refresh(podcast)
-    
-    # --- MODIFIED: Fix URLs on the fly before sending to the client ---
-    return _fix_podcast_urls(podcast)
+    # Count the view; it is buffered and written in batches by services/view_counts.py.
+    view_counts.counter.record(podcast_id)
+    entity_cache.podcasts.add_counters(podcast_id, views=1)
+    podcast["views"] += 1
+    return podcast
 
 @router.post("/{podcast_id}/play", status_code=status.HTTP_200_OK)
 def increment_podcast_play(
@@ -143,16 +273,117 @@ def increment_podcast_play(
     if podcast is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
 
-    podcast.plays += 1
-    db.add(podcast)
+    # Incremented in SQL, like the event batches, so concurrent plays add up.
+    db.query(models.Podcast).filter(models.Podcast.id == podcast_id).update(
+        {models.Podcast.plays: models.Podcast.plays + 1}, synchronize_session=False
+    )
+    stats.podcast_played(db, podcast)
+    listeners.record_listener(db, listeners.PODCAST, podcast, current_user.id)
     db.commit()
     db.refresh(podcast)
-    return {"message": "Play count incremented", "plays": podcast.plays}
+    autocomplete.podcast_played(podcast.id)
+    entity_cache.podcast_counters_changed(podcast)
+    return {
+        "message": "Play count incremented",
+        "plays": podcast.plays,
+        "unique_listeners": podcast.unique_listeners,
+    }
+
+
+@router.get("/{podcast_id}/similar", response_model=List[PodcastResponse])
+def get_similar_podcasts(
+    podcast_id: int,
+    limit: int = recommendations.TOP_K,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    "Up next" suggestions: podcasts with the most similar title, description
+    and author, read from the precomputed podcast_neighbors table.
+    """
+    neighbors = (
+        db.query(models.Podcast)
+        .join(models.PodcastNeighbor, models.PodcastNeighbor.neighbor_id == models.Podcast.id)
+        .filter(models.PodcastNeighbor.podcast_id == podcast_id)
+        .order_by(models.PodcastNeighbor.rank)
+        .limit(min(limit, recommendations.TOP_K))
+        .all()
+    )
+    return [_fix_podcast_urls(p) for p in neighbors]
+
+
+@router.get("/{podcast_id}/seek-index", response_model=SeekIndexResponse)
+def get_seek_index(
+    podcast_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Time -> byte offset table of the podcast's audio (MP3, ADTS AAC and WAV),
+    built on first use if the upload-time build has not run yet.
+    """
+    podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+    if podcast is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
+    index = seek_index.ensure_index(db, podcast)
+    if index is None or len(index.offsets) == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No seek index for this audio format")
+    return SeekIndexResponse(
+        podcast_id=podcast_id,
+        resolution_seconds=index.resolution_seconds,
+        duration_seconds=index.duration_seconds,
+        offsets=index.offsets.tolist(),
+        seek_url=media_signing.signed_url(f"{media_signing.MEDIA_URL_PATH_PREFIX}/podcasts/{podcast_id}/audio"),
+    )
+
+
+@router.get("/{podcast_id}/loudness", response_model=LoudnessResponse)
+def get_loudness(
+    podcast_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Loudness measurements and silent stretches of the podcast's audio."""
+    podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+    if podcast is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
+    return LoudnessResponse(
+        podcast_id=podcast_id,
+        status=podcast.loudness_status,
+        loudness_lufs=podcast.loudness_lufs,
+        true_peak_dbtp=podcast.true_peak_dbtp,
+        replay_gain_db=podcast.replay_gain_db,
+        silence_spans=json.loads(podcast.silence_spans) if podcast.silence_spans else [],
+    )
+
+
+@router.get("/{podcast_id}/duplicates", response_model=DuplicateCheckResponse)
+def get_duplicates(
+    podcast_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_lecturer_or_admin_user)
+):
+    """
+    Earlier podcasts whose audio this upload largely repeats (trimmed or
+    re-encoded copies included). Poll after uploading until `checked`.
+    """
+    podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+    if podcast is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast not found")
+    return DuplicateCheckResponse(
+        checked=fingerprint.is_indexed(db, podcast),
+        duplicates=fingerprint.candidates(
+            db,
+            models.DuplicateCandidate.podcast_id == podcast_id,
+            models.DuplicateCandidate.status == fingerprint.OPEN,
+        ),
+    )
 
 
 @router.put("/{podcast_id}", response_model=PodcastResponse)
 async def update_podcast(
     podcast_id: int,
+    background_tasks: BackgroundTasks,
     title: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     author: Optional[str] = Form(None),
@@ -181,32 +412,50 @@ async def update_podcast(
     if duration_minutes is not None:
         db_podcast.duration_minutes = duration_minutes
 
+    # Replaced files are removed only after the commit succeeds; anything left
+    # behind by a crash in between is collected by services/media_gc.py.
+    replaced_urls = []
     if audio_file:
         if db_podcast.audio_file_url:
-            old_file_path = os.path.join(UPLOAD_DIRECTORY, os.path.basename(db_podcast.audio_file_url))
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
-        
-        audio_filename = f"{uuid4()}_{audio_file.filename}"
-        audio_path = os.path.join(UPLOAD_DIRECTORY, audio_filename)
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio_file.file, buffer)
-        db_podcast.audio_file_url = f"{URL_PATH_PREFIX}/{audio_filename}"
+            replaced_urls.append(db_podcast.audio_file_url)
+
+        audio_path, audio_file_url = storage.new_media_path(audio_file.filename)
+        await run_in_threadpool(upload_validation.save_upload, audio_file, audio_path, upload_validation.AUDIO, current_user.role)
+        db_podcast.audio_file_url = audio_file_url
+        replaced_hls_url = hls.reset(db_podcast)
+        loudness.reset(db_podcast)
+        fingerprint.forget_podcast(db, db_podcast.id)
+        if replaced_hls_url:
+            replaced_urls.append(replaced_hls_url)
 
     if cover_art:
         if db_podcast.cover_art_url:
-            old_file_path = os.path.join(UPLOAD_DIRECTORY, os.path.basename(db_podcast.cover_art_url))
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
-
-        cover_art_filename = f"{uuid4()}_{cover_art.filename}"
-        cover_art_path = os.path.join(UPLOAD_DIRECTORY, cover_art_filename)
-        with open(cover_art_path, "wb") as buffer:
-            shutil.copyfileobj(cover_art.file, buffer)
-        db_podcast.cover_art_url = f"{URL_PATH_PREFIX}/{cover_art_filename}"
-
+            replaced_urls.append(db_podcast.cover_art_url)
+
+        cover_art_path, cover_art_url = storage.new_media_path(cover_art.filename)
+        try:
+            await run_in_threadpool(upload_validation.save_upload, cover_art, cover_art_path, upload_validation.IMAGE, current_user.role)
+        except HTTPException:
+            if audio_file:
+                os.remove(audio_path)
+            raise
+        db_podcast.cover_art_url = cover_art_url
+
+    sync.touch(db_podcast)
     db.commit()
     db.refresh(db_podcast)
+    for url in replaced_urls:
+        storage.remove_media(url)
+    if audio_file:
+        background_tasks.add_task(seek_index.build_for_podcast, db_podcast.id)
+        hls.packager.enqueue(db_podcast.id)
+        loudness.analyzer.enqueue(db_podcast.id)
+        fingerprint.fingerprinter.enqueue(db_podcast.id)
+    feeds.owner_changed(db_podcast.owner_id)
+    entity_cache.podcast_changed(_fix_podcast_urls(db_podcast))
+    if title is not None or description is not None or author is not None:
+        autocomplete.podcast_changed(db, db_podcast)
+        background_tasks.add_task(recommendations.refresh_podcast, db_podcast.id)
     return db_podcast
 
 
@@ -226,15 +475,7 @@ def delete_podcast(
             detail="You are not authorized to delete this podcast"
         )
 
-    if db_podcast.audio_file_url:
-        file_to_delete = os.path.join(UPLOAD_DIRECTORY, os.path.basename(db_podcast.audio_file_url))
-        if os.path.exists(file_to_delete):
-            os.remove(file_to_delete)
-    if db_podcast.cover_art_url:
-        file_to_delete = os.path.join(UPLOAD_DIRECTORY, os.path.basename(db_podcast.cover_art_url))
-        if os.path.exists(file_to_delete):
-            os.remove(file_to_delete)
-
-    db.delete(db_podcast)
+    purged = catalog.purge_podcast(db, db_podcast)
     db.commit()
+    catalog.finish_podcast_purge(purged)
     return {"message": "Podcast deleted successfully"}
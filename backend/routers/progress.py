@@ -0,0 +1,56 @@
+# backend/routers/progress.py
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from backend.schemas.progress import PlaybackPositionUpdate, PlaybackPositionResponse
+from backend.schemas.user import UserResponse
+from backend.database import get_db
+from backend.routers.auth import get_current_user
+from backend.services.playback import coalescer, get_positions
+
+router = APIRouter()
+
+# Keep bulk reads to roughly one page of the podcast list.
+MAX_BULK_IDS = 200
+
+@router.put("/{podcast_id}", response_model=PlaybackPositionResponse)
+def report_playback_position(
+    podcast_id: int,
+    position: PlaybackPositionUpdate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Records the current user's playback position for a podcast.
+    Positions are coalesced in memory and flushed in batches, so clients may
+    report as often as they like without causing a write per call.
+    """
+    updated_at = coalescer.report(current_user.id, podcast_id, position.position_seconds)
+    return PlaybackPositionResponse(
+        podcast_id=podcast_id,
+        position_seconds=position.position_seconds,
+        updated_at=updated_at,
+    )
+
+@router.get("/", response_model=List[PlaybackPositionResponse])
+def get_playback_positions(
+    podcast_ids: List[int] = Query(...),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Returns the current user's saved positions for a page of podcasts
+    (e.g. ?podcast_ids=1&podcast_ids=2). Podcasts never played are omitted.
+    """
+    if len(podcast_ids) > MAX_BULK_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_IDS} podcast ids per request."
+        )
+    positions = get_positions(db, current_user.id, podcast_ids)
+    return [
+        PlaybackPositionResponse(podcast_id=podcast_id, position_seconds=position, updated_at=updated_at)
+        for podcast_id, (position, updated_at) in positions.items()
+    ]
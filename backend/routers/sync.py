@@ -0,0 +1,32 @@
+# backend/routers/sync.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from backend.schemas.sync import SyncResponse
+from backend.schemas.user import UserResponse
+from backend.database import get_db
+from backend.routers.auth import get_current_user
+from backend.services import sync
+
+router = APIRouter()
+
+@router.get("", response_model=SyncResponse)
+def get_changes(
+    since: Optional[str] = None,
+    limit: int = sync.DEFAULT_PAGE_SIZE,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Podcasts and live streams created, changed or deleted since `since`
+    (the `next_token` of a previous call). Omit `since` for a full sync.
+    """
+    try:
+        return sync.changes_since(db, since, max(1, min(limit, sync.MAX_PAGE_SIZE)))
+    except sync.InvalidToken as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except sync.ExpiredToken as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
@@ -0,0 +1,15 @@
+# backend/schemas/chat.py
+
+from pydantic import BaseModel
+from datetime import datetime
+
+class ChatMessageResponse(BaseModel):
+    id: int
+    live_stream_id: int
+    user_id: int
+    username: str
+    body: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
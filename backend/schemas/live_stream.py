@@ -8,6 +8,7 @@ class LiveStreamBase(BaseModel):
     title: str
     description: Optional[str] = None
     stream_url: Optional[str] = None
+    chat_enabled: bool = True
 
 class LiveStreamCreate(LiveStreamBase):
     status: str = Field("offline", pattern="^(live|offline|scheduled)$")
@@ -18,6 +19,7 @@ class LiveStreamUpdate(BaseModel):
     stream_url: Optional[str] = None
     status: Optional[str] = Field(None, pattern="^(live|offline|scheduled)$")
     current_viewers: Optional[int] = None
+    chat_enabled: Optional[bool] = None
 
 class LiveStreamResponse(LiveStreamBase):
     id: int
@@ -27,6 +29,8 @@ class LiveStreamResponse(LiveStreamBase):
     end_time: Optional[datetime] = None
     current_viewers: int
     total_views: int
+    unique_viewers: int = 0 # Approximate distinct viewers (HyperLogLog)
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -1,9 +1,11 @@
 # backend/schemas/podcast.py
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_serializer
+from typing import List, Optional
 from datetime import datetime
 
+from backend.services import media_signing
+
 class PodcastBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -18,9 +20,63 @@ class PodcastResponse(PodcastBase):
     owner_id: int
     audio_file_url: Optional[str] = None
     cover_art_url: Optional[str] = None
+    hls_master_url: Optional[str] = None # multi-bitrate HLS; audio_file_url is the fallback
+    replay_gain_db: Optional[float] = None # gain to play at the reference loudness
     uploaded_at: datetime
     views: int
     plays: int
+    unique_listeners: int = 0 # Approximate distinct listeners (HyperLogLog)
+    updated_at: Optional[datetime] = None
+
+    # Media URLs go out signed and expiring; the stored (and cached) values stay plain.
+    @field_serializer("audio_file_url", "cover_art_url", "hls_master_url", when_used="json")
+    def _sign_media_url(self, url: Optional[str]) -> Optional[str]:
+        return media_signing.signed_url(url)
 
     class Config:
         from_attributes = True
+
+class PodcastEvent(BaseModel):
+    type: str = Field(..., pattern="^(play|view|progress)$")
+    podcast_id: int
+    position_seconds: Optional[float] = Field(None, ge=0) # required for "progress"
+
+class PodcastEventBatch(BaseModel):
+    # Events are applied in order; for "progress" the last one per podcast wins.
+    events: List[PodcastEvent] = Field(..., max_length=500)
+
+class PodcastEventBatchResult(BaseModel):
+    applied: int
+    unknown_podcast_ids: List[int] = []
+
+class SeekIndexResponse(BaseModel):
+    podcast_id: int
+    resolution_seconds: float
+    duration_seconds: float
+    # offsets[k]: byte offset of the frame playing at k * resolution_seconds
+    offsets: List[int]
+    # Serves the file from the frame at or before t seconds (signed, expiring)
+    seek_url: str
+
+class LoudnessResponse(BaseModel):
+    podcast_id: int
+    status: Optional[str] = None # None (not analyzed yet), "ready" or "failed"
+    loudness_lufs: Optional[float] = None
+    true_peak_dbtp: Optional[float] = None
+    replay_gain_db: Optional[float] = None
+    silence_spans: List[List[float]] = [] # [start, end] in seconds
+
+class DuplicateCandidateResponse(BaseModel):
+    id: int
+    podcast_id: int
+    podcast_title: str
+    duplicate_of_id: int
+    duplicate_of_title: str
+    score: float # share of the shorter recording that matches
+    offset_seconds: float # where podcast_id starts within duplicate_of_id
+    status: str
+    created_at: datetime
+
+class DuplicateCheckResponse(BaseModel):
+    checked: bool # False until the upload has been fingerprinted
+    duplicates: List[DuplicateCandidateResponse] = []
@@ -0,0 +1,12 @@
+# backend/schemas/progress.py
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class PlaybackPositionUpdate(BaseModel):
+    position_seconds: float = Field(..., ge=0)
+
+class PlaybackPositionResponse(BaseModel):
+    podcast_id: int
+    position_seconds: float
+    updated_at: datetime
@@ -0,0 +1,44 @@
+# backend/schemas/stats.py
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class StatsTotals(BaseModel):
+    podcast_count: int
+    total_views: int
+    total_plays: int
+    live_stream_count: int
+    current_viewers: int
+    total_live_views: int
+
+class LecturerStats(StatsTotals):
+    owner_id: int
+    username: Optional[str] = None
+
+class TopPodcast(BaseModel):
+    id: int
+    title: str
+    owner_id: int
+    views: int
+    plays: int
+
+    class Config:
+        from_attributes = True
+
+class LiveNowStream(BaseModel):
+    id: int
+    title: str
+    host_id: int
+    current_viewers: int
+    start_time: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AdminStatsResponse(BaseModel):
+    totals: StatsTotals
+    lecturers: List[LecturerStats]
+    top_podcasts: List[TopPodcast]
+    live_now: List[LiveNowStream]
+    reconciled_at: Optional[datetime] = None
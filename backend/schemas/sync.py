@@ -0,0 +1,23 @@
+# backend/schemas/sync.py
+
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+from backend.schemas.podcast import PodcastResponse
+from backend.schemas.live_stream import LiveStreamResponse
+
+class DeletedEntity(BaseModel):
+    type: str # "podcast" or "live_stream"
+    id: int
+    deleted_at: datetime
+
+class SyncResponse(BaseModel):
+    # Rows whose metadata changed; play/view counters alone do not count as a change.
+    podcasts: List[PodcastResponse]
+    live_streams: List[LiveStreamResponse]
+    deleted: List[DeletedEntity]
+    # Opaque high-water mark to send as ?since= on the next call.
+    next_token: str
+    # True when a page filled up; call again with next_token right away.
+    has_more: bool
@@ -0,0 +1,135 @@
+# backend/serve.py
+#
+# Production entrypoint:
+#   python -m backend.serve [--workers N] [--port 8000] ...
+#
+# Every option can also be set through the environment variable named in its
+# help text, which is how the Dockerfile and deployments configure it.
+#
+# One worker by default: rate-limit buckets and idempotency keys live in
+# process memory unless they are pointed at Redis, so more workers are only
+# started when both are. Singleton background jobs (see
+# services/background.py) then run in one worker at a time.
+#
+# Live audio relays (services/live_relay.py) cannot be shared that way: a
+# listener must reach the process that holds the host's upload. With more
+# than one worker, a separate single-worker process on LIVE_AUDIO_PORT serves
+# /api/live/{id}/audio*, the pool answers those routes with 421, and the
+# proxy in front routes them to that port (see services/live_relay.py).
+
+import argparse
+import multiprocessing
+import os
+
+import uvicorn
+
+from backend.services import idempotency, live_relay, rate_limit
+from backend.services.runtime import THREADPOOL_SIZE_ENV
+
+APP = "backend.main:app"
+# Shared backends every worker must use when there is more than one.
+SHARED_STATE_ENVS = (rate_limit.REDIS_URL_ENV, idempotency.REDIS_URL_ENV)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _has_module(name: str) -> bool:
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the API with production settings.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"), help="HOST")
+    parser.add_argument("--port", type=int, default=_env_int("PORT", 8000), help="PORT")
+    parser.add_argument(
+        "--workers", type=int, default=_env_int("WEB_CONCURRENCY", 1),
+        help=f"WEB_CONCURRENCY (default 1; more need {' and '.join(SHARED_STATE_ENVS)})",
+    )
+    parser.add_argument(
+        "--threadpool-size", type=int, default=_env_int(THREADPOOL_SIZE_ENV, 100),
+        help=f"{THREADPOOL_SIZE_ENV}: threads per worker for sync handlers (AnyIO default is 40)",
+    )
+    parser.add_argument(
+        "--keep-alive", type=int, default=_env_int("KEEP_ALIVE", 75),
+        help="KEEP_ALIVE: idle keep-alive seconds; keep above the load balancer's idle timeout",
+    )
+    parser.add_argument("--backlog", type=int, default=_env_int("BACKLOG", 2048), help="BACKLOG: listen queue length")
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=_env_int("GRACEFUL_TIMEOUT", 60),
+        help="GRACEFUL_TIMEOUT: seconds to let in-flight requests (e.g. uploads) finish on shutdown",
+    )
+    parser.add_argument(
+        "--limit-concurrency", type=int, default=_env_int("LIMIT_CONCURRENCY", 0),
+        help="LIMIT_CONCURRENCY: answer 503 above this many connections per worker (0: unlimited)",
+    )
+    parser.add_argument(
+        "--forwarded-allow-ips", default=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        help="FORWARDED_ALLOW_IPS: proxies trusted for X-Forwarded-For/Proto",
+    )
+    parser.add_argument(
+        "--live-audio-port", type=int, default=_env_int("LIVE_AUDIO_PORT", 0),
+        help="LIVE_AUDIO_PORT: serve live audio from a single-worker process on this port (required with more than 1 worker)",
+    )
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"), help="LOG_LEVEL")
+    return parser
+
+
+def _run(args, port: int, workers: int):
+    loop = "uvloop" if _has_module("uvloop") else "asyncio"
+    http = "httptools" if _has_module("httptools") else "h11"
+    print(
+        f"🚀 Starting {APP} on {args.host}:{port} with {workers} worker(s), "
+        f"{args.threadpool_size} threads each, loop={loop}, http={http}"
+    )
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency or None,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        log_level=args.log_level,
+        access_log=False,
+    )
+
+
+def _run_live_audio(args):
+    os.environ[live_relay.SERVED_HERE_ENV] = "1"
+    _run(args, args.live_audio_port, 1)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    missing = [name for name in SHARED_STATE_ENVS if not os.environ.get(name)]
+    if args.workers > 1 and missing:
+        parser.error(f"--workers {args.workers} needs shared state across workers; set {' and '.join(missing)}, or run 1 worker")
+    if args.workers > 1 and not args.live_audio_port:
+        parser.error(f"--workers {args.workers} needs a separate live audio process; set LIVE_AUDIO_PORT, or run 1 worker")
+    # Read by each worker at startup (see services/runtime.py).
+    os.environ[THREADPOOL_SIZE_ENV] = str(args.threadpool_size)
+
+    if args.live_audio_port:
+        # Stopped along with the main server (daemon processes are terminated at exit).
+        multiprocessing.get_context("spawn").Process(
+            target=_run_live_audio, args=(args,), name="live-audio", daemon=True
+        ).start()
+        os.environ[live_relay.SERVED_HERE_ENV] = "0"
+    _run(args, args.port, max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
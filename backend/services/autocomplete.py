@@ -0,0 +1,306 @@
+# backend/services/autocomplete.py
+#
+# Search-as-you-type suggestions for podcast titles, authors and lecturers,
+# ranked by plays. Each worker keeps a PrefixIndex in memory, built by a
+# streaming scan of the catalog at startup and every REBUILD_INTERVAL_SECONDS,
+# and kept current in between by incremental updates: this worker's creates,
+# edits, deletes and plays directly, other workers' edits and deletes through
+# the invalidation bus.
+#
+# A rebuild scans into a fresh index while the old one keeps serving. Updates
+# that arrive meanwhile go to the old index and into a change log, which is
+# replayed onto the fresh index just before it is swapped in, so nothing done
+# during the scan is lost.
+
+import bisect
+import heapq
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.background import PeriodicTask, register
+from backend.services.bus import publish, subscribe
+
+logger = logging.getLogger(__name__)
+
+PODCAST = "podcast"
+AUTHOR = "author"
+LECTURER = "lecturer"
+
+# Keys are truncated to this many characters; longer prefixes still match.
+MAX_KEY_LENGTH = 48
+# Besides the full label, index at most this many word starts per label
+# ("intro to calculus" -> "to calculus", "calculus").
+MAX_WORD_KEYS = 6
+# Ranges at most this large are ranked on the fly; larger ones (short,
+# common prefixes) are ranked once and cached until the index changes.
+SCAN_LIMIT = 256
+RANKED_CACHE_SIZE = 1024
+DEFAULT_LIMIT = 10
+SCAN_BATCH_SIZE = 1000
+# Periodic rebuild picks up username changes and plays recorded by other workers.
+REBUILD_INTERVAL_SECONDS = 10 * 60
+# Edits and deletes reach the other workers' indexes through the bus.
+PODCAST_CHANGED_CHANNEL = "autocomplete.podcast_changed"
+PODCAST_REMOVED_CHANNEL = "autocomplete.podcast_removed"
+
+EntryKey = Tuple[str, object] # (kind, podcast id / author name / owner id)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(text.casefold().split())
+
+
+def _keys_for(label: str) -> List[str]:
+    normalized = normalize(label)
+    if not normalized:
+        return []
+    keys = [normalized[:MAX_KEY_LENGTH]]
+    words = normalized.split(" ")
+    for i in range(1, min(len(words), MAX_WORD_KEYS + 1)):
+        keys.append(" ".join(words[i:])[:MAX_KEY_LENGTH])
+    return list(dict.fromkeys(keys))
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, entry) pairs searched with bisect. A lookup is two
+    binary searches plus ranking at most SCAN_LIMIT candidates (or a cache
+    hit for short prefixes), so latency is independent of catalog size and
+    memory is a few small tuples per title, author and lecturer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, EntryKey]] = []
+        self._labels: Dict[EntryKey, str] = {}
+        self._scores: Dict[EntryKey, int] = {}
+        # Authors and lecturers are shared by many podcasts: reference counts
+        # and summed plays let them be added/removed incrementally.
+        self._refcounts: Dict[EntryKey, int] = {}
+        self._podcasts: Dict[int, Tuple[str, Optional[str], int, Optional[str], int]] = {}
+        self._ranked: "OrderedDict[str, List[EntryKey]]" = OrderedDict()
+
+    # --- mutations (private helpers expect self._lock to be held) ---
+
+    def _add_entry(self, entry: EntryKey, label: str, score: int):
+        if entry in self._refcounts:
+            self._refcounts[entry] += 1
+            self._scores[entry] += score
+            return
+        self._refcounts[entry] = 1
+        self._scores[entry] = score
+        self._labels[entry] = label
+        for key in _keys_for(label):
+            bisect.insort(self._keys, (key, entry))
+
+    def _remove_entry(self, entry: EntryKey, score: int):
+        if entry not in self._refcounts:
+            return
+        self._refcounts[entry] -= 1
+        self._scores[entry] -= score
+        if self._refcounts[entry] > 0:
+            return
+        for key in _keys_for(self._labels[entry]):
+            i = bisect.bisect_left(self._keys, (key, entry))
+            if i < len(self._keys) and self._keys[i] == (key, entry):
+                del self._keys[i]
+        del self._refcounts[entry], self._scores[entry], self._labels[entry]
+
+    def _add_podcast(self, podcast_id: int, title: str, author: Optional[str], owner_id: int, username: Optional[str], plays: int):
+        self._podcasts[podcast_id] = (title, author, owner_id, username, plays)
+        if title:
+            self._add_entry((PODCAST, podcast_id), title, plays)
+        if author:
+            self._add_entry((AUTHOR, normalize(author)), author, plays)
+        if username:
+            self._add_entry((LECTURER, owner_id), username, plays)
+
+    def _remove_podcast(self, podcast_id: int):
+        existing = self._podcasts.pop(podcast_id, None)
+        if existing is None:
+            return
+        title, author, owner_id, username, plays = existing
+        if title:
+            self._remove_entry((PODCAST, podcast_id), plays)
+        if author:
+            self._remove_entry((AUTHOR, normalize(author)), plays)
+        if username:
+            self._remove_entry((LECTURER, owner_id), plays)
+
+    def upsert_podcast(self, podcast_id: int, title: str, author: Optional[str], owner_id: int, username: Optional[str], plays: int):
+        with self._lock:
+            self._remove_podcast(podcast_id)
+            self._add_podcast(podcast_id, title, author, owner_id, username, plays or 0)
+            self._ranked.clear()
+
+    def record_play(self, podcast_id: int, count: int = 1):
+        # Cached rankings for short prefixes stay as they are until the next
+        # mutation or rebuild; that staleness is cheaper than re-ranking per play.
+        with self._lock:
+            existing = self._podcasts.get(podcast_id)
+            if existing is None:
+                return
+            title, author, owner_id, username, plays = existing
+            self._podcasts[podcast_id] = (title, author, owner_id, username, plays + count)
+            for entry in ((PODCAST, podcast_id), (AUTHOR, normalize(author or "")), (LECTURER, owner_id)):
+                if entry in self._scores:
+                    self._scores[entry] += count
+
+    def remove_podcast(self, podcast_id: int):
+        with self._lock:
+            self._remove_podcast(podcast_id)
+            self._ranked.clear()
+
+    # --- queries ---
+
+    def suggest(self, query: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        prefix = normalize(query)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+        with self._lock:
+            ranked = self._ranked.get(prefix)
+            if ranked is not None:
+                self._ranked.move_to_end(prefix)
+            else:
+                lo = bisect.bisect_left(self._keys, (prefix,))
+                # "\uffff" sorts after every normalized (ASCII) continuation.
+                hi = bisect.bisect_left(self._keys, (prefix + "\uffff",), lo)
+                candidates = dict.fromkeys(entry for _, entry in self._keys[lo:hi])
+                ranked = heapq.nlargest(max(DEFAULT_LIMIT, limit), candidates, key=self._scores.__getitem__)
+                if hi - lo > SCAN_LIMIT:
+                    self._ranked[prefix] = ranked
+                    if len(self._ranked) > RANKED_CACHE_SIZE:
+                        self._ranked.popitem(last=False)
+            return [
+                {"kind": kind, "id": ref if kind != AUTHOR else None, "label": self._labels[(kind, ref)], "plays": self._scores[(kind, ref)]}
+                for kind, ref in ranked[:limit]
+            ]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+index = PrefixIndex()
+_built = threading.Event()
+_rebuild_lock = threading.Lock()
+# Guards the swap in rebuild() against concurrent updates.
+_log_lock = threading.Lock()
+# (PrefixIndex method, args) applied while a rebuild scans; None otherwise.
+_change_log: Optional[List[Tuple[str, tuple]]] = None
+
+
+def _apply(method: str, *args):
+    """Applies an incremental update to the live index and logs it for a running rebuild."""
+    with _log_lock:
+        if _change_log is not None:
+            _change_log.append((method, args))
+        if _built.is_set():
+            getattr(index, method)(*args)
+
+
+def rebuild(db: Session) -> int:
+    """
+    Builds a fresh index from a streaming scan, replays the updates made
+    during the scan onto it and swaps it in atomically.
+    """
+    global index, _change_log
+    with _rebuild_lock:
+        with _log_lock:
+            _change_log = []
+        try:
+            fresh = PrefixIndex()
+            rows = (
+                db.query(
+                    models.Podcast.id,
+                    models.Podcast.title,
+                    models.Podcast.author,
+                    models.Podcast.owner_id,
+                    models.User.username,
+                    models.Podcast.plays,
+                )
+                .outerjoin(models.User, models.User.id == models.Podcast.owner_id)
+                .yield_per(SCAN_BATCH_SIZE)
+            )
+            for podcast_id, title, author, owner_id, username, plays in rows:
+                fresh._add_podcast(podcast_id, title, author, owner_id, username, plays or 0)
+        except BaseException:
+            with _log_lock:
+                _change_log = None
+            raise
+        with _log_lock:
+            # Upserts and removes are idempotent. A replayed play the scan
+            # already saw counts twice until the next rebuild.
+            for method, args in _change_log:
+                getattr(fresh, method)(*args)
+            index = fresh
+            _change_log = None
+            _built.set()
+        return len(fresh._podcasts)
+
+
+def suggest(db: Session, query: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+    if not _built.is_set():
+        rebuild(db)
+    return index.suggest(query, limit)
+
+
+def podcast_changed(db: Session, podcast: models.Podcast):
+    """Reflects a created or edited podcast in the index (after commit)."""
+    publish(PODCAST_CHANGED_CHANNEL, id=podcast.id)
+    username = db.query(models.User.username).filter(models.User.id == podcast.owner_id).scalar()
+    _apply("upsert_podcast", podcast.id, podcast.title, podcast.author, podcast.owner_id, username, podcast.plays)
+
+
+def podcast_played(podcast_id: int, count: int = 1):
+    _apply("record_play", podcast_id, count)
+
+
+def podcast_removed(podcast_id: int):
+    publish(PODCAST_REMOVED_CHANNEL, id=podcast_id)
+    _apply("remove_podcast", podcast_id)
+
+
+def _remote_podcast_changed(event: dict):
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(models.Podcast, models.User.username)
+            .outerjoin(models.User, models.User.id == models.Podcast.owner_id)
+            .filter(models.Podcast.id == event["id"])
+            .first()
+        )
+    finally:
+        db.close()
+    if row is None:
+        _apply("remove_podcast", event["id"])
+        return
+    podcast, username = row
+    _apply("upsert_podcast", podcast.id, podcast.title, podcast.author, podcast.owner_id, username, podcast.plays)
+
+
+def _remote_podcast_removed(event: dict):
+    _apply("remove_podcast", event["id"])
+
+
+subscribe(PODCAST_CHANGED_CHANNEL, _remote_podcast_changed)
+subscribe(PODCAST_REMOVED_CHANNEL, _remote_podcast_removed)
+
+
+def _rebuild_job():
+    db = SessionLocal()
+    try:
+        count = rebuild(db)
+        logger.info("Rebuilt autocomplete index for %d podcasts", count)
+    finally:
+        db.close()
+
+
+rebuild_task = register(PeriodicTask("autocomplete-rebuild", REBUILD_INTERVAL_SECONDS, _rebuild_job, run_on_start=True))
@@ -0,0 +1,126 @@
+# backend/services/background.py
+
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, List
+
+try:
+    import fcntl
+except ImportError: # not available on Windows; every process runs singletons there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Singleton tasks run only in the process holding an exclusive lock on this
+# file. Workers of one server share it; separate hosts each need their own.
+LOCK_FILE_ENV = "BACKGROUND_LOCK_FILE"
+LOCK_FILE = os.environ.get(LOCK_FILE_ENV) or os.path.join(tempfile.gettempdir(), "crawford-podcasts-background.lock")
+
+_leader_file = None
+_leader_guard = threading.Lock()
+
+
+def is_leader() -> bool:
+    """
+    Whether this process runs the singleton tasks. The first process to lock
+    LOCK_FILE keeps the lock until it exits; the others retry on every run,
+    so one of them takes over when the leader goes away.
+    """
+    global _leader_file
+    if fcntl is None:
+        return True
+    with _leader_guard:
+        if _leader_file is not None:
+            return True
+        lock_file = open(LOCK_FILE, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _leader_file = lock_file
+        logger.info("Process %d runs the singleton background tasks", os.getpid())
+        return True
+
+
+class PeriodicTask:
+    """
+    Runs `func` every `interval` seconds on a daemon thread until stopped.
+    Exceptions are logged and the loop keeps going, so one bad run never kills
+    the job. `run_on_start` runs `func` once on the thread before the first
+    wait (used to warm in-memory indexes). `stop()` wakes the thread
+    immediately and, if `run_on_stop` is set, runs `func` one last time (used
+    to flush buffers on shutdown). A `singleton` task does database-wide work
+    that must not run in every worker at once; it runs only in the process
+    for which is_leader() holds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], None],
+        run_on_start: bool = False,
+        run_on_stop: bool = False,
+        singleton: bool = False,
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_on_start = run_on_start
+        self.run_on_stop = run_on_stop
+        self.singleton = singleton
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _run_once(self):
+        if self.singleton and not is_leader():
+            return
+        try:
+            self.func()
+        except Exception:
+            logger.exception("Background task %s failed", self.name)
+
+    def _loop(self):
+        if self.run_on_start:
+            self._run_once()
+        while not self._stop_event.wait(self.interval):
+            self._run_once()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        if self.run_on_stop:
+            self._run_once()
+
+
+# Tasks registered here are started/stopped by the app's lifecycle hooks in main.py.
+_registered_tasks: List[PeriodicTask] = []
+
+
+def register(task: PeriodicTask) -> PeriodicTask:
+    _registered_tasks.append(task)
+    return task
+
+
+def start_all():
+    for task in _registered_tasks:
+        task.start()
+
+
+def stop_all():
+    # Stop in reverse registration order so later tasks can depend on earlier ones.
+    for task in reversed(_registered_tasks):
+        task.stop()
@@ -0,0 +1,163 @@
+# backend/services/bus.py
+#
+# Cross-worker invalidation / pub-sub bus without an external broker. Events
+# go through the bus_events table of the database every worker already
+# shares: publishers append to an in-memory outbox that is written in one
+# insert per tick, and every worker polls the (indexed) table for events
+# from other processes. Works the same on SQLite and PostgreSQL, on one host
+# or several.
+
+import json
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import and_, or_
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1
+# Events are looked for this far behind the previous poll, so one whose
+# transaction committed a little after it was stamped is still delivered.
+SETTLE_SECONDS = 5
+POLL_BATCH_SIZE = 1000
+# Events older than this are deleted; they have been delivered long ago.
+RETENTION_SECONDS = 60 * 60
+PRUNE_EVERY_POLLS = 600
+
+# Identifies this process, so a worker skips the events it published itself.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+Handler = Callable[[dict], None]
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; every stored value is UTC.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class Bus:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._outbox: List[Tuple[str, str]] = []
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        # Nothing published before this process started concerns it.
+        self._since = datetime.now(timezone.utc)
+        self._seen: Dict[int, datetime] = {}
+        self._polls = 0
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Registers `handler(payload)` for events published by other processes."""
+        self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, **payload):
+        """
+        Queues an event for the other workers (call after the change has been
+        committed). Identical events queued within one tick are sent once.
+        """
+        event = (channel, json.dumps(payload, sort_keys=True, separators=(",", ":")))
+        with self._lock:
+            if event not in self._outbox:
+                self._outbox.append(event)
+
+    def flush(self) -> int:
+        """Writes queued events. Safe to call from scripts before they exit."""
+        with self._lock:
+            outbox, self._outbox = self._outbox, []
+        if not outbox:
+            return 0
+        now = datetime.now(timezone.utc)
+        db = self._session_factory()
+        try:
+            db.bulk_insert_mappings(models.BusEvent, [
+                {"channel": channel, "payload": payload, "origin": WORKER_ID, "created_at": now}
+                for channel, payload in outbox
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._outbox[:0] = outbox
+            raise
+        finally:
+            db.close()
+        self.published += len(outbox)
+        return len(outbox)
+
+    def poll(self) -> int:
+        """Delivers events from other workers that arrived since the last poll."""
+        started = datetime.now(timezone.utc)
+        # Look back SETTLE_SECONDS; events already delivered are skipped by id.
+        condition = models.BusEvent.created_at >= self._since - timedelta(seconds=SETTLE_SECONDS)
+        delivered = 0
+        db = self._session_factory()
+        try:
+            while True:
+                events = (
+                    db.query(models.BusEvent)
+                    .filter(condition, models.BusEvent.origin != WORKER_ID)
+                    .order_by(models.BusEvent.created_at, models.BusEvent.id)
+                    .limit(POLL_BATCH_SIZE)
+                    .all()
+                )
+                for event in events:
+                    if event.id not in self._seen:
+                        self._seen[event.id] = _as_utc(event.created_at)
+                        delivered += 1
+                        self._dispatch(event.channel, event.payload)
+                if len(events) < POLL_BATCH_SIZE:
+                    break
+                # Backlog: page on (created_at, id) until it is drained.
+                last = events[-1]
+                condition = or_(
+                    models.BusEvent.created_at > last.created_at,
+                    and_(models.BusEvent.created_at == last.created_at, models.BusEvent.id > last.id),
+                )
+
+            self._polls += 1
+            if self._polls % PRUNE_EVERY_POLLS == 0:
+                db.query(models.BusEvent).filter(
+                    models.BusEvent.created_at < started - timedelta(seconds=RETENTION_SECONDS)
+                ).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+        self.delivered += delivered
+        self._since = started
+        horizon = started - timedelta(seconds=2 * SETTLE_SECONDS)
+        self._seen = {
+            event_id: created_at for event_id, created_at in self._seen.items() if created_at >= horizon
+        }
+        return delivered
+
+    def _dispatch(self, channel: str, payload: str):
+        data = json.loads(payload)
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(data)
+            except Exception:
+                logger.exception("Bus handler for %s failed", channel)
+
+    def tick(self):
+        self.flush()
+        self.poll()
+
+
+bus = Bus()
+publish = bus.publish
+subscribe = bus.subscribe
+
+bus_task = register(PeriodicTask("invalidation-bus", POLL_INTERVAL_SECONDS, bus.tick, run_on_stop=True))
@@ -0,0 +1,60 @@
+# backend/services/catalog.py
+
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services import autocomplete, chat, entity_cache, feeds, fingerprint, listeners, live_relay, recommendations, seek_index, stats, storage, sync
+
+
+class PurgedPodcast(NamedTuple):
+    id: int
+    owner_id: Optional[int]
+    media_urls: List[str]
+
+
+def purge_podcast(db: Session, podcast: models.Podcast) -> PurgedPodcast:
+    """
+    Deletes a podcast and every row derived from it, without committing.
+    Pass the result to `finish_podcast_purge` once the commit has succeeded,
+    so a failed transaction never loses files.
+    """
+    listeners.delete_sketches(db, listeners.PODCAST, podcast.id)
+    stats.podcast_deleted(db, podcast)
+    recommendations.forget_podcast(db, podcast.id)
+    seek_index.forget_podcast(db, podcast.id)
+    fingerprint.forget_podcast(db, podcast.id)
+    db.query(models.PlaybackPosition).filter(
+        models.PlaybackPosition.podcast_id == podcast.id
+    ).delete(synchronize_session=False)
+    sync.record_deletion(db, sync.PODCAST, podcast.id)
+    db.delete(podcast)
+    return PurgedPodcast(
+        podcast.id,
+        podcast.owner_id,
+        [url for url in (podcast.audio_file_url, podcast.cover_art_url, podcast.hls_master_url) if url],
+    )
+
+
+def finish_podcast_purge(purged: PurgedPodcast):
+    for url in purged.media_urls:
+        storage.remove_media(url)
+    autocomplete.podcast_removed(purged.id)
+    entity_cache.podcast_removed(purged.id)
+    feeds.owner_changed(purged.owner_id)
+
+
+def purge_live_stream(db: Session, live_stream: models.LiveStream):
+    """Deletes a live stream and its derived rows, without committing."""
+    listeners.delete_sketches(db, listeners.LIVE_STREAM, live_stream.id)
+    stats.live_stream_deleted(db, live_stream)
+    chat.delete_transcript(db, live_stream.id)
+    sync.record_deletion(db, sync.LIVE_STREAM, live_stream.id)
+    db.delete(live_stream)
+
+
+def finish_live_stream_purge(live_stream_id: int):
+    entity_cache.live_stream_removed(live_stream_id)
+    chat.hub.close_room(live_stream_id, "Stream was deleted")
+    live_relay.hub.close(live_stream_id)
@@ -0,0 +1,278 @@
+# backend/services/chat.py
+#
+# Live stream chat hub. Each worker keeps a room per stream holding the
+# WebSocket connections it serves. A message is serialized once and queued to
+# every connection without awaiting, so fan-out costs one put per listener and
+# a slow client never holds up the others: a connection whose bounded send
+# queue overflows is disconnected. Messages reach rooms on other workers
+# through the bus and are written to the transcript in batches.
+
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.background import PeriodicTask, register
+from backend.services.bus import publish, subscribe
+from backend.services.rate_limit import MemoryBackend
+
+# Frames waiting for one client; a client this far behind is disconnected.
+SEND_QUEUE_SIZE = 256
+# Recent messages kept per room and sent to late joiners.
+HISTORY_SIZE = 50
+MAX_MESSAGE_LENGTH = 500
+# Per-user posting limit (token bucket).
+MESSAGES_PER_SECOND = 1
+MESSAGE_BURST = 5
+FLUSH_INTERVAL_SECONDS = 2
+
+# WebSocket close codes.
+CLOSE_TRY_AGAIN_LATER = 1013 # dropped as a slow consumer
+CLOSE_GOING_AWAY = 1001 # chat disabled or stream deleted
+
+MESSAGE_CHANNEL = "chat.message"
+CLOSED_CHANNEL = "chat.closed"
+
+
+def message_payload(message: models.ChatMessage) -> dict:
+    return {
+        "live_stream_id": message.live_stream_id,
+        "user_id": message.user_id,
+        "username": message.username,
+        "body": message.body,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def _frame(kind: str, **data) -> str:
+    return json.dumps({"type": kind, **data}, separators=(",", ":"))
+
+
+class Connection:
+    def __init__(self, websocket, user_id: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(SEND_QUEUE_SIZE)
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._sender = asyncio.get_running_loop().create_task(self._send_queued())
+
+    def offer(self, text: str) -> bool:
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _send_queued(self):
+        while True:
+            text = await self.queue.get()
+            await self.websocket.send_text(text)
+
+    def stop(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+
+    async def close(self, code: int, reason: str = ""):
+        self.stop()
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except RuntimeError:
+            pass # already closed by the client
+
+
+class Room:
+    def __init__(self, live_stream_id: int, history: List[dict]):
+        self.live_stream_id = live_stream_id
+        self.connections: Set[Connection] = set()
+        self.history = deque(history, maxlen=HISTORY_SIZE)
+
+
+class ChatHub:
+    """
+    Rooms and connections are only touched on the event loop. Bus handlers
+    and sync request handlers hand work to it with call_soon_threadsafe.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rooms: Dict[int, Room] = {}
+        self._lock = threading.Lock() # guards _pending, which the flush thread drains
+        self._pending: List[dict] = []
+        self._posting = MemoryBackend()
+        self.messages = 0
+        self.dropped = 0
+
+    # --- connections (event loop) ---
+
+    async def join(self, live_stream_id: int, websocket, user_id: int) -> Connection:
+        self._loop = asyncio.get_running_loop()
+        room = self.rooms.get(live_stream_id)
+        if room is None:
+            history = await asyncio.to_thread(self._load_history, live_stream_id)
+            room = self.rooms.setdefault(live_stream_id, Room(live_stream_id, history))
+        connection = Connection(websocket, user_id)
+        connection.start()
+        room.connections.add(connection)
+        connection.offer(_frame("history", messages=list(room.history)))
+        return connection
+
+    def leave(self, live_stream_id: int, connection: Connection):
+        connection.stop()
+        room = self.rooms.get(live_stream_id)
+        if room is not None:
+            room.connections.discard(connection)
+            if not room.connections:
+                del self.rooms[live_stream_id]
+
+    def post(self, live_stream_id: int, user_id: int, username: str, body: str) -> Optional[str]:
+        """Broadcasts a message from a connected user. Returns an error text if refused."""
+        body = body.strip()
+        if not body:
+            return "Message is empty"
+        if len(body) > MAX_MESSAGE_LENGTH:
+            return f"Message is longer than {MAX_MESSAGE_LENGTH} characters"
+        if self._posting.take(f"chat:{user_id}", MESSAGES_PER_SECOND, MESSAGE_BURST) > 0:
+            return "You are sending messages too fast"
+
+        message = message_payload(models.ChatMessage(
+            live_stream_id=live_stream_id,
+            user_id=user_id,
+            username=username,
+            body=body,
+            created_at=models.utcnow(),
+        ))
+        with self._lock:
+            self._pending.append(message)
+        self._deliver(message)
+        publish(MESSAGE_CHANNEL, message=message)
+        return None
+
+    def _deliver(self, message: dict):
+        room = self.rooms.get(message["live_stream_id"])
+        if room is None:
+            return
+        room.history.append(message)
+        text = _frame("message", message=message)
+        for connection in list(room.connections):
+            if not connection.offer(text):
+                self.dropped += 1
+                room.connections.discard(connection)
+                self._loop.create_task(connection.close(CLOSE_TRY_AGAIN_LATER, "Too slow to keep up"))
+        self.messages += 1
+
+    def _close_room(self, live_stream_id: int, reason: str):
+        room = self.rooms.pop(live_stream_id, None)
+        if room is not None:
+            for connection in room.connections:
+                self._loop.create_task(connection.close(CLOSE_GOING_AWAY, reason))
+
+    def _call_on_loop(self, callback, *args):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    # --- hooks (any thread) ---
+
+    def close_room(self, live_stream_id: int, reason: str = "Chat closed"):
+        """Disconnects everyone in a stream's chat here and on other workers."""
+        self._call_on_loop(self._close_room, live_stream_id, reason)
+        publish(CLOSED_CHANNEL, live_stream_id=live_stream_id, reason=reason)
+
+    def _remote_message(self, event: dict):
+        self._call_on_loop(self._deliver, event["message"])
+
+    def _remote_closed(self, event: dict):
+        self._call_on_loop(self._close_room, event["live_stream_id"], event["reason"])
+
+    # --- persistence (threads) ---
+
+    def _load_history(self, live_stream_id: int) -> List[dict]:
+        db = self._session_factory()
+        try:
+            rows = (
+                db.query(models.ChatMessage)
+                .filter(models.ChatMessage.live_stream_id == live_stream_id)
+                .order_by(models.ChatMessage.id.desc())
+                .limit(HISTORY_SIZE)
+                .all()
+            )
+            history = [message_payload(row) for row in reversed(rows)]
+        finally:
+            db.close()
+        # Messages posted here but not written yet.
+        with self._lock:
+            history += [m for m in self._pending if m["live_stream_id"] == live_stream_id]
+        return history[-HISTORY_SIZE:]
+
+    def flush(self) -> int:
+        """Writes buffered messages in one insert. Returns the number written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        db = self._session_factory()
+        try:
+            rows = self._writable(db, pending)
+            db.bulk_insert_mappings(models.ChatMessage, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+        finally:
+            db.close()
+        return len(rows)
+
+    @staticmethod
+    def _writable(db: Session, pending: List[dict]) -> List[dict]:
+        # Skip messages whose stream or author was deleted since they were sent.
+        stream_ids = {m["live_stream_id"] for m in pending}
+        user_ids = {m["user_id"] for m in pending}
+        streams = {row.id for row in db.query(models.LiveStream.id).filter(models.LiveStream.id.in_(stream_ids))}
+        users = {row.id for row in db.query(models.User.id).filter(models.User.id.in_(user_ids))}
+        return [
+            {**m, "created_at": datetime.fromisoformat(m["created_at"])}
+            for m in pending
+            if m["live_stream_id"] in streams and m["user_id"] in users
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "connections": sum(len(room.connections) for room in self.rooms.values()),
+            "messages": self.messages,
+            "dropped_slow_consumers": self.dropped,
+            "pending_writes": len(self._pending),
+        }
+
+
+hub = ChatHub()
+
+subscribe(MESSAGE_CHANNEL, hub._remote_message)
+subscribe(CLOSED_CHANNEL, hub._remote_closed)
+
+flush_task = register(PeriodicTask(
+    "chat-transcript-flush",
+    FLUSH_INTERVAL_SECONDS,
+    hub.flush,
+    run_on_stop=True,
+))
+
+
+def history_query(db: Session, live_stream_id: int):
+    return db.query(models.ChatMessage).filter(models.ChatMessage.live_stream_id == live_stream_id)
+
+
+def delete_transcript(db: Session, live_stream_id: int):
+    """Deletes a stream's stored messages, without committing."""
+    history_query(db, live_stream_id).delete(synchronize_session=False)
@@ -0,0 +1,235 @@
+# backend/services/entity_cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from backend import models
+from backend.schemas.live_stream import LiveStreamResponse
+from backend.schemas.podcast import PodcastResponse
+from backend.services import view_counts
+from backend.services.bus import publish, subscribe
+
+PODCAST_CACHE_SIZE = 10_000
+LIVE_STREAM_CACHE_SIZE = 1_000
+
+PODCAST_COUNTERS = ("views", "plays", "unique_listeners")
+LIVE_STREAM_COUNTERS = ("current_viewers", "total_views", "unique_viewers")
+
+# Other workers drop their copy of an entity when it changes here.
+PODCAST_CHANNEL = "entity_cache.podcast"
+LIVE_STREAM_CHANNEL = "entity_cache.live_stream"
+
+Entry = Tuple[dict, dict] # (serialized metadata, live counters)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[Entry] = None
+        self.error: Optional[BaseException] = None
+        self.stale = False
+
+
+class EntityCache:
+    """
+    Bounded LRU of serialized response payloads keyed by id. Metadata and
+    counters are kept apart: write paths overwrite counters in place, while
+    edits and deletes invalidate the whole entry. Concurrent misses for the
+    same id share one load (single-flight), and a load that races with an
+    invalidation is returned to its callers but not cached.
+    """
+
+    def __init__(self, name: str, max_entries: int, counter_fields: Iterable[str]):
+        self.name = name
+        self.max_entries = max_entries
+        self.counter_fields = tuple(counter_fields)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Entry]" = OrderedDict()
+        self._inflight: Dict[int, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0 # misses that waited on another request's load
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _merged(entry: Optional[Entry]) -> Optional[dict]:
+        if entry is None:
+            return None
+        payload, counters = entry
+        return {**payload, **counters}
+
+    def _store(self, key: int, entry: Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, key: int, load: Callable[[], Optional[Entry]]) -> Optional[dict]:
+        """Returns payload merged with counters, or None if `load` finds nothing."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._merged(entry)
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._merged(flight.entry)
+
+        try:
+            flight.entry = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.entry is not None and not flight.stale:
+                    self._store(key, flight.entry)
+            flight.done.set()
+        return self._merged(flight.entry)
+
+    def put(self, key: int, entry: Entry):
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                flight.stale = True
+            self._store(key, entry)
+
+    def update_counters(self, key: int, **values):
+        """Overwrites counters of a cached entry; uncached ids are ignored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1].update((field, value) for field, value in values.items() if field in self.counter_fields)
+
+    def add_counters(self, key: int, **deltas):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                counters = entry[1]
+                for field, delta in deltas.items():
+                    counters[field] = (counters.get(field) or 0) + delta
+
+    def invalidate(self, key: int):
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                flight.stale = True
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for flight in self._inflight.values():
+                flight.stale = True
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+podcasts = EntityCache("podcasts", PODCAST_CACHE_SIZE, PODCAST_COUNTERS)
+live_streams = EntityCache("live_streams", LIVE_STREAM_CACHE_SIZE, LIVE_STREAM_COUNTERS)
+
+
+def _split(payload: dict, counter_fields: Tuple[str, ...]) -> Entry:
+    counters = {field: payload.pop(field) for field in counter_fields}
+    return payload, counters
+
+
+def podcast_counters(podcast: models.Podcast) -> dict:
+    # Detail-page views are buffered (services/view_counts.py); include the unflushed ones.
+    return {
+        "views": (podcast.views or 0) + view_counts.counter.pending(podcast.id),
+        "plays": podcast.plays or 0,
+        "unique_listeners": podcast.unique_listeners or 0,
+    }
+
+
+def podcast_entry(podcast: Optional[models.Podcast]) -> Optional[Entry]:
+    if podcast is None:
+        return None
+    payload, _ = _split(PodcastResponse.model_validate(podcast).model_dump(), PODCAST_COUNTERS)
+    return payload, podcast_counters(podcast)
+
+
+def live_stream_entry(live_stream: Optional[models.LiveStream]) -> Optional[Entry]:
+    if live_stream is None:
+        return None
+    return _split(LiveStreamResponse.model_validate(live_stream).model_dump(), LIVE_STREAM_COUNTERS)
+
+
+# --- Write-path hooks (call after commit) ---------------------------------------
+# This worker updates its copy in place; other workers invalidate theirs.
+
+def podcast_changed(podcast: models.Podcast):
+    """Write-through: replaces the cached payload with the committed row."""
+    podcasts.put(podcast.id, podcast_entry(podcast))
+    publish(PODCAST_CHANNEL, id=podcast.id)
+
+
+def podcast_counters_changed(podcast: models.Podcast):
+    podcasts.update_counters(podcast.id, **podcast_counters(podcast))
+    publish(PODCAST_CHANNEL, id=podcast.id)
+
+
+def podcast_removed(podcast_id: int):
+    podcasts.invalidate(podcast_id)
+    publish(PODCAST_CHANNEL, id=podcast_id)
+
+
+def live_stream_changed(live_stream: models.LiveStream):
+    live_streams.put(live_stream.id, live_stream_entry(live_stream))
+    publish(LIVE_STREAM_CHANNEL, id=live_stream.id)
+
+
+def live_stream_counters_changed(live_stream: models.LiveStream):
+    live_streams.update_counters(
+        live_stream.id, **{field: getattr(live_stream, field) or 0 for field in LIVE_STREAM_COUNTERS}
+    )
+    publish(LIVE_STREAM_CHANNEL, id=live_stream.id)
+
+
+def live_stream_removed(live_stream_id: int):
+    live_streams.invalidate(live_stream_id)
+    publish(LIVE_STREAM_CHANNEL, id=live_stream_id)
+
+
+def _views_flushed(event: dict):
+    for podcast_id in event["podcast_ids"]:
+        podcasts.invalidate(podcast_id)
+
+
+subscribe(PODCAST_CHANNEL, lambda event: podcasts.invalidate(event["id"]))
+subscribe(LIVE_STREAM_CHANNEL, lambda event: live_streams.invalidate(event["id"]))
+subscribe(view_counts.FLUSHED_CHANNEL, _views_flushed)
+
+
+def stats() -> list:
+    return [podcasts.stats(), live_streams.stats()]
@@ -0,0 +1,143 @@
+# backend/services/exports.py
+#
+# Streaming admin exports. Rows are read through a server-side cursor
+# (yield_per) and encoded in small chunks as they arrive, so memory stays
+# flat no matter how many rows are exported.
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from backend import models
+from backend.database import SessionLocal
+
+NDJSON = "ndjson"
+CSV = "csv"
+MEDIA_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv; charset=utf-8",
+}
+# Rows fetched per round trip, and rows encoded per chunk sent to the client.
+FETCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+# Builds the export query (selecting plain columns) on a given session.
+QueryFactory = Callable[..., Query]
+
+
+def users_query(db: Session, role: Optional[str] = None, is_active: Optional[bool] = None) -> Query:
+    # Never export password hashes.
+    query = db.query(
+        models.User.id,
+        models.User.username,
+        models.User.email,
+        models.User.role,
+        models.User.is_active,
+        models.User.is_admin,
+    ).order_by(models.User.id)
+    if role is not None:
+        query = query.filter(models.User.role == role)
+    if is_active is not None:
+        query = query.filter(models.User.is_active == is_active)
+    return query
+
+
+def podcasts_query(
+    db: Session,
+    owner_id: Optional[int] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    min_plays: Optional[int] = None,
+) -> Query:
+    query = (
+        db.query(
+            models.Podcast.id,
+            models.Podcast.title,
+            models.Podcast.author,
+            models.Podcast.owner_id,
+            models.User.username.label("owner_username"),
+            models.Podcast.uploaded_at,
+            models.Podcast.duration_minutes,
+            models.Podcast.views,
+            models.Podcast.plays,
+            models.Podcast.unique_listeners,
+        )
+        .outerjoin(models.User, models.User.id == models.Podcast.owner_id)
+        .order_by(models.Podcast.id)
+    )
+    if owner_id is not None:
+        query = query.filter(models.Podcast.owner_id == owner_id)
+    if uploaded_after is not None:
+        query = query.filter(models.Podcast.uploaded_at >= uploaded_after)
+    if uploaded_before is not None:
+        query = query.filter(models.Podcast.uploaded_at < uploaded_before)
+    if min_plays is not None:
+        query = query.filter(models.Podcast.plays >= min_plays)
+    return query
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_chunks(columns: List[str], rows) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({c: _plain(v) for c, v in zip(columns, row)}, separators=(",", ":")))
+        if len(lines) >= CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines.clear()
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    value = _plain(value)
+    # Titles and names are user-supplied: keep spreadsheets from running them as formulas.
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+
+def _csv_chunks(columns: List[str], rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_cell(v) for v in row])
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def stream(fmt: str, build_query: QueryFactory, **filters) -> Iterator[str]:
+    """
+    Generator for a StreamingResponse. It owns its session: the request's
+    session may be closed before the body has finished streaming.
+    """
+    db = SessionLocal()
+    try:
+        query = build_query(db, **filters)
+        columns = [column["name"] for column in query.column_descriptions]
+        rows = query.yield_per(FETCH_SIZE)
+        chunks = _csv_chunks if fmt == CSV else _ndjson_chunks
+        yield from chunks(columns, rows)
+    finally:
+        db.close()
+
+
+def filename(kind: str, fmt: str) -> str:
+    return f"{kind}-{date.today().isoformat()}.{fmt}"
@@ -0,0 +1,311 @@
+# backend/services/feeds.py
+#
+# RSS 2.0 podcast feeds (global and per lecturer) for standard podcast apps.
+# Feeds are rendered to files once per version and then served from disk:
+# a poll that hits the cache costs no database query.
+#
+# Links and enclosure URLs are built from PUBLIC_BASE_URL, the address the
+# site is reached at, never from the request's Host header: one rendering is
+# shared by every client, so a forged Host must not end up in it.
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, NamedTuple, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import media_signing, storage
+from backend.services.bus import publish, subscribe
+
+FEED_TITLE = "Crawford Podcasts"
+# Rendered feeds are also refreshed after this long, which picks up changes
+# made outside this process (other workers, the bulk importer) and renames.
+FEED_MAX_AGE_SECONDS = 15 * 60
+# Feed clients are asked to wait this long between polls.
+CLIENT_MAX_AGE_SECONDS = 5 * 60
+MAX_CACHED_FEEDS = 512
+# Replaced feed files are deleted after this delay, so a request that was
+# handed the previous entry can still open it.
+RETIRED_FILE_GRACE_SECONDS = 60
+RENDER_BATCH_SIZE = 500
+
+PUBLIC_BASE_URL_ENV = "PUBLIC_BASE_URL"
+PUBLIC_BASE_URL = os.environ.get(PUBLIC_BASE_URL_ENV, "http://localhost:8000").rstrip("/")
+
+FeedKey = Optional[int] # owner id, or None for the global feed
+
+
+class CachedFeed(NamedTuple):
+    version: int
+    rendered_at: float
+    path: Optional[str] # None: the owner does not exist
+    gzip_path: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[datetime]
+
+
+# Version stamps: bumped (in memory) by every podcast write path. The global
+# feed has its own stamp under the None key and is bumped along with every owner.
+_versions: Dict[Optional[int], int] = {}
+_versions_lock = threading.Lock()
+
+_cache: "OrderedDict[FeedKey, CachedFeed]" = OrderedDict()
+_cache_lock = threading.Lock()
+_render_locks: Dict[FeedKey, threading.Lock] = {}
+_cache_dir: Optional[str] = None
+
+
+OWNER_CHANGED_CHANNEL = "feeds.owner_changed"
+
+
+def owner_changed(owner_id: Optional[int]):
+    """Marks the owner's feed and the global feed as stale in every worker (call after commit)."""
+    _bump(owner_id)
+    publish(OWNER_CHANGED_CHANNEL, owner_id=owner_id)
+
+
+def _bump(owner_id: Optional[int]):
+    with _versions_lock:
+        _versions[None] = _versions.get(None, 0) + 1
+        if owner_id is not None:
+            _versions[owner_id] = _versions.get(owner_id, 0) + 1
+
+
+subscribe(OWNER_CHANGED_CHANNEL, lambda event: _bump(event["owner_id"]))
+
+
+def _version(owner_id: Optional[int]) -> int:
+    with _versions_lock:
+        return _versions.get(owner_id, 0)
+
+
+def _directory() -> str:
+    global _cache_dir
+    if _cache_dir is None:
+        _cache_dir = tempfile.mkdtemp(prefix="feeds-")
+    return _cache_dir
+
+
+def _rfc822(value: Optional[datetime]) -> str:
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc) # SQLite drops the offset
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _absolute(url: Optional[str]) -> Optional[str]:
+    relative = storage.relative_path_for_url(url)
+    if relative is None:
+        return url # external URL (or nothing)
+    # Signed with a long expiry; a feed is re-rendered well before it runs out.
+    signed = media_signing.signed_url(
+        storage.url_for_relative_path(relative),
+        media_signing.FEED_URL_TTL_SECONDS,
+        media_signing.FEED_EXPIRY_GRANULARITY_SECONDS,
+    )
+    return PUBLIC_BASE_URL + signed
+
+
+def _item_xml(podcast: models.Podcast, username: Optional[str]) -> str:
+    audio_url = _absolute(podcast.audio_file_url)
+    audio_path = storage.path_for_url(podcast.audio_file_url)
+    try:
+        length = os.path.getsize(audio_path) if audio_path else 0
+    except OSError:
+        length = 0
+    mime_type = mimetypes.guess_type(audio_url or "")[0] or "audio/mpeg"
+    parts = [
+        "<item>",
+        f"<title>{escape(podcast.title or '')}</title>",
+        f"<guid isPermaLink=\"false\">podcast-{podcast.id}</guid>",
+        f"<pubDate>{_rfc822(podcast.uploaded_at)}</pubDate>",
+    ]
+    if podcast.description:
+        parts.append(f"<description>{escape(podcast.description)}</description>")
+    if audio_url:
+        parts.append(f"<enclosure url={quoteattr(audio_url)} length=\"{length}\" type={quoteattr(mime_type)}/>")
+    author = podcast.author or username
+    if author:
+        parts.append(f"<itunes:author>{escape(author)}</itunes:author>")
+    if podcast.duration_minutes:
+        parts.append(f"<itunes:duration>{podcast.duration_minutes * 60}</itunes:duration>")
+    if podcast.cover_art_url:
+        parts.append(f"<itunes:image href={quoteattr(_absolute(podcast.cover_art_url))}/>")
+    parts.append("</item>\n")
+    return "".join(parts)
+
+
+def _render(key: FeedKey, version: int, previous: Optional[CachedFeed]) -> CachedFeed:
+    """
+    Streams the feed from the database into a plain and a gzipped file.
+    Rows are fetched in batches and written as they arrive, so memory does
+    not grow with the size of the archive.
+    """
+    owner_id = key
+    rendered_at = time.time()
+    db = SessionLocal()
+    try:
+        title = FEED_TITLE
+        if owner_id is not None:
+            username = db.query(models.User.username).filter(models.User.id == owner_id).scalar()
+            if username is None:
+                return CachedFeed(version, rendered_at, None, None, None, None)
+            title = f"{username} - {FEED_TITLE}"
+        self_url = PUBLIC_BASE_URL + (f"/feeds/lecturers/{owner_id}.xml" if owner_id is not None else "/feeds/podcasts.xml")
+
+        rows = (
+            db.query(models.Podcast, models.User.username)
+            .outerjoin(models.User, models.User.id == models.Podcast.owner_id)
+            .order_by(models.Podcast.uploaded_at.desc(), models.Podcast.id.desc())
+        )
+        if owner_id is not None:
+            rows = rows.filter(models.Podcast.owner_id == owner_id)
+
+        fd, path = tempfile.mkstemp(suffix=".xml", dir=_directory())
+        gzip_path = path + ".gz"
+        digest = hashlib.sha1()
+        with os.fdopen(fd, "wb") as plain, gzip.open(gzip_path, "wb", compresslevel=6) as packed:
+            def write(text: str):
+                data = text.encode("utf-8")
+                digest.update(data)
+                plain.write(data)
+                packed.write(data)
+
+            write(
+                "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+                "<rss version=\"2.0\" xmlns:itunes=\"http://www.itunes.com/dtds/podcast-1.0.dtd\" "
+                "xmlns:atom=\"http://www.w3.org/2005/Atom\">\n<channel>\n"
+                f"<title>{escape(title)}</title>\n"
+                f"<link>{escape(PUBLIC_BASE_URL + '/')}</link>\n"
+                f"<atom:link href={quoteattr(self_url)} rel=\"self\" type=\"application/rss+xml\"/>\n"
+                f"<description>{escape(title)}</description>\n"
+                "<language>en</language>\n"
+            )
+            for podcast, username in rows.yield_per(RENDER_BATCH_SIZE):
+                write(_item_xml(podcast, username))
+            write("</channel>\n</rss>\n")
+    finally:
+        db.close()
+
+    etag = f"\"{digest.hexdigest()}\""
+    last_modified = datetime.fromtimestamp(int(rendered_at), timezone.utc)
+    if previous is not None and previous.etag == etag:
+        # Unchanged content keeps its validators, so conditional requests keep hitting.
+        last_modified = previous.last_modified
+    return CachedFeed(version, rendered_at, path, gzip_path, etag, last_modified)
+
+
+def _discard(entry: Optional[CachedFeed]):
+    if entry is None or entry.path is None:
+        return
+    for path in (entry.path, entry.gzip_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_fresh(entry: Optional[CachedFeed], version: int) -> bool:
+    return entry is not None and entry.version == version and time.time() - entry.rendered_at < FEED_MAX_AGE_SECONDS
+
+
+def get_feed(owner_id: Optional[int]) -> CachedFeed:
+    """
+    Returns the cached feed, rendering it first if its version stamp moved
+    or it expired. Concurrent requests for the same stale feed wait for a
+    single render instead of each querying the database.
+    """
+    key = owner_id
+    version = _version(owner_id)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if _is_fresh(entry, version):
+            _cache.move_to_end(key)
+            return entry
+        render_lock = _render_locks.setdefault(key, threading.Lock())
+
+    with render_lock:
+        with _cache_lock:
+            entry = _cache.get(key)
+        version = _version(owner_id)
+        if _is_fresh(entry, version):
+            return entry
+        fresh = _render(key, version, entry)
+        evicted = []
+        with _cache_lock:
+            _cache[key] = fresh
+            _cache.move_to_end(key)
+            while len(_cache) > MAX_CACHED_FEEDS:
+                old_key, old_entry = _cache.popitem(last=False)
+                _render_locks.pop(old_key, None)
+                evicted.append(old_entry)
+        for old in [entry] + evicted:
+            if old is not None and old.path is not None:
+                timer = threading.Timer(RETIRED_FILE_GRACE_SECONDS, _discard, (old,))
+                timer.daemon = True
+                timer.start()
+        return fresh
+
+
+def _not_modified(request: Request, entry: CachedFeed) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or entry.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def feed_response(request: Request, owner_id: Optional[int]) -> Response:
+    """Serves a feed with ETag/Last-Modified validation and gzip when accepted."""
+    entry = get_feed(owner_id)
+    if entry.path is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND, content="Feed not found", media_type="text/plain")
+
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={CLIENT_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    path = entry.path
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        path = entry.gzip_path
+        headers["Content-Encoding"] = "gzip"
+    # FileResponse streams the file in chunks; stat_result is omitted so the
+    # ETag/Last-Modified set above are the ones clients see.
+    return FileResponse(path, media_type="application/rss+xml; charset=utf-8", headers=headers)
+
+
+def clear():
+    """Drops every cached feed and its files (on shutdown)."""
+    global _cache_dir
+    with _cache_lock:
+        entries = list(_cache.values())
+        _cache.clear()
+        _render_locks.clear()
+    for entry in entries:
+        _discard(entry)
+    if _cache_dir is not None:
+        shutil.rmtree(_cache_dir, ignore_errors=True)
+        _cache_dir = None
@@ -0,0 +1,424 @@
+# backend/services/fingerprint.py
+#
+# Near-duplicate detection for uploaded audio. Exact hashes (content_hash)
+# miss a lecture that was trimmed or re-encoded before being uploaded again;
+# acoustic fingerprints do not.
+#
+# Audio is decoded to 8 kHz mono (media_tools.pcm_stream) and turned into a
+# spectrogram chunk by chunk. Its peaks (local maxima over about half a second
+# and 120 Hz) survive re-encoding and volume changes. Pairs of nearby peaks
+# are hashed as (f1, f2, dt), and each hash is stored with the time of its
+# first peak in audio_fingerprints, which has an index on the hash: an
+# inverted index. Matching a new upload looks up its own hashes there, so it
+# costs index probes rather than a scan of the catalog. A catalog podcast is
+# a likely duplicate if many hashes agree on the same time shift between the
+# two files. Trimming changes the shift but not the agreement.
+#
+# Only hashes in a fixed pseudo-random quarter of the hash space are stored
+# (HASH_SAMPLING). Both copies of a recording keep the same quarter, so
+# matching still works with a quarter of the rows.
+#
+# Jobs run on a small thread pool after upload; older podcasts are indexed by:
+#   python -m backend.services.fingerprint
+
+import argparse
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Set
+
+import numpy as np
+from scipy import ndimage, signal
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session, aliased
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import media_tools, storage
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+CHUNK_SECONDS = 10
+FFT_SIZE = 1024 # 7.8 Hz bins
+HOP = 256 # 32 ms frames
+MIN_BIN, MAX_BIN = 2, 511 # below ~16 Hz and the Nyquist bin carry nothing useful
+PEAK_TIME_RADIUS = 8 # frames
+PEAK_FREQ_RADIUS = 15 # bins
+PEAK_FLOOR_DB = -60.0 # below this a "peak" is noise in near silence
+FAN_OUT = 3 # pairs per anchor peak
+MAX_PAIR_FRAMES = 63 # dt fits in 6 bits
+HASH_SAMPLING = 4 # keep 1 hash in 4, chosen by hash value
+
+# Matching
+LOOKUP_BATCH = 500
+MIN_ALIGNED_HASHES = 20
+MIN_SCORE = 0.15 # aligned hashes / hashes of the shorter file
+DELTA_TOLERANCE_FRAMES = 2 # re-encoding can move peaks by a frame
+MAX_CANDIDATES = 5
+FINGERPRINT_WORKERS = 1
+
+OPEN = "open"
+DISMISSED = "dismissed"
+
+
+class Fingerprint(NamedTuple):
+    hashes: np.ndarray # uint32
+    offsets: np.ndarray # frame of the anchor peak, int32
+
+
+class Match(NamedTuple):
+    podcast_id: int
+    score: float
+    aligned: int
+    offset_seconds: float # where this file starts within the other
+
+
+def frames_to_seconds(frames) -> float:
+    return float(frames) * HOP / SAMPLE_RATE
+
+
+class PeakFinder:
+    """Streaming spectrogram peak picker. Feed mono float samples at SAMPLE_RATE."""
+
+    def __init__(self):
+        self._window = signal.get_window("hann", FFT_SIZE).astype(np.float32)
+        self._scale = 2 / self._window.sum() # full-scale sine -> 0 dB
+        self._samples = np.zeros(0, dtype=np.float32) # not yet framed
+        self._spectrum = np.zeros((0, MAX_BIN - MIN_BIN), dtype=np.float32) # frames held for context
+        self._first_frame = 0 # absolute index of self._spectrum[0]
+        self._decided = 0 # absolute index of the first frame not yet searched for peaks
+        self._times: List[np.ndarray] = []
+        self._bins: List[np.ndarray] = []
+
+    def feed(self, samples: np.ndarray):
+        samples = np.concatenate([self._samples, samples])
+        count = max(0, (len(samples) - FFT_SIZE) // HOP + 1)
+        if count == 0:
+            self._samples = samples
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::HOP][:count]
+        self._samples = samples[count * HOP:]
+        magnitude = np.abs(np.fft.rfft(frames * self._window, axis=1))[:, MIN_BIN:MAX_BIN] * self._scale
+        spectrum = 20 * np.log10(np.maximum(magnitude, 1e-10)).astype(np.float32)
+        self._spectrum = np.concatenate([self._spectrum, spectrum])
+        self._pick(final=False)
+
+    def _pick(self, final: bool):
+        # A frame is final once PEAK_TIME_RADIUS frames after it are known.
+        spectrum = self._spectrum
+        settled = len(spectrum) if final else len(spectrum) - PEAK_TIME_RADIUS
+        start = self._decided - self._first_frame
+        if settled <= start:
+            return
+        neighborhood = ndimage.maximum_filter(
+            spectrum, size=(2 * PEAK_TIME_RADIUS + 1, 2 * PEAK_FREQ_RADIUS + 1), mode="constant", cval=-np.inf
+        )
+        peaks = (spectrum == neighborhood) & (spectrum > PEAK_FLOOR_DB)
+        peaks[:start] = False
+        peaks[settled:] = False
+        times, bins = np.nonzero(peaks)
+        self._times.append((times + self._first_frame).astype(np.int32))
+        self._bins.append((bins + MIN_BIN).astype(np.int32))
+        self._decided = self._first_frame + settled
+        # Keep what the next call needs: context for settled frames plus the unsettled ones.
+        keep_from = max(0, settled - PEAK_TIME_RADIUS)
+        self._spectrum = spectrum[keep_from:]
+        self._first_frame += keep_from
+
+    def peaks(self):
+        """(frames, bins) of all peaks, in time order."""
+        self._pick(final=True)
+        times = np.concatenate(self._times) if self._times else np.zeros(0, dtype=np.int32)
+        bins = np.concatenate(self._bins) if self._bins else np.zeros(0, dtype=np.int32)
+        return times, bins
+
+
+def _sampled(hashes: np.ndarray) -> np.ndarray:
+    # Multiplicative hashing spreads (f1, f2, dt) evenly before thresholding.
+    mixed = (hashes.astype(np.uint64) * np.uint64(2654435761)) & np.uint64(0xFFFFFFFF)
+    return mixed < np.uint64(2 ** 32 // HASH_SAMPLING)
+
+
+def pair_peaks(times: np.ndarray, bins: np.ndarray) -> Fingerprint:
+    """Hashes each peak with the next FAN_OUT peaks less than MAX_PAIR_FRAMES later."""
+    all_hashes, all_offsets = [], []
+    used = np.zeros(len(times), dtype=np.int32)
+    step = 1
+    while step < len(times) and (used < FAN_OUT).any():
+        anchor = np.arange(len(times) - step)
+        dt = times[anchor + step] - times[anchor]
+        if not (dt <= MAX_PAIR_FRAMES).any():
+            break
+        valid = (dt >= 1) & (dt <= MAX_PAIR_FRAMES) & (used[anchor] < FAN_OUT)
+        anchor = anchor[valid]
+        used[anchor] += 1
+        all_hashes.append(
+            (bins[anchor].astype(np.uint32) << 15) | (bins[anchor + step].astype(np.uint32) << 6) | dt[valid].astype(np.uint32)
+        )
+        all_offsets.append(times[anchor])
+        step += 1
+    if not all_hashes:
+        return Fingerprint(np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int32))
+    hashes, offsets = np.concatenate(all_hashes), np.concatenate(all_offsets)
+    keep = _sampled(hashes)
+    return Fingerprint(hashes[keep], offsets[keep])
+
+
+def fingerprint_file(path: str) -> Fingerprint:
+    """Raises one of media_tools.DECODE_ERRORS if the file cannot be decoded."""
+    finder = PeakFinder()
+    with media_tools.pcm_stream(path, SAMPLE_RATE, 1, CHUNK_SECONDS) as stream:
+        for samples in stream.chunks:
+            mono = samples.mean(axis=1)
+            if stream.sample_rate != SAMPLE_RATE:
+                # WAV without ffmpeg: resample per chunk (the seams cost a few peaks at most).
+                mono = signal.resample_poly(mono, SAMPLE_RATE, stream.sample_rate).astype(np.float32)
+            finder.feed(mono)
+    return pair_peaks(*finder.peaks())
+
+
+def find_matches(db: Session, podcast_id: int, fingerprint: Fingerprint) -> List[Match]:
+    """Catalog podcasts whose stored hashes align with `fingerprint`, best first."""
+    if len(fingerprint.hashes) == 0:
+        return []
+    unique_hashes = np.unique(fingerprint.hashes)
+    # Query offsets per hash, for joining posting lists back to the query.
+    order = np.argsort(fingerprint.hashes, kind="stable")
+    sorted_hashes = fingerprint.hashes[order]
+    sorted_offsets = fingerprint.offsets[order]
+
+    candidate_ids, deltas = [], []
+    for start in range(0, len(unique_hashes), LOOKUP_BATCH):
+        batch = [int(h) for h in unique_hashes[start:start + LOOKUP_BATCH]]
+        rows = db.query(
+            models.AudioFingerprint.hash, models.AudioFingerprint.podcast_id, models.AudioFingerprint.offset
+        ).filter(
+            models.AudioFingerprint.hash.in_(batch), models.AudioFingerprint.podcast_id != podcast_id
+        ).all()
+        if not rows:
+            continue
+        found = np.array(rows, dtype=np.int64)
+        lo = np.searchsorted(sorted_hashes, found[:, 0], side="left")
+        repeats = np.searchsorted(sorted_hashes, found[:, 0], side="right") - lo
+        # Each stored row pairs with every occurrence of its hash in the query.
+        row_index = np.repeat(np.arange(len(found)), repeats)
+        query_index = np.repeat(lo, repeats) + np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        candidate_ids.append(found[row_index, 1])
+        deltas.append(found[row_index, 2] - sorted_offsets[query_index])
+    if not candidate_ids:
+        return []
+
+    # Votes per (candidate, time shift), sorted by candidate then shift.
+    shifts = np.stack([np.concatenate(candidate_ids), np.concatenate(deltas) // DELTA_TOLERANCE_FRAMES], axis=1)
+    pairs, counts = np.unique(shifts, axis=0, return_counts=True)
+    candidates, shift = pairs[:, 0], pairs[:, 1]
+    # Count the next shift too, for peaks that moved across a bin edge.
+    adjacent = np.r_[(candidates[1:] == candidates[:-1]) & (shift[1:] == shift[:-1] + 1), False]
+    votes = counts + np.where(adjacent, np.r_[counts[1:], 0], 0)
+    first = np.flatnonzero(np.r_[True, candidates[1:] != candidates[:-1]])
+    best = {}
+    for begin, end in zip(first, np.r_[first[1:], len(candidates)]):
+        top = begin + int(np.argmax(votes[begin:end]))
+        best[int(candidates[top])] = (int(votes[top]), int(shift[top]))
+
+    sizes = dict(
+        db.query(models.PodcastFingerprint.podcast_id, models.PodcastFingerprint.hash_count).filter(
+            models.PodcastFingerprint.podcast_id.in_(list(best))
+        ).all()
+    )
+    matches = []
+    for candidate, (aligned, delta) in best.items():
+        shorter = min(len(fingerprint.hashes), sizes.get(candidate) or len(fingerprint.hashes))
+        score = aligned / max(shorter, 1)
+        if aligned >= MIN_ALIGNED_HASHES and score >= MIN_SCORE:
+            matches.append(Match(candidate, round(min(score, 1.0), 3), aligned, frames_to_seconds(delta * DELTA_TOLERANCE_FRAMES)))
+    matches.sort(key=lambda m: m.score, reverse=True)
+    return matches[:MAX_CANDIDATES]
+
+
+def _forget_own(db: Session, podcast_id: int) -> Set[int]:
+    """
+    Drops a podcast's hashes and the flags raised against it, but not flags
+    on other podcasts that name it as their original. Returns the originals
+    of the dismissed flags, so a re-index can keep them dismissed. Caller
+    commits.
+    """
+    dismissed = {
+        duplicate_of_id for (duplicate_of_id,) in db.query(models.DuplicateCandidate.duplicate_of_id).filter(
+            models.DuplicateCandidate.podcast_id == podcast_id,
+            models.DuplicateCandidate.status == DISMISSED,
+        )
+    }
+    db.query(models.AudioFingerprint).filter(
+        models.AudioFingerprint.podcast_id == podcast_id
+    ).delete(synchronize_session=False)
+    db.query(models.PodcastFingerprint).filter(
+        models.PodcastFingerprint.podcast_id == podcast_id
+    ).delete(synchronize_session=False)
+    db.query(models.DuplicateCandidate).filter(
+        models.DuplicateCandidate.podcast_id == podcast_id
+    ).delete(synchronize_session=False)
+    return dismissed
+
+
+def forget_podcast(db: Session, podcast_id: int):
+    """Drops a podcast's hashes and every duplicate flag involving it. Caller commits."""
+    _forget_own(db, podcast_id)
+    db.query(models.DuplicateCandidate).filter(
+        models.DuplicateCandidate.duplicate_of_id == podcast_id
+    ).delete(synchronize_session=False)
+
+
+def candidates(db: Session, *criteria) -> List[dict]:
+    """Duplicate candidates matching `criteria`, newest first, with both podcasts' titles."""
+    newer = aliased(models.Podcast)
+    original = aliased(models.Podcast)
+    rows = db.query(models.DuplicateCandidate, newer.title, original.title).join(
+        newer, newer.id == models.DuplicateCandidate.podcast_id
+    ).join(
+        original, original.id == models.DuplicateCandidate.duplicate_of_id
+    ).filter(*criteria).order_by(models.DuplicateCandidate.id.desc()).all()
+    return [
+        {
+            "id": candidate.id,
+            "podcast_id": candidate.podcast_id,
+            "podcast_title": title,
+            "duplicate_of_id": candidate.duplicate_of_id,
+            "duplicate_of_title": original_title,
+            "score": candidate.score,
+            "offset_seconds": candidate.offset_seconds,
+            "status": candidate.status,
+            "created_at": candidate.created_at,
+        }
+        for candidate, title, original_title in rows
+    ]
+
+
+def is_indexed(db: Session, podcast: models.Podcast) -> bool:
+    row = db.query(models.PodcastFingerprint.audio_file_url).filter(
+        models.PodcastFingerprint.podcast_id == podcast.id
+    ).first()
+    return row is not None and row.audio_file_url == podcast.audio_file_url
+
+
+class Fingerprinter:
+    def __init__(self, workers: int = FINGERPRINT_WORKERS, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fingerprint")
+        self._lock = threading.Lock()
+        self._queued: Set[int] = set()
+
+    def enqueue(self, podcast_id: int) -> bool:
+        """Schedules fingerprinting and matching (call after commit). False if already queued."""
+        with self._lock:
+            if podcast_id in self._queued:
+                return False
+            self._queued.add(podcast_id)
+        self._executor.submit(self._run, podcast_id)
+        return True
+
+    def _run(self, podcast_id: int):
+        try:
+            self.index(podcast_id)
+        except Exception:
+            logger.exception("Fingerprinting podcast %s failed", podcast_id)
+        finally:
+            with self._lock:
+                self._queued.discard(podcast_id)
+
+    def index(self, podcast_id: int) -> Optional[List[Match]]:
+        """Fingerprints a podcast's audio, stores its hashes and flags likely duplicates."""
+        db = self._session_factory()
+        try:
+            podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+            if podcast is None:
+                return None
+            audio_file_url = podcast.audio_file_url
+            existing = db.query(models.PodcastFingerprint).filter(
+                models.PodcastFingerprint.podcast_id == podcast_id
+            ).first()
+            if existing is not None and existing.audio_file_url == audio_file_url:
+                return None
+            source = storage.path_for_url(audio_file_url)
+            db.rollback() # no transaction held open while decoding
+            if source is None or not os.path.isfile(source) or not media_tools.can_decode(source):
+                return None
+
+            try:
+                fingerprint = fingerprint_file(source)
+            except media_tools.DECODE_ERRORS as e:
+                stderr = getattr(e, "stderr", None) or b""
+                logger.warning("Could not decode podcast %s: %s", podcast_id, stderr[-500:] or e)
+                fingerprint = Fingerprint(np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int32))
+
+            matches = find_matches(db, podcast_id, fingerprint)
+            podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+            if podcast is None or podcast.audio_file_url != audio_file_url:
+                return None # deleted or re-uploaded meanwhile
+            dismissed = _forget_own(db, podcast_id)
+            db.add(models.PodcastFingerprint(
+                podcast_id=podcast_id, audio_file_url=audio_file_url, hash_count=len(fingerprint.hashes)
+            ))
+            if len(fingerprint.hashes):
+                db.execute(insert(models.AudioFingerprint), [
+                    {"hash": h, "podcast_id": podcast_id, "offset": o}
+                    for h, o in zip(fingerprint.hashes.tolist(), fingerprint.offsets.tolist())
+                ])
+            for match in matches:
+                db.add(models.DuplicateCandidate(
+                    podcast_id=podcast_id,
+                    duplicate_of_id=match.podcast_id,
+                    score=match.score,
+                    offset_seconds=match.offset_seconds,
+                    status=DISMISSED if match.podcast_id in dismissed else OPEN,
+                ))
+            db.commit()
+            if matches:
+                logger.info("Podcast %s looks like a duplicate of %s", podcast_id, [m.podcast_id for m in matches])
+            return matches
+        finally:
+            db.close()
+
+    def shutdown(self):
+        # Queued jobs are dropped; the backfill command picks their podcasts up.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+fingerprinter = Fingerprinter()
+
+
+def backfill() -> int:
+    """Fingerprints every podcast without a current fingerprint, oldest first. Returns the count indexed."""
+    db = SessionLocal()
+    try:
+        ids = [
+            row.id for row in db.query(models.Podcast.id).outerjoin(
+                models.PodcastFingerprint, models.PodcastFingerprint.podcast_id == models.Podcast.id
+            ).filter(or_(
+                models.PodcastFingerprint.podcast_id.is_(None),
+                models.PodcastFingerprint.audio_file_url != models.Podcast.audio_file_url,
+            )).order_by(models.Podcast.id)
+        ]
+    finally:
+        db.close()
+    indexed = 0
+    for podcast_id in ids:
+        if fingerprinter.index(podcast_id) is not None:
+            indexed += 1
+    return indexed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fingerprint podcasts and flag likely duplicates.")
+    parser.parse_args(argv)
+    if not media_tools.ffmpeg_available():
+        print(f"{media_tools.FFMPEG} not found; only WAV files will be fingerprinted")
+    print(f"indexed: {backfill()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+# backend/services/hls.py
+#
+# Post-upload HLS packaging. Each uploaded episode is transcoded by a local
+# ffmpeg into AAC renditions at a few bitrates, segmented for HLS, and the
+# master playlist URL is stored on the podcast. The original file stays the
+# fallback (and the only option while packaging runs or without ffmpeg).
+#
+# Jobs run on a small thread pool (the work happens in the ffmpeg process).
+# Catalogs uploaded before this existed, or by the importer, are packaged by:
+#   python -m backend.services.hls [--retry-failed]
+
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Set
+from uuid import uuid4
+
+from sqlalchemy import or_
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import entity_cache, media_signing, media_tools, storage, sync
+
+logger = logging.getLogger(__name__)
+
+
+class Rendition(NamedTuple):
+    name: str
+    bit_rate: int # bits/s
+    channels: int
+
+
+RENDITIONS = (
+    Rendition("48k", 48_000, 1), # speech on poor mobile networks
+    Rendition("96k", 96_000, 2),
+    Rendition("160k", 160_000, 2),
+)
+# Short first segment so playback starts after one small download.
+INITIAL_SEGMENT_SECONDS = 2
+SEGMENT_SECONDS = 6
+# Added to the audio bit rate for MPEG-TS and playlist overhead in BANDWIDTH.
+CONTAINER_OVERHEAD = 1.1
+TRANSCODE_TIMEOUT_SECONDS = 60 * 60
+TRANSCODE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+MASTER_PLAYLIST = "master.m3u8"
+
+READY = "ready"
+FAILED = "failed"
+
+# Every packaging run writes a new directory, so nothing served from it ever changes.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Python's mimetypes maps .ts to a Qt translation file.
+CONTENT_TYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+
+
+def renditions_for(source_bit_rate: Optional[int]) -> List[Rendition]:
+    """Renditions that do not exceed the source bit rate (always at least the lowest)."""
+    if not source_bit_rate:
+        return list(RENDITIONS)
+    chosen = [r for r in RENDITIONS if r.bit_rate <= source_bit_rate * CONTAINER_OVERHEAD]
+    return chosen or [RENDITIONS[0]]
+
+
+def _ffmpeg_command(source: str, target: str, renditions: List[Rendition]) -> List[str]:
+    # One decode, one HLS output per rendition.
+    command = [media_tools.FFMPEG, "-v", "error", "-y", "-i", source]
+    for rendition in renditions:
+        directory = os.path.join(target, rendition.name)
+        command += [
+            "-map", "0:a:0", "-vn",
+            "-c:a", "aac", "-b:a", str(rendition.bit_rate), "-ac", str(rendition.channels),
+            "-f", "hls",
+            "-hls_time", str(SEGMENT_SECONDS),
+            "-hls_init_time", str(INITIAL_SEGMENT_SECONDS),
+            "-hls_playlist_type", "vod",
+            "-hls_flags", "independent_segments",
+            "-hls_segment_filename", os.path.join(directory, "seg_%05d.ts"),
+            os.path.join(directory, "index.m3u8"),
+        ]
+    return command
+
+
+def master_playlist(renditions: List[Rendition]) -> str:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for rendition in renditions:
+        lines.append(
+            f'#EXT-X-STREAM-INF:BANDWIDTH={int(rendition.bit_rate * CONTAINER_OVERHEAD)},CODECS="mp4a.40.2"'
+        )
+        lines.append(f"{rendition.name}/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+def transcode(source: str, podcast_id: int) -> str:
+    """
+    Packages `source` into a new directory under HLS_DIRECTORY and returns
+    the master playlist URL. Output appears only once complete: it is written
+    to a temporary directory that is renamed into place.
+    """
+    name = f"{podcast_id}-{uuid4().hex[:12]}"
+    relative = storage.sharded_relative_path(name)
+    final = os.path.join(storage.HLS_DIRECTORY, relative)
+    partial = final + ".partial"
+    renditions = renditions_for(media_tools.probe_bit_rate(source))
+    for rendition in renditions:
+        os.makedirs(os.path.join(partial, rendition.name), exist_ok=True)
+    try:
+        subprocess.run(
+            _ffmpeg_command(source, partial, renditions),
+            capture_output=True, timeout=TRANSCODE_TIMEOUT_SECONDS, check=True,
+        )
+        with open(os.path.join(partial, MASTER_PLAYLIST), "w", encoding="utf-8") as f:
+            f.write(master_playlist(renditions))
+        os.rename(partial, final)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    return f"{storage.HLS_URL_PATH_PREFIX}/{relative}/{MASTER_PLAYLIST}"
+
+
+class Packager:
+    def __init__(self, workers: int = TRANSCODE_WORKERS, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hls")
+        self._lock = threading.Lock()
+        self._queued: Set[int] = set()
+
+    def enqueue(self, podcast_id: int) -> bool:
+        """Schedules packaging (call after commit). False if ffmpeg is missing or already queued."""
+        if not media_tools.ffmpeg_available():
+            return False
+        with self._lock:
+            if podcast_id in self._queued:
+                return False
+            self._queued.add(podcast_id)
+        self._executor.submit(self._run, podcast_id)
+        return True
+
+    def _run(self, podcast_id: int):
+        try:
+            self.package(podcast_id)
+        except Exception:
+            logger.exception("HLS packaging of podcast %s failed", podcast_id)
+        finally:
+            with self._lock:
+                self._queued.discard(podcast_id)
+
+    def package(self, podcast_id: int) -> Optional[str]:
+        db = self._session_factory()
+        try:
+            podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+            if podcast is None or podcast.hls_status == READY:
+                return None
+            audio_file_url = podcast.audio_file_url
+            source = storage.path_for_url(audio_file_url)
+            db.rollback() # no transaction held open while ffmpeg runs
+            if source is None or not os.path.isfile(source):
+                return None
+
+            try:
+                master_url = transcode(source, podcast_id)
+            except (subprocess.SubprocessError, OSError) as e:
+                stderr = getattr(e, "stderr", None) or b""
+                logger.warning("ffmpeg failed for podcast %s: %s", podcast_id, stderr[-500:] or e)
+                self._mark(db, podcast_id, audio_file_url, FAILED, None)
+                return None
+
+            if not self._mark(db, podcast_id, audio_file_url, READY, master_url):
+                storage.remove_media(master_url) # deleted or re-uploaded meanwhile
+                return None
+            return master_url
+        finally:
+            db.close()
+
+    @staticmethod
+    def _mark(db, podcast_id: int, audio_file_url: str, hls_status: str, master_url: Optional[str]) -> bool:
+        podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+        if podcast is None or podcast.audio_file_url != audio_file_url:
+            return False
+        replaced = podcast.hls_master_url
+        podcast.hls_status = hls_status
+        podcast.hls_master_url = master_url or replaced
+        if master_url:
+            sync.touch(podcast)
+        db.commit()
+        if master_url:
+            if replaced:
+                storage.remove_media(replaced)
+            db.refresh(podcast)
+            entity_cache.podcast_changed(podcast)
+        return True
+
+    def shutdown(self):
+        # Queued jobs are dropped (their podcasts stay unpackaged and are
+        # picked up by the backfill command); running ffmpeg processes finish.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+packager = Packager()
+
+
+class HLSStaticFiles(media_signing.SignedStaticFiles):
+    """Signed static files for HLS_DIRECTORY: correct media types and immutable caching."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        content_type = CONTENT_TYPES.get(os.path.splitext(str(full_path))[1])
+        if content_type:
+            response.headers["content-type"] = content_type
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def reset(podcast: models.Podcast) -> Optional[str]:
+    """
+    Clears the renditions of a podcast whose audio is being replaced, without
+    committing. Returns the old master URL, to remove after the commit.
+    """
+    replaced = podcast.hls_master_url
+    podcast.hls_master_url = None
+    podcast.hls_status = None
+    return replaced
+
+
+def backfill(retry_failed: bool = False) -> int:
+    """Packages every podcast without renditions, synchronously. Returns the count packaged."""
+    statuses = [models.Podcast.hls_status.is_(None)]
+    if retry_failed:
+        statuses.append(models.Podcast.hls_status == FAILED)
+    db = SessionLocal()
+    try:
+        ids = [row.id for row in db.query(models.Podcast.id).filter(or_(*statuses)).order_by(models.Podcast.id)]
+    finally:
+        db.close()
+    packaged = 0
+    for podcast_id in ids:
+        if packager.package(podcast_id):
+            packaged += 1
+    return packaged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Package podcasts without HLS renditions.")
+    parser.add_argument("--retry-failed", action="store_true", help="Also retry podcasts whose packaging failed.")
+    args = parser.parse_args(argv)
+    if not media_tools.ffmpeg_available():
+        print(f"{media_tools.FFMPEG} not found")
+        return 1
+    print(f"packaged: {backfill(args.retry_failed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
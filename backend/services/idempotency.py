@@ -0,0 +1,291 @@
+# backend/services/idempotency.py
+#
+# Idempotency-Key support for the endpoints clients retry after timeouts:
+# uploads, edits and the play/join counters. Runs as ASGI middleware. The
+# first request with a key runs normally and its response is stored; a retry
+# with the same key gets the stored response replayed before its body (maybe
+# a whole audio file again) is read. A duplicate that arrives while the first
+# request is still running waits for it and gets the same response, so the
+# work is done once.
+#
+# Keys are scoped to the user of the bearer token and kept for
+# RESPONSE_TTL_SECONDS, in process (LRU-bounded) unless IDEMPOTENCY_REDIS_URL
+# points every worker at a shared Redis. Requests without the header or
+# without a valid token pass through untouched.
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Pattern, Tuple
+
+import anyio
+import anyio.to_thread
+from fastapi import status
+from jose import JWTError, jwt
+
+from backend.utils import ALGORITHM, SECRET_KEY
+
+REDIS_URL_ENV = "IDEMPOTENCY_REDIS_URL"
+KEY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+RESPONSE_TTL_SECONDS = 24 * 3600
+# A claimed key whose request never finished (a worker died) frees up after this.
+IN_PROGRESS_TTL_SECONDS = 15 * 60
+# How long a duplicate waits for the original request before getting 409.
+WAIT_SECONDS = 60
+POLL_INTERVAL_SECONDS = 0.1
+MAX_TRACKED_KEYS = 20_000
+# Larger responses are not stored; the key is released instead.
+MAX_STORED_BODY_BYTES = 16 * 1024
+
+# (method, path template). Path parameters match one segment.
+ROUTES: List[Tuple[str, str]] = [
+    ("POST", "/api/podcasts/"),
+    ("PUT", "/api/podcasts/{podcast_id}"),
+    ("POST", "/api/podcasts/{podcast_id}/play"),
+    ("POST", "/api/podcasts/events"),
+    ("POST", "/api/live/{stream_id}/join"),
+    ("POST", "/api/live/{stream_id}/leave"),
+]
+
+
+class Record(NamedTuple):
+    fingerprint: str # method and path the key was first used with
+    status: Optional[int] # None while the first request is running
+    content_type: Optional[bytes] = None
+    body: bytes = b""
+
+
+def _compile(template: str) -> Pattern:
+    return re.compile("^" + re.sub(r"\{[^/]+\}", "[^/]+", template.rstrip("/")) + "/?$")
+
+
+class MemoryStore:
+    """Records in an LRU dict with per-entry expiry, guarded by one lock."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Record]]" = OrderedDict()
+
+    def _put(self, key: str, record: Record, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, record)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Record]:
+        """Claims a free key (returns None) or returns the record holding it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._put(key, Record(fingerprint, None), IN_PROGRESS_TTL_SECONDS)
+            return None
+
+    def finish(self, key: str, record: Record):
+        with self._lock:
+            self._put(key, record, RESPONSE_TTL_SECONDS)
+
+    def release(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisStore:
+    """Records shared by every worker and host; needs the optional `redis` package."""
+
+    blocking = True # network round trip; run off the event loop
+
+    def __init__(self, url: str, prefix: str = "idempotency:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(f"{REDIS_URL_ENV} is set but the 'redis' package is not installed") from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _encode(record: Record) -> bytes:
+        meta = {"fingerprint": record.fingerprint, "status": record.status}
+        if record.content_type is not None:
+            meta["content_type"] = record.content_type.decode("latin-1")
+        return json.dumps(meta).encode() + b"\n" + record.body
+
+    @staticmethod
+    def _decode(value: bytes) -> Record:
+        meta, _, body = value.partition(b"\n")
+        meta = json.loads(meta)
+        content_type = meta.get("content_type")
+        return Record(meta["fingerprint"], meta["status"], content_type.encode("latin-1") if content_type else None, body)
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Record]:
+        pending = self._encode(Record(fingerprint, None))
+        while True:
+            if self._client.set(self.prefix + key, pending, nx=True, ex=IN_PROGRESS_TTL_SECONDS):
+                return None
+            value = self._client.get(self.prefix + key)
+            if value is not None: # else it expired in between; claim again
+                return self._decode(value)
+
+    def finish(self, key: str, record: Record):
+        self._client.set(self.prefix + key, self._encode(record), ex=RESPONSE_TTL_SECONDS)
+
+    def release(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def _default_store():
+    url = os.environ.get(REDIS_URL_ENV)
+    return RedisStore(url) if url else MemoryStore()
+
+
+store = _default_store()
+_routes = [(method, _compile(template)) for method, template in ROUTES]
+
+
+def applies_to(method: str, path: str) -> bool:
+    return any(method == route_method and pattern.match(path) for route_method, pattern in _routes)
+
+
+async def _run(function, *args):
+    if store.blocking:
+        return await anyio.to_thread.run_sync(function, *args)
+    return function(*args)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _token_user(scope) -> Optional[str]:
+    # Signature check only (no DB), as in services/rate_limit.py.
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("user_id")
+    return str(user_id) if user_id is not None else None
+
+
+class IdempotencyMiddleware:
+    """
+    Applies Idempotency-Key handling to ROUTES. Success and client error
+    responses are stored; after a redirect or server error, or if the client
+    went away before the body was read, the key is released so a retry runs
+    again.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not applies_to(scope["method"], scope["path"]):
+            return await self.app(scope, receive, send)
+        key = _header(scope, KEY_HEADER)
+        user = _token_user(scope) if key is not None else None
+        if user is None:
+            return await self.app(scope, receive, send)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await self._respond(send, status.HTTP_400_BAD_REQUEST, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        store_key = f"{user}:{key}"
+        # '/api/podcasts' is redirected to '/api/podcasts/' with the same key.
+        fingerprint = f"{scope['method']} {scope['path'].rstrip('/')}"
+        deadline = time.monotonic() + WAIT_SECONDS
+        while True:
+            record = await _run(store.claim, store_key, fingerprint)
+            if record is None:
+                break
+            if record.fingerprint != fingerprint:
+                return await self._respond(
+                    send, status.HTTP_422_UNPROCESSABLE_CONTENT, "Idempotency-Key was already used for a different request"
+                )
+            if record.status is not None:
+                return await self._replay(send, record)
+            if time.monotonic() >= deadline:
+                return await self._respond(
+                    send, status.HTTP_409_CONFLICT, "A request with this Idempotency-Key is still being processed",
+                    retry_after=1
+                )
+            await anyio.sleep(POLL_INTERVAL_SECONDS)
+
+        disconnected = False
+        response_status = None
+        content_type = None
+        body: List[bytes] = []
+        body_size = 0
+
+        async def watched_receive():
+            nonlocal disconnected
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected = True
+            return message
+
+        async def capturing_send(message):
+            nonlocal response_status, content_type, body_size
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                content_type = next((value for name, value in message.get("headers", []) if name.lower() == b"content-type"), None)
+            elif message["type"] == "http.response.body" and body_size <= MAX_STORED_BODY_BYTES:
+                chunk = message.get("body", b"")
+                body.append(chunk)
+                body_size += len(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, watched_receive, capturing_send)
+        except BaseException:
+            await _run(store.release, store_key)
+            raise
+        storable = response_status is not None and (200 <= response_status < 300 or 400 <= response_status < 500)
+        if not storable or disconnected or body_size > MAX_STORED_BODY_BYTES:
+            await _run(store.release, store_key)
+        else:
+            await _run(store.finish, store_key, Record(fingerprint, response_status, content_type, b"".join(body)))
+
+    @staticmethod
+    async def _replay(send, record: Record):
+        headers = [(b"content-length", str(len(record.body)).encode()), (REPLAYED_HEADER, b"true")]
+        if record.content_type is not None:
+            headers.append((b"content-type", record.content_type))
+        await send({"type": "http.response.start", "status": record.status, "headers": headers})
+        await send({"type": "http.response.body", "body": record.body})
+
+    @staticmethod
+    async def _respond(send, status_code: int, detail: str, retry_after: Optional[int] = None):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
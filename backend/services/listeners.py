@@ -0,0 +1,93 @@
+# backend/services/listeners.py
+
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import dialect_insert
+from backend.services.hyperloglog import HyperLogLog
+
+PODCAST = "podcast"
+LIVE_STREAM = "live_stream"
+
+# Which sketch/count columns hold the all-time union for each entity type.
+_ALL_TIME_COLUMNS = {
+    PODCAST: ("listener_sketch", "unique_listeners"),
+    LIVE_STREAM: ("viewer_sketch", "unique_viewers"),
+}
+
+WINDOW_DAYS = {"day": 1, "week": 7, "month": 30}
+
+
+def record_listener(db: Session, entity_type: str, entity, user_id: int, today: Optional[date] = None):
+    """
+    Adds user_id to the entity's all-time sketch and to today's daily sketch.
+    Only touches rows whose registers actually changed, so repeat listens by
+    the same user are (almost always) free. A changed sketch is re-read under
+    a row lock and merged, so concurrent listens never overwrite each other.
+    Caller is responsible for commit.
+    """
+    sketch_column, count_column = _ALL_TIME_COLUMNS[entity_type]
+    today = today or date.today()
+
+    if HyperLogLog.from_bytes(getattr(entity, sketch_column)).add(user_id):
+        model = type(entity)
+        current = db.query(getattr(model, sketch_column)).filter(model.id == entity.id).with_for_update().scalar()
+        all_time = HyperLogLog.from_bytes(current)
+        all_time.add(user_id)
+        setattr(entity, sketch_column, all_time.to_bytes())
+        setattr(entity, count_column, all_time.count())
+
+    daily_query = db.query(models.ListenerSketch).filter(
+        models.ListenerSketch.entity_type == entity_type,
+        models.ListenerSketch.entity_id == entity.id,
+        models.ListenerSketch.day == today,
+    )
+    daily_row = daily_query.first()
+    if daily_row is not None and not HyperLogLog.from_bytes(daily_row.sketch).add(user_id):
+        return
+    if daily_row is None:
+        # The first listens of the day race to create the row; losers reuse the winner's.
+        table = models.ListenerSketch.__table__
+        db.execute(
+            dialect_insert(db, table)
+            .values(entity_type=entity_type, entity_id=entity.id, day=today, sketch=HyperLogLog().to_bytes())
+            .on_conflict_do_nothing(index_elements=["entity_type", "entity_id", "day"])
+        )
+    daily_row = daily_query.with_for_update().populate_existing().one()
+    daily = HyperLogLog.from_bytes(daily_row.sketch)
+    daily.add(user_id)
+    daily_row.sketch = daily.to_bytes()
+
+
+def unique_in_window(db: Session, entity_type: str, entity_id: int, days: int, today: Optional[date] = None) -> int:
+    """Estimates distinct users over the last `days` days by merging daily sketches."""
+    today = today or date.today()
+    rows = db.query(models.ListenerSketch.sketch).filter(
+        models.ListenerSketch.entity_type == entity_type,
+        models.ListenerSketch.entity_id == entity_id,
+        models.ListenerSketch.day > today - timedelta(days=days),
+        models.ListenerSketch.day <= today,
+    )
+    return HyperLogLog.union(HyperLogLog.from_bytes(sketch) for (sketch,) in rows).count()
+
+
+def listener_summary(db: Session, entity_type: str, entity) -> dict:
+    """Daily/weekly/monthly/all-time distinct-user estimates for one entity."""
+    _, count_column = _ALL_TIME_COLUMNS[entity_type]
+    summary = {
+        window: unique_in_window(db, entity_type, entity.id, days)
+        for window, days in WINDOW_DAYS.items()
+    }
+    summary["all_time"] = getattr(entity, count_column) or 0
+    return summary
+
+
+def delete_sketches(db: Session, entity_type: str, entity_id: int):
+    """Removes daily sketches for a deleted entity. Caller is responsible for commit."""
+    db.query(models.ListenerSketch).filter(
+        models.ListenerSketch.entity_type == entity_type,
+        models.ListenerSketch.entity_id == entity_id,
+    ).delete(synchronize_session=False)
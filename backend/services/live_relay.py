@@ -0,0 +1,267 @@
+# backend/services/live_relay.py
+#
+# In-process relay for live lecture audio: the host pushes encoded chunks over
+# a WebSocket and listeners receive them as a chunked HTTP response that an
+# <audio> element can play directly.
+#
+# Each stream has one fixed-size ring buffer. A chunk is copied into it once
+# and every listener sends a memoryview slice of it, so fan-out copies
+# nothing and memory per stream is bounded by RING_BUFFER_BYTES. A slice stays
+# valid until the writer wraps around onto it. Writer and listeners all run
+# on the event loop, and listeners hand a slice to the server's `send` without
+# awaiting in between. The server then writes or buffers the bytes before it
+# yields, so a slice is never read after it has been overwritten. A listener
+# that falls further behind than the buffer holds skips ahead to the latest
+# join point.
+#
+# Relays live in the process that holds the host's connection, so every
+# /api/live/{id}/audio* request must reach that one process. With several
+# workers, serve.py starts a single-worker process on LIVE_AUDIO_PORT for
+# them and sets LIVE_AUDIO_SERVED_HERE=0 in the pool, which then answers
+# those routes with 421. The proxy routes them to that port, e.g. for nginx:
+#
+#   location ~ ^/api/live/[0-9]+/audio {
+#       proxy_pass http://127.0.0.1:8001;
+#       proxy_http_version 1.1;
+#       proxy_set_header Upgrade $http_upgrade;
+#       proxy_set_header Connection "upgrade";
+#       proxy_buffering off;
+#   }
+#
+# With several hosts, all of them must route there to the same one.
+
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, NamedTuple, Optional
+
+from backend.services.bus import publish, subscribe
+
+RING_BUFFER_BYTES = 2 * 1024 * 1024 # about two minutes at 128 kbit/s
+MAX_CHUNK_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+# A listener with no new audio for this long is ended if the host is gone,
+# and a relay whose host has not reconnected by then is dropped.
+IDLE_TIMEOUT_SECONDS = 30
+
+CONTENT_TYPES = ("audio/mpeg", "audio/aac", "audio/ogg", "audio/webm")
+
+CLOSED_CHANNEL = "live_relay.closed"
+
+SERVED_HERE_ENV = "LIVE_AUDIO_SERVED_HERE"
+
+
+def served_here() -> bool:
+    """False in a pool whose live audio is served by another process (set by serve.py)."""
+    return os.environ.get(SERVED_HERE_ENV, "1") != "0"
+
+
+class _Chunk(NamedTuple):
+    offset: int
+    length: int
+    keyframe: bool
+
+
+class ChunkRing:
+    """
+    Chunks numbered by sequence, stored back to back in one bytearray. A chunk
+    that does not fit before the end wraps to offset 0; the oldest chunks it
+    overlaps are evicted.
+    """
+
+    def __init__(self, capacity: int = RING_BUFFER_BYTES):
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._chunks: Deque[_Chunk] = deque()
+        self._keyframes: Deque[int] = deque()
+        self._write_at = 0
+        self.first_seq = 0 # oldest chunk still held
+        self.next_seq = 0
+
+    def append(self, data: bytes, keyframe: bool) -> int:
+        length = len(data)
+        if length > MAX_CHUNK_BYTES or length > self.capacity // 4:
+            raise ValueError(f"Chunks are limited to {MAX_CHUNK_BYTES} bytes")
+        start = self._write_at
+        if start + length > self.capacity:
+            # Wrap. Chunks still in the tail past this point are older than
+            # anything at the front of the buffer, so they go first.
+            while self._chunks and self._chunks[0].offset >= start:
+                self._evict()
+            start = 0
+        end = start + length
+        while self._chunks and self._chunks[0].offset < end and self._chunks[0].offset + self._chunks[0].length > start:
+            self._evict()
+
+        self._view[start:end] = data
+        self._chunks.append(_Chunk(start, length, keyframe))
+        if keyframe:
+            self._keyframes.append(self.next_seq)
+        self._write_at = end
+        self.next_seq += 1
+        return self.next_seq - 1
+
+    def _evict(self):
+        self._chunks.popleft()
+        if self._keyframes and self._keyframes[0] == self.first_seq:
+            self._keyframes.popleft()
+        self.first_seq += 1
+
+    def get(self, seq: int) -> Optional[memoryview]:
+        if not self.first_seq <= seq < self.next_seq:
+            return None
+        chunk = self._chunks[seq - self.first_seq]
+        return self._view[chunk.offset:chunk.offset + chunk.length]
+
+    def join_point(self) -> int:
+        """Most recent keyframe still held, or the live edge if there is none."""
+        return self._keyframes[-1] if self._keyframes else self.next_seq
+
+
+class Relay:
+    def __init__(self, live_stream_id: int, content_type: str, capacity: int = RING_BUFFER_BYTES):
+        self.live_stream_id = live_stream_id
+        self.content_type = content_type
+        self.ring = ChunkRing(capacity)
+        # Container header (e.g. WebM init segment, Ogg header pages) sent to
+        # every listener before its first chunk.
+        self.header: Optional[bytes] = None
+        # Until the host marks a keyframe, every chunk is a join point (fine
+        # for MP3 / ADTS AAC, whose frames each carry a sync word).
+        self.marks_keyframes = False
+        self.publishing = False
+        self.closed = False
+        self.listeners = 0
+        self.bytes_in = 0
+        self.skips = 0 # listeners that fell behind and jumped ahead
+        self._new_data = asyncio.Event()
+
+    def _wake(self):
+        self._new_data.set()
+        self._new_data = asyncio.Event()
+
+    def set_header(self, data: bytes):
+        if len(data) > MAX_HEADER_BYTES:
+            raise ValueError(f"Headers are limited to {MAX_HEADER_BYTES} bytes")
+        self.header = bytes(data)
+
+    def write(self, data: bytes, keyframe: Optional[bool] = None):
+        if keyframe:
+            self.marks_keyframes = True
+        self.ring.append(data, keyframe if self.marks_keyframes else True)
+        self.bytes_in += len(data)
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    async def listen(self) -> AsyncIterator[memoryview]:
+        """Yields the header, then chunks from the latest join point onward."""
+        self.listeners += 1
+        try:
+            if self.header is not None:
+                yield memoryview(self.header)
+            seq = self.ring.join_point()
+            while True:
+                chunk = self.ring.get(seq)
+                if chunk is not None:
+                    yield chunk # must reach `send` before the next await
+                    seq += 1
+                    continue
+                if seq < self.ring.first_seq:
+                    self.skips += 1
+                    seq = self.ring.join_point()
+                    continue
+                if self.closed:
+                    return
+                new_data = self._new_data
+                try:
+                    await asyncio.wait_for(new_data.wait(), IDLE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    if not self.publishing:
+                        return
+        finally:
+            self.listeners -= 1
+
+    def stats(self) -> dict:
+        return {
+            "live_stream_id": self.live_stream_id,
+            "content_type": self.content_type,
+            "publishing": self.publishing,
+            "listeners": self.listeners,
+            "buffered_chunks": self.ring.next_seq - self.ring.first_seq,
+            "bytes_in": self.bytes_in,
+            "skips": self.skips,
+        }
+
+
+class RelayHub:
+    """Relays by stream id. Touched on the event loop only; see `close`."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.relays: Dict[int, Relay] = {}
+
+    def open(self, live_stream_id: int, content_type: str) -> Optional[Relay]:
+        """
+        Starts publishing. A host that reconnects resumes its relay, so
+        listeners keep playing. Returns None if someone is already publishing.
+        """
+        self._loop = asyncio.get_running_loop()
+        relay = self.relays.get(live_stream_id)
+        if relay is not None and relay.publishing:
+            return None
+        if relay is None or relay.content_type != content_type:
+            if relay is not None:
+                relay.close()
+            relay = self.relays[live_stream_id] = Relay(live_stream_id, content_type)
+        relay.publishing = True
+        return relay
+
+    def stop_publishing(self, relay: Relay):
+        relay.publishing = False
+        relay._wake()
+        self._loop.call_later(IDLE_TIMEOUT_SECONDS, self._reap, relay)
+
+    def _reap(self, relay: Relay):
+        if not relay.publishing and self.relays.get(relay.live_stream_id) is relay:
+            self._close(relay.live_stream_id)
+
+    def get(self, live_stream_id: int) -> Optional[Relay]:
+        return self.relays.get(live_stream_id)
+
+    def _close(self, live_stream_id: int):
+        relay = self.relays.pop(live_stream_id, None)
+        if relay is not None:
+            relay.close()
+
+    def close(self, live_stream_id: int):
+        """
+        Ends a stream's audio for all listeners, here and on other workers.
+        Safe to call from any thread.
+        """
+        publish(CLOSED_CHANNEL, live_stream_id=live_stream_id)
+        self._close_here(live_stream_id)
+
+    def _close_here(self, live_stream_id: int):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._close(live_stream_id)
+        else:
+            loop.call_soon_threadsafe(self._close, live_stream_id)
+
+    def stats(self) -> list:
+        return [relay.stats() for relay in self.relays.values()]
+
+
+hub = RelayHub()
+
+subscribe(CLOSED_CHANNEL, lambda event: hub._close_here(event["live_stream_id"]))
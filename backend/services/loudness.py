@@ -0,0 +1,368 @@
+# backend/services/loudness.py
+#
+# Loudness analysis of uploaded episodes, for volume normalization at
+# playback time. Nothing is re-encoded: the player applies the stored
+# ReplayGain-style `replay_gain_db` (see PodcastPlayer.tsx).
+#
+# Audio is decoded to 48 kHz stereo float PCM by media_tools.pcm_stream (PCM
+# WAV at its own rate when ffmpeg is missing) and consumed CHUNK_SECONDS at a time.
+# Per chunk, with NumPy/SciPy:
+#   - integrated loudness per ITU-R BS.1770 / EBU R128: K-weighting filter,
+#     400 ms blocks on a 100 ms hop, absolute (-70 LUFS) and relative (-10 LU)
+#     gates. Block loudness goes into a fixed histogram rather than a list, so
+#     memory does not grow with duration;
+#   - true peak, from 4x polyphase oversampling;
+#   - silence spans: runs of 100 ms sub-blocks below SILENCE_THRESHOLD_DBFS.
+# Filter state and partial blocks carry over between chunks.
+#
+# Jobs run on a small thread pool after upload. Older podcasts are analyzed by:
+#   python -m backend.services.loudness [--retry-failed]
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from scipy import signal
+from sqlalchemy import or_
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import entity_cache, media_tools, storage, sync
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 48_000 # what ffmpeg decodes to
+CHANNELS = 2 # mono is measured as dual mono, the way it is played
+CHUNK_SECONDS = 3 # a whole number of sub-blocks; ~1 MiB of float32 stereo
+ANALYSIS_WORKERS = 1
+
+SUB_BLOCK_SECONDS = 0.1
+BLOCK_SUB_BLOCKS = 4 # 400 ms gating blocks, 75% overlap
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+# Block loudness histogram: 0.01 LU bins from the absolute gate up.
+HISTOGRAM_STEP_LU = 0.01
+HISTOGRAM_MAX_LUFS = 10.0
+
+OVERSAMPLING = 4
+OVERSAMPLING_TAPS = 48
+
+SILENCE_THRESHOLD_DBFS = -50.0
+MIN_SILENCE_SECONDS = 2.0
+MAX_SILENCE_SPANS = 1000
+
+# ReplayGain 2.0 reference level; gain is limited so the true peak stays
+# below MAX_TRUE_PEAK_DBTP after it is applied.
+REFERENCE_LUFS = -18.0
+MAX_TRUE_PEAK_DBTP = -1.0
+MAX_GAIN_DB = 12.0 # more mostly amplifies room noise
+
+READY = "ready"
+FAILED = "failed"
+
+
+class LoudnessResult(NamedTuple):
+    integrated_lufs: Optional[float] # None if nothing is above the absolute gate
+    true_peak_dbtp: Optional[float] # None for digital silence
+    duration_seconds: float
+    silence_spans: List[Tuple[float, float]]
+
+    @property
+    def replay_gain_db(self) -> Optional[float]:
+        if self.integrated_lufs is None:
+            return None
+        gain = REFERENCE_LUFS - self.integrated_lufs
+        if self.true_peak_dbtp is not None:
+            gain = min(gain, MAX_TRUE_PEAK_DBTP - self.true_peak_dbtp)
+        return round(max(-MAX_GAIN_DB, min(MAX_GAIN_DB, gain)), 2)
+
+
+def k_weighting(sample_rate: int) -> np.ndarray:
+    """BS.1770 K-weighting (high shelf, then high pass) as second-order sections for any rate."""
+    # Analog prototypes matched to the 48 kHz coefficients of the standard.
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [
+        (vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+        1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0,
+    ]
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_pass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, high_pass])
+
+
+def channel_weights(channels: int) -> np.ndarray:
+    # BS.1770 weights for 5.0/5.1 in the usual L R C (LFE) Ls Rs order.
+    if channels == 6:
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    if channels == 5:
+        return np.array([1.0, 1.0, 1.0, 1.41, 1.41])
+    if channels == 1:
+        return np.array([2.0]) # dual mono, matching what ffmpeg decodes to
+    return np.ones(channels)
+
+
+class Analyzer:
+    """Streaming loudness meter. Feed float samples shaped (frames, channels)."""
+
+    def __init__(self, sample_rate: int, channels: int):
+        self.sample_rate = sample_rate
+        self.sub_block = int(round(sample_rate * SUB_BLOCK_SECONDS))
+        self.frames = 0
+        self._weights = channel_weights(channels)
+        self._sos = k_weighting(sample_rate)
+        self._zi = np.zeros((self._sos.shape[0], 2, channels))
+        self._pending = np.zeros((0, channels), dtype=np.float32) # less than one sub-block
+        self._recent = np.zeros(0) # last BLOCK_SUB_BLOCKS - 1 sub-block energies
+
+        bins = int(round((HISTOGRAM_MAX_LUFS - ABSOLUTE_GATE_LUFS) / HISTOGRAM_STEP_LU))
+        self._block_counts = np.zeros(bins, dtype=np.int64)
+        self._block_energy = np.zeros(bins)
+
+        oversampling = OVERSAMPLING if sample_rate < 96_000 else 2
+        self._up = oversampling
+        self._fir = signal.firwin(OVERSAMPLING_TAPS, 1 / oversampling) * oversampling
+        # No output sample exceeds the input peak by more than this, so chunks
+        # that cannot raise the maximum are not oversampled.
+        self._fir_gain = max(np.abs(self._fir[phase::oversampling]).sum() for phase in range(oversampling))
+        self._fir_history = -(-(OVERSAMPLING_TAPS - 1) // oversampling)
+        self._tail = np.zeros((self._fir_history, channels), dtype=np.float32)
+        self.peak = 0.0
+
+        self._min_silence = int(math.ceil(MIN_SILENCE_SECONDS / SUB_BLOCK_SECONDS))
+        self._silence_energy = 10 ** (SILENCE_THRESHOLD_DBFS / 10)
+        self._silent_since: Optional[int] = None # sub-block index
+        self._sub_blocks = 0
+        self.silence_spans: List[Tuple[float, float]] = []
+
+    def feed(self, samples: np.ndarray):
+        self.frames += len(samples)
+        self._true_peak(samples)
+        samples = np.concatenate([self._pending, samples])
+        whole = len(samples) // self.sub_block * self.sub_block
+        self._pending = samples[whole:]
+        if whole:
+            self._measure(samples[:whole])
+
+    def _true_peak(self, samples: np.ndarray):
+        sample_peak = float(np.abs(samples).max()) if len(samples) else 0.0
+        if sample_peak * self._fir_gain > self.peak:
+            history = len(self._tail)
+            upsampled = signal.upfirdn(self._fir, np.concatenate([self._tail, samples]), up=self._up, axis=0)
+            settled = upsampled[history * self._up:(history + len(samples)) * self._up]
+            self.peak = max(self.peak, float(np.abs(settled).max()))
+        self.peak = max(self.peak, sample_peak)
+        if len(samples) >= self._fir_history:
+            self._tail = samples[-self._fir_history:]
+        else:
+            self._tail = np.concatenate([self._tail, samples])[-self._fir_history:]
+
+    def _measure(self, samples: np.ndarray):
+        count = len(samples) // self.sub_block
+        # Unweighted sub-block power, for silence.
+        power = np.square(samples, dtype=np.float64).reshape(count, self.sub_block, -1).mean(axis=(1, 2))
+        self._find_silence(power)
+
+        filtered, self._zi = signal.sosfilt(self._sos, samples, axis=0, zi=self._zi)
+        energy = np.square(filtered).reshape(count, self.sub_block, -1).mean(axis=1) @ self._weights
+        energy = np.concatenate([self._recent, energy])
+        self._recent = energy[-(BLOCK_SUB_BLOCKS - 1):]
+        if len(energy) < BLOCK_SUB_BLOCKS:
+            return
+        blocks = np.convolve(energy, np.full(BLOCK_SUB_BLOCKS, 1 / BLOCK_SUB_BLOCKS), mode="valid")
+        with np.errstate(divide="ignore"):
+            loudness = -0.691 + 10 * np.log10(blocks)
+        gated = loudness > ABSOLUTE_GATE_LUFS
+        bins = ((loudness[gated] - ABSOLUTE_GATE_LUFS) / HISTOGRAM_STEP_LU).astype(np.int64)
+        bins = np.minimum(bins, len(self._block_counts) - 1)
+        self._block_counts += np.bincount(bins, minlength=len(self._block_counts))
+        self._block_energy += np.bincount(bins, weights=blocks[gated], minlength=len(self._block_energy))
+
+    def _find_silence(self, power: np.ndarray):
+        silent = power < self._silence_energy
+        edges = np.diff(np.concatenate([[False], silent, [False]]).astype(np.int8))
+        offset = self._sub_blocks
+        runs = list(zip(np.flatnonzero(edges == 1) + offset, np.flatnonzero(edges == -1) + offset))
+        self._sub_blocks += len(power)
+        if self._silent_since is not None:
+            # A run left open by the previous chunk continues, or ended there.
+            if runs and runs[0][0] == offset:
+                runs[0] = (self._silent_since, runs[0][1])
+            else:
+                self._add_silence(self._silent_since, offset)
+            self._silent_since = None
+        if silent[-1]:
+            self._silent_since = runs.pop()[0]
+        for start, end in runs:
+            self._add_silence(start, end)
+
+    def _add_silence(self, start: int, end: int):
+        if end - start >= self._min_silence and len(self.silence_spans) < MAX_SILENCE_SPANS:
+            self.silence_spans.append(
+                (round(float(start) * SUB_BLOCK_SECONDS, 1), round(float(end) * SUB_BLOCK_SECONDS, 1))
+            )
+
+    def integrated_loudness(self) -> Optional[float]:
+        counts, energy = self._block_counts, self._block_energy
+        if not counts.any():
+            return None
+        relative_gate = -0.691 + 10 * math.log10(energy.sum() / counts.sum()) + RELATIVE_GATE_LU
+        first_bin = max(0, int(math.ceil((relative_gate - ABSOLUTE_GATE_LUFS) / HISTOGRAM_STEP_LU)))
+        if not counts[first_bin:].any():
+            return None
+        return -0.691 + 10 * math.log10(energy[first_bin:].sum() / counts[first_bin:].sum())
+
+    def result(self) -> LoudnessResult:
+        if self._silent_since is not None:
+            self._add_silence(self._silent_since, self._sub_blocks)
+            self._silent_since = None
+        integrated = self.integrated_loudness()
+        return LoudnessResult(
+            round(integrated, 2) if integrated is not None else None,
+            round(20 * math.log10(self.peak), 2) if self.peak > 0 else None,
+            self.frames / self.sample_rate,
+            self.silence_spans,
+        )
+
+
+def analyze(path: str) -> LoudnessResult:
+    """Measures a file. Raises one of media_tools.DECODE_ERRORS if it cannot be decoded."""
+    with media_tools.pcm_stream(path, SAMPLE_RATE, CHANNELS, CHUNK_SECONDS) as stream:
+        analyzer = Analyzer(stream.sample_rate, stream.channels)
+        for samples in stream.chunks:
+            analyzer.feed(samples)
+    return analyzer.result()
+
+
+def can_analyze(path: str) -> bool:
+    return media_tools.can_decode(path)
+
+
+class LoudnessAnalyzer:
+    def __init__(self, workers: int = ANALYSIS_WORKERS, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loudness")
+        self._lock = threading.Lock()
+        self._queued: Set[int] = set()
+
+    def enqueue(self, podcast_id: int) -> bool:
+        """Schedules analysis (call after commit). False if already queued."""
+        with self._lock:
+            if podcast_id in self._queued:
+                return False
+            self._queued.add(podcast_id)
+        self._executor.submit(self._run, podcast_id)
+        return True
+
+    def _run(self, podcast_id: int):
+        try:
+            self.analyze(podcast_id)
+        except Exception:
+            logger.exception("Loudness analysis of podcast %s failed", podcast_id)
+        finally:
+            with self._lock:
+                self._queued.discard(podcast_id)
+
+    def analyze(self, podcast_id: int) -> Optional[LoudnessResult]:
+        db = self._session_factory()
+        try:
+            podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+            if podcast is None or podcast.loudness_status == READY:
+                return None
+            audio_file_url = podcast.audio_file_url
+            source = storage.path_for_url(audio_file_url)
+            db.rollback() # no transaction held open while decoding
+            if source is None or not os.path.isfile(source) or not can_analyze(source):
+                return None
+
+            try:
+                result = analyze(source)
+            except media_tools.DECODE_ERRORS as e:
+                stderr = getattr(e, "stderr", None) or b""
+                logger.warning("Could not decode podcast %s: %s", podcast_id, stderr[-500:] or e)
+                self._mark(db, podcast_id, audio_file_url, None)
+                return None
+
+            self._mark(db, podcast_id, audio_file_url, result)
+            return result
+        finally:
+            db.close()
+
+    @staticmethod
+    def _mark(db, podcast_id: int, audio_file_url: str, result: Optional[LoudnessResult]) -> bool:
+        podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+        if podcast is None or podcast.audio_file_url != audio_file_url:
+            return False # deleted or re-uploaded meanwhile
+        if result is None:
+            podcast.loudness_status = FAILED
+            db.commit()
+            return True
+        podcast.loudness_status = READY
+        podcast.loudness_lufs = result.integrated_lufs
+        podcast.true_peak_dbtp = result.true_peak_dbtp
+        podcast.replay_gain_db = result.replay_gain_db
+        podcast.silence_spans = json.dumps(result.silence_spans)
+        sync.touch(podcast)
+        db.commit()
+        db.refresh(podcast)
+        entity_cache.podcast_changed(podcast)
+        return True
+
+    def shutdown(self):
+        # Queued jobs are dropped; the backfill command picks their podcasts up.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+analyzer = LoudnessAnalyzer()
+
+
+def reset(podcast: models.Podcast):
+    """Clears the measurements of a podcast whose audio is being replaced, without committing."""
+    podcast.loudness_status = None
+    podcast.loudness_lufs = None
+    podcast.true_peak_dbtp = None
+    podcast.replay_gain_db = None
+    podcast.silence_spans = None
+
+
+def backfill(retry_failed: bool = False) -> int:
+    """Analyzes every podcast not analyzed yet, synchronously. Returns the count analyzed."""
+    statuses = [models.Podcast.loudness_status.is_(None)]
+    if retry_failed:
+        statuses.append(models.Podcast.loudness_status == FAILED)
+    db = SessionLocal()
+    try:
+        ids = [row.id for row in db.query(models.Podcast.id).filter(or_(*statuses)).order_by(models.Podcast.id)]
+    finally:
+        db.close()
+    analyzed = 0
+    for podcast_id in ids:
+        if analyzer.analyze(podcast_id):
+            analyzed += 1
+    return analyzed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the loudness of podcasts not analyzed yet.")
+    parser.add_argument("--retry-failed", action="store_true", help="Also retry podcasts that could not be decoded.")
+    args = parser.parse_args(argv)
+    if not media_tools.ffmpeg_available():
+        print(f"{media_tools.FFMPEG} not found; only WAV files will be analyzed")
+    print(f"analyzed: {backfill(args.retry_failed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# backend/services/media_gc.py
+#
+# Orphaned media garbage collector. Can also be run by hand:
+#   python -m backend.services.media_gc [--delete] [--grace-hours 24]
+
+import argparse
+import heapq
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import storage
+from backend.services.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+# Files younger than this are never collected: an upload is written to disk
+# before its row is committed, so a fresh file may simply not be referenced yet.
+DEFAULT_GRACE_SECONDS = 24 * 60 * 60
+# Names held in memory per sorted run on either side of the merge-join.
+SORT_BATCH_SIZE = 10_000
+# Orphans/missing files listed by path in a report; counts are always exact.
+REPORT_SAMPLE_SIZE = 50
+# Subdirectories of the upload directory not owned by podcasts rows.
+PROTECTED_PREFIXES = ("live/", "hls/")
+RECONCILE_INTERVAL_SECONDS = 24 * 60 * 60
+
+# Held by reconcile() and by storage_migration while it re-points a batch, so
+# a file linked into place but not yet referenced is never collected. Other
+# processes are covered by the grace period: placed links get a fresh mtime.
+lock = threading.Lock()
+
+
+def _external_sort(items: Iterable[str], stack: ExitStack) -> Iterator[str]:
+    """
+    Sorts an arbitrarily long stream of strings using bounded memory: sorted
+    runs of SORT_BATCH_SIZE are spilled to temp files and lazily merged.
+    Duplicates are dropped.
+    """
+    runs = []
+    batch: List[str] = []
+
+    def spill():
+        run = stack.enter_context(tempfile.TemporaryFile("w+", encoding="utf-8"))
+        run.writelines(f"{item}\n" for item in sorted(batch))
+        run.seek(0)
+        runs.append(line.rstrip("\n") for line in run)
+        batch.clear()
+
+    for item in items:
+        batch.append(item)
+        if len(batch) >= SORT_BATCH_SIZE:
+            spill()
+    if runs:
+        if batch:
+            spill()
+        merged = heapq.merge(*runs)
+    else:
+        merged = iter(sorted(batch))
+
+    previous = None
+    for item in merged:
+        if item != previous:
+            yield item
+            previous = item
+
+
+def _walk_uploads(root: str) -> Iterator[str]:
+    """Yields every file under root as a '/'-separated relative path."""
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        with os.scandir(os.path.join(root, relative_dir)) as entries:
+            for entry in entries:
+                relative = f"{relative_dir}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(relative + "/")
+                elif entry.is_file(follow_symlinks=False):
+                    yield relative
+
+
+def _referenced_paths(db: Session) -> Iterator[str]:
+    rows = db.query(models.Podcast.audio_file_url, models.Podcast.cover_art_url).yield_per(SORT_BATCH_SIZE)
+    for audio_file_url, cover_art_url in rows:
+        for url in (audio_file_url, cover_art_url):
+            relative = storage.relative_path_for_url(url)
+            if relative:
+                yield relative
+        cover = storage.relative_path_for_url(cover_art_url)
+        if cover:
+            for width in storage.COVER_VARIANT_WIDTHS:
+                yield storage.cover_variant_relative_path(cover, width)
+
+
+def reconcile(db: Session, dry_run: bool = True, grace_seconds: int = DEFAULT_GRACE_SECONDS, root: str = None) -> Dict:
+    """
+    Merge-joins the sorted directory listing against the sorted set of paths
+    referenced by the database. Files on disk with no reference (and older
+    than the grace period) are orphans and are deleted unless dry_run.
+    Referenced paths with no file are reported as missing.
+    """
+    root = root or storage.UPLOAD_DIRECTORY
+    cutoff = time.time() - grace_seconds
+    report = {
+        "dry_run": dry_run,
+        "files_scanned": 0,
+        "orphans": 0,
+        "orphan_bytes": 0,
+        "deleted": 0,
+        "skipped_recent": 0,
+        "missing": 0,
+        "orphan_sample": [],
+        "missing_sample": [],
+    }
+
+    def handle_orphan(relative):
+        path = os.path.join(root, relative)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if stat.st_mtime > cutoff:
+            report["skipped_recent"] += 1
+            return
+        report["orphans"] += 1
+        report["orphan_bytes"] += stat.st_size
+        if len(report["orphan_sample"]) < REPORT_SAMPLE_SIZE:
+            report["orphan_sample"].append(relative)
+        if not dry_run:
+            os.remove(path)
+            report["deleted"] += 1
+
+    def handle_missing(relative):
+        if storage.is_cover_variant(relative):
+            return # variants are optional derived files
+        report["missing"] += 1
+        if len(report["missing_sample"]) < REPORT_SAMPLE_SIZE:
+            report["missing_sample"].append(relative)
+
+    with lock, ExitStack() as stack:
+        on_disk = _external_sort(
+            (p for p in _walk_uploads(root) if not p.startswith(PROTECTED_PREFIXES)), stack
+        )
+        referenced = _external_sort(_referenced_paths(db), stack)
+        disk_path = next(on_disk, None)
+        ref_path = next(referenced, None)
+        while disk_path is not None or ref_path is not None:
+            if ref_path is None or (disk_path is not None and disk_path < ref_path):
+                report["files_scanned"] += 1
+                handle_orphan(disk_path)
+                disk_path = next(on_disk, None)
+            elif disk_path is None or ref_path < disk_path:
+                handle_missing(ref_path)
+                ref_path = next(referenced, None)
+            else:
+                report["files_scanned"] += 1
+                disk_path = next(on_disk, None)
+                ref_path = next(referenced, None)
+
+    logger.info(
+        "Media reconcile%s: %d files, %d orphans (%d bytes), %d deleted, %d missing",
+        " (dry run)" if dry_run else "",
+        report["files_scanned"], report["orphans"], report["orphan_bytes"], report["deleted"], report["missing"],
+    )
+    return report
+
+
+def _reconcile_job():
+    db = SessionLocal()
+    try:
+        reconcile(db, dry_run=False)
+    finally:
+        db.close()
+
+
+reconcile_task = register(PeriodicTask("media-gc", RECONCILE_INTERVAL_SECONDS, _reconcile_job, singleton=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report (and optionally delete) orphaned upload files.")
+    parser.add_argument("--delete", action="store_true", help="Delete orphans instead of only reporting them.")
+    parser.add_argument("--grace-hours", type=float, default=DEFAULT_GRACE_SECONDS / 3600)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        report = reconcile(db, dry_run=not args.delete, grace_seconds=int(args.grace_hours * 3600))
+    finally:
+        db.close()
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# backend/services/media_signing.py
+#
+# Signed, expiring media URLs. Media is only served under a URL the API
+# handed out, with the token in the path:
+#
+#   /uploads/1767225600/Xq3...Zw/ab/cd/<uuid>_talk.mp3
+#            <expires>  <signature>
+#
+# The signature is an HMAC of the expiry and the URL's scope, so checking one
+# costs a hash and no database lookup. The scope is the unsigned URL itself,
+# except under /hls where it is the rendition directory: the playlist and
+# segment URIs a player resolves relative to a signed master playlist carry
+# the same token.
+#
+# Once the signature checks out, Python serves the file, unless MEDIA_OFFLOAD
+# hands that to the web server in front: "x-accel-redirect" (nginx) answers
+# with an X-Accel-Redirect to MEDIA_ACCEL_PREFIX plus the path below
+# UPLOAD_DIRECTORY, "x-sendfile" (Apache, lighttpd) with the absolute path.
+# For nginx:
+#
+#   location /internal-media/ {
+#       internal;
+#       alias /srv/app/backend/uploads/;
+#   }
+
+import base64
+import hashlib
+import hmac
+import math
+import mimetypes
+import os
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, Response, status
+from starlette.staticfiles import StaticFiles
+
+from backend.services import storage
+from backend.utils import SECRET_KEY
+
+SECRET_ENV = "MEDIA_URL_SECRET"
+OFFLOAD_ENV = "MEDIA_OFFLOAD"
+ACCEL_PREFIX_ENV = "MEDIA_ACCEL_PREFIX"
+
+X_ACCEL_REDIRECT = "x-accel-redirect"
+X_SENDFILE = "x-sendfile"
+
+# URLs in API responses stay valid for at least this long. Expiry is rounded
+# up to EXPIRY_GRANULARITY_SECONDS, so the same URL is handed out for a while
+# and browser caches keep working.
+URL_TTL_SECONDS = 6 * 3600
+EXPIRY_GRANULARITY_SECONDS = 3600
+# RSS enclosures: podcast apps download episodes well after fetching the feed.
+FEED_URL_TTL_SECONDS = 7 * 24 * 3600
+FEED_EXPIRY_GRANULARITY_SECONDS = 24 * 3600
+SIGNATURE_BYTES = 16
+
+MEDIA_URL_PATH_PREFIX = "/media"
+# Signed URL prefixes -> number of path segments below the prefix that a
+# signature covers (None: the whole path).
+SCOPE_DEPTHS: Dict[str, Optional[int]] = {
+    storage.URL_PATH_PREFIX: None,
+    storage.HLS_URL_PATH_PREFIX: storage.SHARD_LEVELS + 1, # the rendition directory
+    MEDIA_URL_PATH_PREFIX: None,
+}
+
+OFFLOAD = os.environ.get(OFFLOAD_ENV, "").strip().lower()
+if OFFLOAD not in ("", X_ACCEL_REDIRECT, X_SENDFILE):
+    raise ValueError(f"{OFFLOAD_ENV} must be '{X_ACCEL_REDIRECT}', '{X_SENDFILE}' or empty, not {OFFLOAD!r}")
+ACCEL_PREFIX = os.environ.get(ACCEL_PREFIX_ENV, "/internal-media").rstrip("/")
+
+# Kept apart from the JWT key: a leaked media URL must not help forge tokens.
+_key = (
+    os.environ.get(SECRET_ENV, "").encode()
+    or hmac.new(SECRET_KEY.encode(), b"media-urls", hashlib.sha256).digest()
+)
+
+
+def _signature(scope: str, expires: int) -> str:
+    digest = hmac.new(_key, f"{expires}:{scope}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).rstrip(b"=").decode()
+
+
+def _scope(prefix: str, relative: str) -> str:
+    depth = SCOPE_DEPTHS[prefix]
+    if depth is None:
+        return f"{prefix}/{relative}"
+    return f"{prefix}/" + "".join(segment + "/" for segment in relative.split("/")[:depth])
+
+
+def _split(url: str) -> Optional[Tuple[str, str]]:
+    for prefix in SCOPE_DEPTHS:
+        if url.startswith(prefix + "/"):
+            return prefix, url[len(prefix) + 1:]
+    return None
+
+
+def signed_url(
+    url: Optional[str],
+    ttl_seconds: int = URL_TTL_SECONDS,
+    granularity_seconds: int = EXPIRY_GRANULARITY_SECONDS,
+) -> Optional[str]:
+    """
+    The signed form of a media URL ('/uploads/...', '/hls/...', '/media/...').
+    Anything else (external URLs, None) is returned unchanged.
+    """
+    parts = _split(url) if url else None
+    if parts is None:
+        return url
+    prefix, relative = parts
+    expires = math.ceil((time.time() + ttl_seconds) / granularity_seconds) * granularity_seconds
+    return f"{prefix}/{expires}/{_signature(_scope(prefix, relative), expires)}/{relative}"
+
+
+def is_valid(prefix: str, relative: str, expires: str, signature: str) -> bool:
+    """Whether <expires>/<signature> grants access to prefix/relative now."""
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = _signature(_scope(prefix, relative), int(expires))
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_path(prefix: str, path: str) -> str:
+    """
+    Checks a signed path below `prefix` ('<expires>/<signature>/<relative>')
+    and returns <relative>. Raises 403 if the token is missing, wrong or
+    expired.
+    """
+    expires, _, rest = path.partition("/")
+    signature, _, relative = rest.partition("/")
+    if not relative or not is_valid(prefix, relative, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired media URL")
+    return relative
+
+
+def offload_response(full_path: str, media_type: Optional[str] = None) -> Optional[Response]:
+    """
+    A body-less response telling the web server in front to send the file,
+    or None if MEDIA_OFFLOAD is off (the caller streams the file itself).
+    """
+    if not OFFLOAD:
+        return None
+    media_type = media_type or mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    response = Response(media_type=media_type)
+    if OFFLOAD == X_ACCEL_REDIRECT:
+        relative = os.path.relpath(full_path, os.path.abspath(storage.UPLOAD_DIRECTORY)).replace(os.sep, "/")
+        response.headers["x-accel-redirect"] = quote(f"{ACCEL_PREFIX}/{relative}")
+    else:
+        response.raw_headers.append((b"x-sendfile", os.fsencode(os.path.abspath(full_path))))
+    return response
+
+
+class SignedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves only signed paths (see signed_url) of the mount
+    at `prefix`, and leaves sending the bytes to the web server in front if
+    MEDIA_OFFLOAD is set.
+    """
+
+    def __init__(self, *, prefix: str, **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    async def get_response(self, path: str, scope) -> Response:
+        # `path` is already normalized, so '..' cannot step out of a scope.
+        relative = verify_path(self.prefix, path.replace(os.sep, "/"))
+        return await super().get_response(relative, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = offload_response(str(full_path))
+        if response is not None:
+            return response
+        return super().file_response(full_path, stat_result, scope, status_code)
@@ -0,0 +1,178 @@
+# backend/services/media_tools.py
+#
+# Thin wrappers around the ffmpeg/ffprobe binaries. Every helper degrades to
+# a no-op (None / empty result) when the binaries are not installed, so the
+# app keeps working on machines without ffmpeg.
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from contextlib import contextmanager
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+FFMPEG = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE = os.environ.get("FFPROBE_BINARY", "ffprobe")
+HASH_CHUNK_SIZE = 1024 * 1024
+PROBE_TIMEOUT_SECONDS = 30
+COVER_TIMEOUT_SECONDS = 60
+DECODE_TIMEOUT_SECONDS = 60 * 60
+
+# What pcm_stream raises for files it cannot decode.
+DECODE_ERRORS = (subprocess.SubprocessError, OSError, wave.Error, EOFError)
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG) is not None
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_duration_seconds(path: str) -> Optional[float]:
+    """Container duration via ffprobe, falling back to the stdlib for WAV."""
+    if shutil.which(FFPROBE):
+        try:
+            result = subprocess.run(
+                [FFPROBE, "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+                capture_output=True, timeout=PROBE_TIMEOUT_SECONDS, check=True,
+            )
+            duration = json.loads(result.stdout).get("format", {}).get("duration")
+            return float(duration) if duration is not None else None
+        except (subprocess.SubprocessError, ValueError, OSError):
+            return None
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as w:
+                return w.getnframes() / float(w.getframerate())
+        except (wave.Error, EOFError, OSError):
+            return None
+    return None
+
+
+def probe_bit_rate(path: str) -> Optional[int]:
+    """Overall bit rate in bits/s via ffprobe, or None if unknown."""
+    if not shutil.which(FFPROBE):
+        return None
+    try:
+        result = subprocess.run(
+            [FFPROBE, "-v", "error", "-show_entries", "format=bit_rate", "-of", "json", path],
+            capture_output=True, timeout=PROBE_TIMEOUT_SECONDS, check=True,
+        )
+        bit_rate = json.loads(result.stdout).get("format", {}).get("bit_rate")
+        return int(bit_rate) if bit_rate not in (None, "N/A") else None
+    except (subprocess.SubprocessError, ValueError, OSError):
+        return None
+
+
+def make_cover_variants(source_path: str, widths) -> List[str]:
+    """
+    Writes downscaled JPEG copies of a cover image next to it, named
+    "<stem>.w<width>.jpg". Returns the paths written.
+    """
+    if not ffmpeg_available():
+        return []
+    stem, _ = os.path.splitext(source_path)
+    written = []
+    for width in widths:
+        target = f"{stem}.w{width}.jpg"
+        try:
+            subprocess.run(
+                [FFMPEG, "-v", "error", "-y", "-i", source_path, "-vf", f"scale='min({width},iw)':-2", "-frames:v", "1", target],
+                capture_output=True, timeout=COVER_TIMEOUT_SECONDS, check=True,
+            )
+            written.append(target)
+        except (subprocess.SubprocessError, OSError):
+            break
+    return written
+
+
+class PCMStream(NamedTuple):
+    sample_rate: int
+    channels: int
+    chunks: Iterator[np.ndarray] # float32, shaped (frames, channels)
+
+
+def can_decode(path: str) -> bool:
+    return ffmpeg_available() or path.lower().endswith(".wav")
+
+
+@contextmanager
+def pcm_stream(path: str, sample_rate: int, channels: int, chunk_seconds: int) -> Iterator[PCMStream]:
+    """
+    Decodes audio to float PCM, `chunk_seconds` at a time, so memory does not
+    depend on the file's length. With ffmpeg the audio is converted to
+    `sample_rate` and `channels`; without it only PCM WAV can be read, at its
+    own rate and channel count. Raises one of DECODE_ERRORS, possibly while
+    iterating.
+    """
+    if ffmpeg_available():
+        chunks = _ffmpeg_pcm(path, sample_rate, channels, chunk_seconds)
+        try:
+            yield PCMStream(sample_rate, channels, chunks)
+        finally:
+            chunks.close()
+        return
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() not in (1, 2, 3, 4):
+            raise wave.Error(f"unsupported sample width {w.getsampwidth()}")
+        yield PCMStream(w.getframerate(), w.getnchannels(), _wav_pcm(w, chunk_seconds))
+
+
+def _ffmpeg_pcm(path: str, sample_rate: int, channels: int, chunk_seconds: int) -> Iterator[np.ndarray]:
+    frame_bytes = channels * 4
+    process = subprocess.Popen(
+        [FFMPEG, "-v", "error", "-i", path, "-vn", "-map", "0:a:0",
+         "-ac", str(channels), "-ar", str(sample_rate), "-f", "f32le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    timer = threading.Timer(DECODE_TIMEOUT_SECONDS, process.kill)
+    timer.start()
+    try:
+        while True:
+            data = process.stdout.read(sample_rate * chunk_seconds * frame_bytes)
+            if not data:
+                break
+            usable = len(data) - len(data) % frame_bytes
+            yield np.frombuffer(data[:usable], dtype="<f4").reshape(-1, channels)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, FFMPEG, stderr=stderr)
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def _pcm_to_float(data: bytes, sample_width: int, channels: int) -> np.ndarray:
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((raw[:, 0] << 8 | raw[:, 1] << 16 | raw[:, 2] << 24) >> 8).astype(np.float32) / 2 ** 23
+    else:
+        dtype = {2: "<i2", 4: "<i4"}[sample_width]
+        samples = np.frombuffer(data, dtype=dtype).astype(np.float32) / 2 ** (8 * sample_width - 1)
+    return samples.reshape(-1, channels)
+
+
+def _wav_pcm(w: wave.Wave_read, chunk_seconds: int) -> Iterator[np.ndarray]:
+    frames_per_chunk = w.getframerate() * chunk_seconds
+    while True:
+        data = w.readframes(frames_per_chunk)
+        if not data:
+            return
+        yield _pcm_to_float(data, w.getsampwidth(), w.getnchannels())
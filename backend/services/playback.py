@@ -0,0 +1,130 @@
+# backend/services/playback.py
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal, dialect_insert
+from backend.services.background import PeriodicTask, register
+
+# How often dirty positions are written back to the database.
+FLUSH_INTERVAL_SECONDS = 5
+# Upper bound on rows per INSERT .. ON CONFLICT statement.
+FLUSH_BATCH_SIZE = 500
+
+Key = Tuple[int, int] # (user_id, podcast_id)
+
+
+class PositionCoalescer:
+    """
+    Keeps only the latest reported position per (user, podcast) in memory and
+    writes dirty entries back in batched upserts. A client reporting every
+    second for an hour therefore costs a handful of rows written, not 3600.
+    Memory is bounded by the number of distinct (user, podcast) pairs reported
+    within one flush interval.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._pending: Dict[Key, Tuple[float, datetime]] = {}
+
+    def report(self, user_id: int, podcast_id: int, position_seconds: float) -> datetime:
+        reported_at = datetime.now(timezone.utc)
+        with self._lock:
+            self._pending[(user_id, podcast_id)] = (position_seconds, reported_at)
+        return reported_at
+
+    def pending_for(self, user_id: int, podcast_ids: Iterable[int]) -> Dict[int, Tuple[float, datetime]]:
+        """Unflushed positions for a user, so reads never go backwards in time."""
+        with self._lock:
+            return {
+                podcast_id: self._pending[(user_id, podcast_id)]
+                for podcast_id in podcast_ids
+                if (user_id, podcast_id) in self._pending
+            }
+
+    def flush(self) -> int:
+        """Writes all dirty positions. Returns the number of rows upserted."""
+        with self._lock:
+            dirty, self._pending = self._pending, {}
+        if not dirty:
+            return 0
+
+        db = self._session_factory()
+        try:
+            written = self._write(db, dirty)
+            db.commit()
+            return written
+        except Exception:
+            db.rollback()
+            # Put the entries back unless a newer report has arrived meanwhile.
+            with self._lock:
+                for key, value in dirty.items():
+                    self._pending.setdefault(key, value)
+            raise
+        finally:
+            db.close()
+
+    def _write(self, db: Session, dirty: Dict[Key, Tuple[float, datetime]]) -> int:
+        items = list(dirty.items())
+        written = 0
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            batch = items[start:start + FLUSH_BATCH_SIZE]
+            # Positions are accepted without a per-report lookup; drop any that
+            # reference podcasts deleted (or never existing) in one query here.
+            podcast_ids = {podcast_id for (_, podcast_id), _ in batch}
+            existing = {
+                podcast_id for (podcast_id,) in
+                db.query(models.Podcast.id).filter(models.Podcast.id.in_(podcast_ids))
+            }
+            rows = [
+                {
+                    "user_id": user_id,
+                    "podcast_id": podcast_id,
+                    "position_seconds": position,
+                    "updated_at": reported_at,
+                }
+                for (user_id, podcast_id), (position, reported_at) in batch
+                if podcast_id in existing
+            ]
+            if not rows:
+                continue
+            stmt = dialect_insert(db, models.PlaybackPosition.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "podcast_id"],
+                set_={
+                    "position_seconds": stmt.excluded.position_seconds,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            db.execute(stmt, rows)
+            written += len(rows)
+        return written
+
+
+coalescer = PositionCoalescer()
+
+flush_task = register(PeriodicTask(
+    "playback-position-flush",
+    FLUSH_INTERVAL_SECONDS,
+    coalescer.flush,
+    run_on_stop=True,
+))
+
+
+def get_positions(db: Session, user_id: int, podcast_ids: Iterable[int]) -> Dict[int, Tuple[float, datetime]]:
+    """Stored positions overlaid with any newer unflushed ones."""
+    podcast_ids = list(podcast_ids)
+    positions = {
+        row.podcast_id: (row.position_seconds, row.updated_at)
+        for row in db.query(models.PlaybackPosition).filter(
+            models.PlaybackPosition.user_id == user_id,
+            models.PlaybackPosition.podcast_id.in_(podcast_ids),
+        )
+    }
+    positions.update(coalescer.pending_for(user_id, podcast_ids))
+    return positions
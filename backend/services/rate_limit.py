@@ -0,0 +1,350 @@
+# backend/services/rate_limit.py
+#
+# Token-bucket rate limiting for expensive or abusable routes (bcrypt logins,
+# registrations, counter writes). Runs as ASGI middleware so an over-limit
+# request is answered with 429 + Retry-After before routing, authentication,
+# bcrypt or any database work.
+#
+# Counters can also be bumped in bulk through POST /api/podcasts/events, so
+# that route charges the same play and view buckets one token per event.
+#
+# Buckets live in-process (one small entry per active key, LRU-evicted) unless
+# RATE_LIMIT_REDIS_URL points every worker at a shared Redis.
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import parse_qs
+
+import anyio.to_thread
+from fastapi import status
+from jose import JWTError, jwt
+
+from backend.utils import ALGORITHM, SECRET_KEY
+
+REDIS_URL_ENV = "RATE_LIMIT_REDIS_URL"
+# Upper bound on in-process buckets; the least recently used are dropped,
+# which only ever makes a limit more lenient for that key.
+MAX_TRACKED_KEYS = 100_000
+# Login forms are buffered to read the username; larger bodies are not parsed.
+MAX_FORM_BYTES = 16 * 1024
+# Event batches are buffered to count their events; a full batch of 500 is ~50 KiB.
+MAX_EVENTS_BYTES = 128 * 1024
+
+
+class Limit(NamedTuple):
+    name: str # bucket namespace, also used in stats
+    per: str # "ip", "user" (bearer token) or "login" (username in the login form)
+    rate: float # tokens refilled per second
+    burst: int # bucket capacity
+    # Charge one token per JSON event of this type (POST /api/podcasts/events)
+    # instead of one per request.
+    event: Optional[str] = None
+
+
+def per_minute(count: float) -> float:
+    return count / 60
+
+
+def per_hour(count: float) -> float:
+    return count / 3600
+
+
+PLAY_USER = Limit("play-user", "user", 1, 30)
+PLAY_IP = Limit("play-ip", "ip", 5, 100)
+VIEW_USER = Limit("view-user", "user", 2, 100)
+VIEW_IP = Limit("view-ip", "ip", 10, 300)
+
+# (method, path template, limits). Path parameters match one segment, or
+# only digits if declared as {name:int}.
+ROUTES: List[Tuple[str, str, Tuple[Limit, ...]]] = [
+    ("POST", "/api/auth/token", (
+        Limit("login-ip", "ip", per_minute(10), 20),
+        Limit("login-user", "login", per_minute(5), 10),
+    )),
+    ("POST", "/api/auth/register", (
+        Limit("register-ip", "ip", per_hour(10), 5),
+    )),
+    ("POST", "/api/podcasts/{podcast_id}/play", (PLAY_USER, PLAY_IP)),
+    ("GET", "/api/podcasts/{podcast_id:int}", (VIEW_USER, VIEW_IP)),
+    ("POST", "/api/podcasts/events", (
+        PLAY_USER._replace(event="play"),
+        PLAY_IP._replace(event="play"),
+        VIEW_USER._replace(event="view"),
+        VIEW_IP._replace(event="view"),
+    )),
+    ("POST", "/api/live/{stream_id}/join", (
+        Limit("join-user", "user", per_minute(30), 10),
+        Limit("join-ip", "ip", 2, 50),
+    )),
+]
+
+
+def _compile(template: str) -> Pattern:
+    def parameter(match) -> str:
+        return "[0-9]+" if match.group(0).endswith(":int}") else "[^/]+"
+    return re.compile("^" + re.sub(r"\{[^/]+\}", parameter, template.rstrip("/")) + "/?$")
+
+
+class MemoryBackend:
+    """Buckets as (tokens, updated_at) pairs in an LRU dict guarded by one lock."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        """Takes `cost` tokens. Returns 0 if allowed, else seconds until they are available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+# Same algorithm as MemoryBackend, atomic inside Redis. Keys expire once the
+# bucket would be full again, so idle keys cost nothing.
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+if allowed == 1 then return '0' end
+return tostring((cost - tokens) / rate)
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every worker and host; needs the optional `redis` package."""
+
+    blocking = True # network round trip; run off the event loop
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(f"{REDIS_URL_ENV} is set but the 'redis' package is not installed") from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(_REDIS_TAKE)
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst, time.time(), cost]))
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def _default_backend():
+    url = os.environ.get(REDIS_URL_ENV)
+    return RedisBackend(url) if url else MemoryBackend()
+
+
+backend = _default_backend()
+_routes = [(method, _compile(template), limits) for method, template, limits in ROUTES]
+_counts: Dict[str, Dict[str, int]] = {}
+
+
+def limits_for(method: str, path: str) -> Tuple[Limit, ...]:
+    for route_method, pattern, limits in _routes:
+        if method == route_method and pattern.match(path):
+            return limits
+    return ()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client_ip(scope) -> Optional[str]:
+    # Uvicorn has already replaced this with X-Forwarded-For for trusted proxies.
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _token_user(scope) -> Optional[str]:
+    # Signature check only (no DB); a forged or expired token gets no user
+    # bucket here and is rejected by authentication anyway.
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("user_id")
+    return str(user_id) if user_id is not None else None
+
+
+async def _read_body(receive, max_bytes: int = MAX_FORM_BYTES) -> Tuple[bytes, List[dict]]:
+    """
+    Reads the request body (stopping once it exceeds max_bytes), keeping the
+    messages so they can be replayed.
+    """
+    messages, size = [], 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body") or size > max_bytes:
+            break
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request")
+    return body, messages
+
+
+def _event_counts(body: bytes) -> Counter:
+    """Events per type in a {"events": [{"type": ...}, ...]} batch; empty if malformed."""
+    try:
+        events = json.loads(body).get("events")
+        return Counter(event.get("type") for event in events if isinstance(event, dict))
+    except (ValueError, AttributeError, TypeError):
+        return Counter()
+
+
+def _replay(messages: List[dict], receive):
+    pending = list(messages)
+
+    async def replayed():
+        return pending.pop(0) if pending else await receive()
+
+    return replayed
+
+
+def _count(limit: Limit, outcome: str):
+    counts = _counts.setdefault(limit.name, {"allowed": 0, "rejected": 0})
+    counts[outcome] += 1
+
+
+class RateLimitMiddleware:
+    """
+    Applies ROUTES to matching requests. Every limit of a route must have a
+    token; the first one that is empty rejects the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limits = limits_for(scope["method"], scope["path"])
+        if not limits:
+            return await self.app(scope, receive, send)
+
+        login_username = None
+        if any(limit.per == "login" for limit in limits):
+            content_type = _header(scope, b"content-type") or ""
+            if content_type.startswith("application/x-www-form-urlencoded"):
+                body, messages = await _read_body(receive)
+                receive = _replay(messages, receive)
+                if len(body) <= MAX_FORM_BYTES:
+                    usernames = parse_qs(body.decode("utf-8", "replace")).get("username")
+                    login_username = usernames[0].strip().lower() if usernames else None
+
+        event_counts = None
+        if any(limit.event is not None for limit in limits):
+            body, messages = await _read_body(receive, MAX_EVENTS_BYTES)
+            receive = _replay(messages, receive)
+            if len(body) <= MAX_EVENTS_BYTES:
+                event_counts = _event_counts(body)
+
+        for limit in limits:
+            cost = 1
+            if limit.event is not None:
+                # A batch too large to count takes a full bucket. Batches with
+                # more events than a bucket holds are refused by the route.
+                cost = limit.burst if event_counts is None else min(event_counts[limit.event], limit.burst)
+                if cost == 0:
+                    continue
+            if limit.per == "ip":
+                key = _client_ip(scope)
+            elif limit.per == "user":
+                key = _token_user(scope)
+            else:
+                key = login_username
+            if key is None:
+                continue
+            bucket = f"{limit.name}:{key}"
+            if backend.blocking:
+                retry_after = await anyio.to_thread.run_sync(backend.take, bucket, limit.rate, limit.burst, cost)
+            else:
+                retry_after = backend.take(bucket, limit.rate, limit.burst, cost)
+            if retry_after > 0:
+                _count(limit, "rejected")
+                return await self._reject(send, retry_after)
+            _count(limit, "allowed")
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_429_TOO_MANY_REQUESTS,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def stats() -> dict:
+    """Per-limit allowed/rejected counts for this worker."""
+    return {
+        "backend": type(backend).__name__,
+        "tracked_keys": backend.size(),
+        "limits": {
+            limit.name: {
+                "per": limit.per,
+                "rate_per_minute": round(limit.rate * 60, 2),
+                "burst": limit.burst,
+                **_counts.get(limit.name, {"allowed": 0, "rejected": 0}),
+            }
+            for _, _, limits in ROUTES for limit in limits
+        },
+    }
@@ -0,0 +1,300 @@
+# backend/services/recommendations.py
+
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+# Neighbors stored per podcast.
+TOP_K = 10
+# Dense similarity scratch space per block (float32 cells); ~32 MB.
+BLOCK_CELLS = 8_000_000
+# Rows fetched per round trip when streaming the catalog.
+SCAN_BATCH_SIZE = 500
+# Full rebuild cadence. Incremental updates reuse the last IDF weights and
+# vocabulary, so this is what picks up new terms and corrects IDF drift.
+REBUILD_INTERVAL_SECONDS = 6 * 60 * 60
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have in into is it its of on or
+    that the their this to was were will with you your we our
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _document(title: Optional[str], description: Optional[str], author: Optional[str]) -> List[str]:
+    # Title and author are short but highly discriminative, so count them twice.
+    tokens = tokenize(title or "") * 2 + tokenize(author or "") * 2
+    tokens += tokenize(description or "")
+    return tokens
+
+
+class TfidfIndex:
+    """
+    L2-normalized sparse TF-IDF rows (one per podcast) plus the vocabulary and
+    IDF weights they were built with.
+    """
+
+    def __init__(self, podcast_ids: List[int], matrix: sparse.csr_matrix, vocabulary: Dict[str, int], idf: np.ndarray):
+        self.podcast_ids = podcast_ids
+        self.row_of = {podcast_id: row for row, podcast_id in enumerate(podcast_ids)}
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self.idf = idf
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, List[str]]]) -> "TfidfIndex":
+        podcast_ids, indptr, indices, counts = [], [0], [], []
+        vocabulary: Dict[str, int] = {}
+        for podcast_id, tokens in documents:
+            for term, count in Counter(tokens).items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+            podcast_ids.append(podcast_id)
+
+        n_docs, n_terms = len(podcast_ids), len(vocabulary)
+        tf = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(n_docs, n_terms),
+        )
+        df = np.bincount(tf.indices, minlength=n_terms)
+        idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+        return cls(podcast_ids, cls._weigh(tf, idf), vocabulary, idf)
+
+    @staticmethod
+    def _weigh(tf: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+        # Sublinear TF, IDF weighting, then L2 row normalization so that a
+        # plain dot product is the cosine similarity.
+        weighted = tf.copy()
+        weighted.data = (1 + np.log(weighted.data)) * idf[weighted.indices]
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ weighted, dtype=np.float32)
+
+    def vectorize(self, tokens: List[str]) -> sparse.csr_matrix:
+        """Vector for a new/edited document using the existing vocabulary and IDF."""
+        counts = Counter(t for t in tokens if t in self.vocabulary)
+        indices = np.fromiter((self.vocabulary[t] for t in counts), dtype=np.int32, count=len(counts))
+        data = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        tf = sparse.csr_matrix((data, indices, np.array([0, len(indices)])), shape=(1, len(self.vocabulary)))
+        return self._weigh(tf, self.idf)
+
+    def upsert(self, podcast_id: int, vector: sparse.csr_matrix):
+        self.remove(podcast_id)
+        self.matrix = sparse.vstack([self.matrix, vector], format="csr")
+        self.row_of[podcast_id] = len(self.podcast_ids)
+        self.podcast_ids.append(podcast_id)
+
+    def remove(self, podcast_id: int):
+        # Zero the row in place; the next full rebuild compacts it away.
+        row = self.row_of.pop(podcast_id, None)
+        if row is not None:
+            self.matrix.data[self.matrix.indptr[row]:self.matrix.indptr[row + 1]] = 0
+
+    def top_k(self, k: int = TOP_K) -> Iterable[Tuple[int, List[Tuple[int, float]]]]:
+        """
+        Yields (podcast_id, [(neighbor_id, score), ...]) for every live row,
+        computing similarities one block of rows at a time so scratch memory
+        stays at BLOCK_CELLS regardless of catalog size.
+        """
+        n = self.matrix.shape[0]
+        if n == 0:
+            return
+        block_rows = max(1, BLOCK_CELLS // n)
+        transposed = self.matrix.T.tocsc()
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            sims = (self.matrix[start:stop] @ transposed).toarray()
+            sims[np.arange(stop - start), np.arange(start, stop)] = 0 # never your own neighbor
+            for offset, neighbors in enumerate(_top_k_rows(sims, k)):
+                podcast_id = self.podcast_ids[start + offset]
+                if self.row_of.get(podcast_id) == start + offset:
+                    yield podcast_id, [(self.podcast_ids[col], score) for col, score in neighbors]
+
+    def similar_to(self, vector: sparse.csr_matrix) -> np.ndarray:
+        return (self.matrix @ vector.T).toarray().ravel()
+
+
+def _top_k_rows(sims: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+    k = min(k, sims.shape[1])
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    return [
+        [(int(col), float(score)) for col, score in zip(cols, scores) if score > 0]
+        for cols, scores in zip(top, top_scores)
+    ]
+
+
+_index: Optional[TfidfIndex] = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _stream_documents(db: Session) -> Iterable[Tuple[int, List[str]]]:
+    rows = (
+        db.query(models.Podcast.id, models.Podcast.title, models.Podcast.description, models.Podcast.author)
+        .order_by(models.Podcast.id)
+        .yield_per(SCAN_BATCH_SIZE)
+    )
+    for podcast_id, title, description, author in rows:
+        yield podcast_id, _document(title, description, author)
+
+
+def _write_neighbors(db: Session, podcast_id: int, neighbors: List[Tuple[int, float]]):
+    db.query(models.PodcastNeighbor).filter(models.PodcastNeighbor.podcast_id == podcast_id).delete(synchronize_session=False)
+    db.bulk_insert_mappings(models.PodcastNeighbor, [
+        {"podcast_id": podcast_id, "neighbor_id": neighbor_id, "rank": rank, "score": score}
+        for rank, (neighbor_id, score) in enumerate(neighbors)
+    ])
+
+
+def rebuild_all(db: Session) -> int:
+    """Rebuilds the TF-IDF index and every neighbor list from scratch."""
+    with _index_lock:
+        index = TfidfIndex.build(_stream_documents(db))
+        db.query(models.PodcastNeighbor).delete(synchronize_session=False)
+        mappings = []
+        for podcast_id, neighbors in index.top_k():
+            mappings.extend(
+                {"podcast_id": podcast_id, "neighbor_id": neighbor_id, "rank": rank, "score": score}
+                for rank, (neighbor_id, score) in enumerate(neighbors)
+            )
+            if len(mappings) >= SCAN_BATCH_SIZE:
+                db.bulk_insert_mappings(models.PodcastNeighbor, mappings)
+                mappings = []
+        db.bulk_insert_mappings(models.PodcastNeighbor, mappings)
+        db.commit()
+        _set_index(index)
+        return len(index.row_of)
+
+
+def _set_index(index: TfidfIndex):
+    global _index, _index_built_at
+    _index = index
+    _index_built_at = time.monotonic()
+
+
+def _worker_index(db: Session) -> TfidfIndex:
+    """
+    This worker's index. The periodic rebuild runs in one process only, so
+    the other workers load their own copy (without touching the stored
+    neighbor lists) when they have none or it is a rebuild interval old.
+    """
+    with _index_lock:
+        if _index is None or time.monotonic() - _index_built_at > REBUILD_INTERVAL_SECONDS:
+            _set_index(TfidfIndex.build(_stream_documents(db)))
+        return _index
+
+
+def refresh_podcast(podcast_id: int):
+    """
+    Incrementally (re)computes neighbors after a podcast is created or edited:
+    one sparse mat-vec against the catalog gives its own top-k, and any other
+    podcast for which it now beats the current k-th neighbor gets it merged in.
+    Podcasts that already listed it keep it at its new score, or have their
+    list recomputed if the score dropped, since another podcast may now
+    outrank it. Runs as a FastAPI background task after the response is sent.
+    """
+    db = SessionLocal()
+    try:
+        podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+        if podcast is None:
+            return
+        index = _worker_index(db)
+        with _index_lock:
+            vector = index.vectorize(_document(podcast.title, podcast.description, podcast.author))
+            index.upsert(podcast_id, vector)
+            sims = index.similar_to(vector)
+            sims[index.row_of[podcast_id]] = 0
+
+        own = _top_k_rows(sims[np.newaxis, :], TOP_K)[0]
+        _write_neighbors(db, podcast_id, [(index.podcast_ids[col], score) for col, score in own])
+
+        # Podcasts whose lists already hold it, with the score it had there.
+        previous: Dict[int, float] = dict(
+            db.query(models.PodcastNeighbor.podcast_id, models.PodcastNeighbor.score)
+            .filter(models.PodcastNeighbor.neighbor_id == podcast_id)
+        )
+        # Lists where its score dropped are recomputed from the index below.
+        dropped = {
+            other_id for other_id, old_score in previous.items()
+            if other_id in index.row_of and sims[index.row_of[other_id]] < old_score
+        }
+
+        # Merge into the lists of podcasts that now consider it similar.
+        candidate_rows = np.flatnonzero(sims > 0)
+        candidate_ids = [index.podcast_ids[row] for row in candidate_rows]
+        current: Dict[int, List[Tuple[int, float]]] = {pid: [] for pid in candidate_ids}
+        for start in range(0, len(candidate_ids), SCAN_BATCH_SIZE):
+            chunk = candidate_ids[start:start + SCAN_BATCH_SIZE]
+            for row in db.query(models.PodcastNeighbor).filter(models.PodcastNeighbor.podcast_id.in_(chunk)):
+                if row.neighbor_id != podcast_id:
+                    current[row.podcast_id].append((row.neighbor_id, row.score))
+        for row, other_id in zip(candidate_rows, candidate_ids):
+            if other_id in dropped:
+                continue
+            neighbors = current[other_id]
+            score = float(sims[row])
+            if len(neighbors) < TOP_K or score > min(s for _, s in neighbors):
+                neighbors.append((podcast_id, score))
+                neighbors.sort(key=lambda item: -item[1])
+                _write_neighbors(db, other_id, neighbors[:TOP_K])
+
+        for other_id in dropped:
+            with _index_lock:
+                row = index.row_of.get(other_id)
+                if row is None:
+                    continue
+                other_sims = index.similar_to(index.matrix[row])
+            other_sims[row] = 0
+            neighbors = _top_k_rows(other_sims[np.newaxis, :], TOP_K)[0]
+            _write_neighbors(db, other_id, [(index.podcast_ids[col], score) for col, score in neighbors])
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Failed to refresh recommendations for podcast %s", podcast_id)
+    finally:
+        db.close()
+
+
+def forget_podcast(db: Session, podcast_id: int):
+    """Drops a deleted podcast from the index and all neighbor lists. Caller commits."""
+    with _index_lock:
+        if _index is not None:
+            _index.remove(podcast_id)
+    db.query(models.PodcastNeighbor).filter(
+        (models.PodcastNeighbor.podcast_id == podcast_id) | (models.PodcastNeighbor.neighbor_id == podcast_id)
+    ).delete(synchronize_session=False)
+
+
+def _rebuild_job():
+    db = SessionLocal()
+    try:
+        count = rebuild_all(db)
+        logger.info("Rebuilt similar-podcast neighbors for %d podcasts", count)
+    finally:
+        db.close()
+
+
+rebuild_task = register(PeriodicTask("recommendations-rebuild", REBUILD_INTERVAL_SECONDS, _rebuild_job, singleton=True))
@@ -0,0 +1,101 @@
+# backend/services/runtime.py
+#
+# Per-worker runtime tuning and stats: the AnyIO threadpool that runs every
+# sync `def` handler, and event-loop lag. Configured by backend/serve.py
+# through environment variables.
+
+import asyncio
+import os
+import socket
+import time
+from typing import Optional
+
+import anyio.to_thread
+
+# AnyIO's default is 40 threads shared by all sync handlers in a worker.
+THREADPOOL_SIZE_ENV = "THREADPOOL_SIZE"
+LAG_SAMPLE_INTERVAL_SECONDS = 0.5
+# Weight of the newest sample in the moving average of loop lag.
+LAG_EWMA_ALPHA = 0.1
+
+
+class LoopLagMonitor:
+    """
+    Sleeps for a fixed interval on the event loop and records how late it
+    wakes up. Sustained lag means something blocks the loop (sync work in an
+    async handler) or the worker is CPU-bound.
+    """
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self.average = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self.average = lag if self.samples == 0 else (1 - LAG_EWMA_ALPHA) * self.average + LAG_EWMA_ALPHA * lag
+            self.samples += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "last_ms": round(self.last * 1000, 2),
+            "average_ms": round(self.average * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            "samples": self.samples,
+        }
+
+
+loop_lag = LoopLagMonitor()
+_started_at = time.time()
+
+
+def configure_threadpool(size: Optional[int] = None):
+    """Resizes this worker's AnyIO threadpool; must run on the event loop."""
+    size = size or int(os.environ.get(THREADPOOL_SIZE_ENV, "0") or 0)
+    if size > 0:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = size
+
+
+async def start():
+    configure_threadpool()
+    loop_lag.start()
+
+
+async def stop():
+    loop_lag.stop()
+
+
+def snapshot() -> dict:
+    """Stats for this worker; must run on the event loop (i.e. from an async handler)."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    busy = limiter.borrowed_tokens
+    return {
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - _started_at),
+        "threadpool": {
+            "size": limiter.total_tokens,
+            "busy": busy,
+            "idle": limiter.total_tokens - busy,
+            "waiting": limiter.statistics().tasks_waiting,
+        },
+        "event_loop_lag": loop_lag.stats(),
+    }
@@ -0,0 +1,360 @@
+# backend/services/seek_index.py
+#
+# Time -> byte offset tables for uploaded audio. Players seek in VBR MP3 by
+# guessing an offset from the average bit rate, which lands seconds away from
+# the requested time and costs extra range reads. Scanning the frame headers
+# once gives the exact offset of the frame playing at every second, which
+# /media/podcasts/{id}/audio?t= (routers/media.py) uses to start the response
+# at that frame.
+#
+# Supported: MPEG audio (MP3, with or without a Xing/Info/VBRI header), ADTS
+# AAC, and PCM WAV (computed, nothing to scan). Other formats get an empty
+# table and are served whole.
+
+import logging
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import storage
+
+logger = logging.getLogger(__name__)
+
+RESOLUTION_SECONDS = 1.0
+READ_SIZE = 256 * 1024
+# Kept buffered ahead of the parse position: more than the largest frame plus
+# the next header, so a frame can always be confirmed by its successor.
+LOOKAHEAD_BYTES = 16 * 1024
+OFFSET_DTYPE = np.dtype("<u4") # so files are limited to 4 GiB
+MAX_FILE_BYTES = 2 ** 32
+CACHE_SIZE = 256
+
+MP3 = "mp3"
+ADTS = "adts"
+WAV = "wav"
+
+
+class Frame(NamedTuple):
+    length: int # bytes, header included
+    samples: int
+    sample_rate: int
+
+
+class SeekIndex(NamedTuple):
+    resolution_seconds: float
+    duration_seconds: float
+    offsets: np.ndarray # offsets[k]: start of the frame playing at k * resolution_seconds
+
+    def offset_for(self, seconds: float) -> Tuple[int, float]:
+        """(byte offset, time at that offset) for starting playback at `seconds`."""
+        if len(self.offsets) == 0:
+            return 0, 0.0
+        step = min(int(max(0.0, seconds) // self.resolution_seconds), len(self.offsets) - 1)
+        return int(self.offsets[step]), step * self.resolution_seconds
+
+
+EMPTY = SeekIndex(RESOLUTION_SECONDS, 0.0, np.zeros(0, dtype=OFFSET_DTYPE))
+
+
+# --- MPEG audio --------------------------------------------------------------
+
+# kbit/s by (MPEG-1, layer) and index. MPEG-2/2.5 layers II and III share a table.
+_MPEG_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# By version bits: MPEG-1, MPEG-2, MPEG-2.5.
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_VBR_HEADER_TAGS = (b"Xing", b"Info", b"VBRI")
+
+
+def parse_mpeg_header(data: bytes, i: int) -> Optional[Frame]:
+    if i + 4 > len(data) or data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (data[i + 1] >> 3) & 0x03
+    layer = 4 - ((data[i + 1] >> 1) & 0x03)
+    bitrate_index = data[i + 2] >> 4
+    rate_index = (data[i + 2] >> 2) & 0x03
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None # reserved values, or free format (length not computable)
+    mpeg1 = version_bits == 3
+    table = (True, layer) if mpeg1 else (False, 1 if layer == 1 else 2)
+    bit_rate = _MPEG_BITRATES[table][bitrate_index] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version_bits][rate_index]
+    padding = (data[i + 2] >> 1) & 0x01
+    if layer == 1:
+        return Frame((12 * bit_rate // sample_rate + padding) * 4, 384, sample_rate)
+    if layer == 3 and not mpeg1:
+        return Frame(72 * bit_rate // sample_rate + padding, 576, sample_rate)
+    return Frame(144 * bit_rate // sample_rate + padding, 1152, sample_rate)
+
+
+def _is_vbr_header_frame(data: bytes, i: int, frame: Frame) -> bool:
+    # Encoders put the Xing/Info/VBRI header in a first frame of silence that
+    # decoders skip, so it does not count towards time.
+    body = data[i + 4:i + min(frame.length, 64)]
+    return any(tag in body for tag in _VBR_HEADER_TAGS)
+
+
+# --- ADTS AAC ----------------------------------------------------------------
+
+_ADTS_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+
+
+def parse_adts_header(data: bytes, i: int) -> Optional[Frame]:
+    if i + 7 > len(data) or data[i] != 0xFF or data[i + 1] & 0xF6 != 0xF0:
+        return None # 12-bit sync word, layer 0
+    rate_index = (data[i + 2] >> 2) & 0x0F
+    if rate_index >= len(_ADTS_SAMPLE_RATES):
+        return None
+    length = ((data[i + 3] & 0x03) << 11) | (data[i + 4] << 3) | (data[i + 5] >> 5)
+    if length < 7:
+        return None
+    blocks = (data[i + 6] & 0x03) + 1
+    return Frame(length, 1024 * blocks, _ADTS_SAMPLE_RATES[rate_index])
+
+
+# --- scanning ----------------------------------------------------------------
+
+def _id3v2_size(f: BinaryIO) -> int:
+    header = f.read(10)
+    f.seek(0)
+    if len(header) == 10 and header[:3] == b"ID3":
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9] # syncsafe
+        return 10 + size + (10 if header[5] & 0x10 else 0) # optional footer
+    return 0
+
+
+def scan_frames(
+    f: BinaryIO, parse: Callable[[bytes, int], Optional[Frame]]
+) -> Iterator[Tuple[int, Frame]]:
+    """
+    Yields (file offset, frame) for every audio frame, reading READ_SIZE at a
+    time. Outside a run of frames, a header only counts if another header
+    follows it where it says it ends; this skips tags, garbage and false syncs.
+    """
+    base = _id3v2_size(f) # file offset of buf[0]
+    f.seek(base)
+    buf = b""
+    i = 0
+    eof = False
+    in_sync = False
+    first = True
+    while True:
+        if not eof and len(buf) - i < LOOKAHEAD_BYTES:
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            buf = buf[i:] + chunk
+            base += i
+            i = 0
+            continue
+        frame = parse(buf, i)
+        if frame is not None and i + frame.length > len(buf):
+            frame = None # truncated last frame
+        if frame is not None and not in_sync:
+            following = i + frame.length
+            if following != len(buf):
+                successor = parse(buf, following)
+                if successor is None or successor.sample_rate != frame.sample_rate:
+                    frame = None
+        if frame is None:
+            in_sync = False
+            next_sync = buf.find(b"\xff", i + 1)
+            if next_sync == -1:
+                if eof:
+                    return
+                next_sync = len(buf)
+            i = next_sync
+            continue
+        if not (first and parse is parse_mpeg_header and _is_vbr_header_frame(buf, i, frame)):
+            yield base + i, frame
+        first = False
+        in_sync = True
+        i += frame.length
+
+
+def _build_from_frames(f: BinaryIO, parse: Callable[[bytes, int], Optional[Frame]]) -> SeekIndex:
+    offsets = array("I")
+    elapsed = 0.0
+    for offset, frame in scan_frames(f, parse):
+        elapsed += frame.samples / frame.sample_rate
+        # Every step that starts before this frame ends is played by it.
+        while len(offsets) * RESOLUTION_SECONDS < elapsed:
+            offsets.append(offset)
+    return SeekIndex(RESOLUTION_SECONDS, elapsed, np.frombuffer(offsets, dtype=np.uint32).astype(OFFSET_DTYPE))
+
+
+def _wav_layout(f: BinaryIO) -> Optional[Tuple[int, int, int, int]]:
+    """(byte rate, block align, data start, data size) of a PCM WAV file, or None."""
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    byte_rate = block_align = 0
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(size + size % 2)
+            if len(fmt) >= 14:
+                byte_rate, block_align = struct.unpack("<IH", fmt[8:14])
+        elif chunk_id == b"data":
+            if not byte_rate or not block_align:
+                return None
+            data_start = f.tell()
+            data_size = min(size, os.fstat(f.fileno()).st_size - data_start)
+            return byte_rate, block_align, data_start, data_size
+        else:
+            f.seek(size + size % 2, os.SEEK_CUR) # chunks are word aligned
+
+
+def _build_wav(f: BinaryIO) -> SeekIndex:
+    layout = _wav_layout(f)
+    if layout is None:
+        return EMPTY
+    byte_rate, block_align, data_start, data_size = layout
+    duration = data_size / byte_rate
+    steps = np.arange(int(np.ceil(duration / RESOLUTION_SECONDS)), dtype=np.int64)
+    # Offsets aligned to whole sample frames.
+    offsets = data_start + (steps * int(RESOLUTION_SECONDS * byte_rate) // block_align) * block_align
+    return SeekIndex(RESOLUTION_SECONDS, duration, offsets.astype(OFFSET_DTYPE))
+
+
+def wav_header_for(path: str, offset: int) -> Optional[Tuple[bytes, int]]:
+    """
+    For playing a WAV file from `offset` (a seek index offset in its data
+    chunk): the file's header with the RIFF and data sizes rewritten for the
+    shorter data, and how many data bytes from `offset` to send after it.
+    A response has to start with a header to be playable at all. None if
+    the file is not PCM WAV.
+    """
+    with open(path, "rb") as f:
+        layout = _wav_layout(f)
+        if layout is None:
+            return None
+        _, _, data_start, data_size = layout
+        f.seek(0)
+        header = bytearray(f.read(data_start))
+    length = max(0, data_start + data_size - offset)
+    # The data chunk's size field sits right before its first byte.
+    header[data_start - 4:data_start] = struct.pack("<I", length)
+    header[4:8] = struct.pack("<I", data_start - 8 + length + length % 2)
+    return bytes(header), length
+
+
+def detect_format(path: str) -> Optional[str]:
+    with open(path, "rb") as f:
+        head = f.read(12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return WAV
+    if head[:3] == b"ID3" or parse_mpeg_header(head, 0):
+        return MP3
+    if parse_adts_header(head, 0):
+        return ADTS
+    # Leading garbage or an unusual tag: trust the extension.
+    return {".mp3": MP3, ".mp2": MP3, ".mpga": MP3, ".aac": ADTS, ".wav": WAV}.get(
+        os.path.splitext(path)[1].lower()
+    )
+
+
+def build(path: str) -> SeekIndex:
+    """Scans an audio file. Unsupported or unparseable files give EMPTY."""
+    kind = detect_format(path)
+    if kind is None or os.path.getsize(path) >= MAX_FILE_BYTES:
+        return EMPTY
+    with open(path, "rb") as f:
+        if kind == WAV:
+            return _build_wav(f)
+        return _build_from_frames(f, parse_mpeg_header if kind == MP3 else parse_adts_header)
+
+
+# --- storage -----------------------------------------------------------------
+
+_cache: "OrderedDict[Tuple[int, str], SeekIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _remember(key: Tuple[int, str], index: SeekIndex):
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _from_row(row: models.PodcastSeekIndex) -> SeekIndex:
+    offsets = np.frombuffer(row.offsets, dtype=OFFSET_DTYPE)
+    return SeekIndex(row.resolution_seconds, row.duration_seconds, offsets)
+
+
+def ensure_index(db: Session, podcast: models.Podcast) -> Optional[SeekIndex]:
+    """
+    The seek index of the podcast's current audio file, building and storing
+    it if missing or stale (commits). None if the file is missing.
+    """
+    key = (podcast.id, podcast.audio_file_url)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+
+    row = db.query(models.PodcastSeekIndex).filter(models.PodcastSeekIndex.podcast_id == podcast.id).first()
+    if row is not None and row.audio_file_url == podcast.audio_file_url:
+        index = _from_row(row)
+        _remember(key, index)
+        return index
+
+    path = storage.path_for_url(podcast.audio_file_url)
+    if path is None or not os.path.isfile(path):
+        return None
+    try:
+        index = build(path)
+    except OSError:
+        logger.exception("Could not index audio of podcast %s", podcast.id)
+        return None
+
+    if row is None:
+        row = models.PodcastSeekIndex(podcast_id=podcast.id)
+        db.add(row)
+    row.audio_file_url = podcast.audio_file_url
+    row.resolution_seconds = index.resolution_seconds
+    row.duration_seconds = index.duration_seconds
+    row.offsets = index.offsets.tobytes()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback() # built concurrently by another request; same result
+    _remember(key, index)
+    return index
+
+
+def build_for_podcast(podcast_id: int):
+    """Background task after an upload or audio replacement."""
+    db = SessionLocal()
+    try:
+        podcast = db.query(models.Podcast).filter(models.Podcast.id == podcast_id).first()
+        if podcast is not None:
+            ensure_index(db, podcast)
+    finally:
+        db.close()
+
+
+def forget_podcast(db: Session, podcast_id: int):
+    """Drops a deleted podcast's index. Caller commits."""
+    db.query(models.PodcastSeekIndex).filter(
+        models.PodcastSeekIndex.podcast_id == podcast_id
+    ).delete(synchronize_session=False)
@@ -0,0 +1,146 @@
+# backend/services/stats.py
+
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal, dialect_insert
+from backend.services.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+# Row in stats_summary holding catalog-wide totals (user ids start at 1).
+GLOBAL_OWNER_ID = 0
+# Full rebuild cadence; incremental updates keep things current in between.
+RECONCILE_INTERVAL_SECONDS = 15 * 60
+
+COUNTER_COLUMNS = (
+    "podcast_count",
+    "total_views",
+    "total_plays",
+    "live_stream_count",
+    "current_viewers",
+    "total_live_views",
+)
+
+
+def bump(db: Session, owner_id: int, **deltas: int):
+    """
+    Adds `deltas` to the owner's row and the global row in a single
+    INSERT .. ON CONFLICT statement. Zero deltas are dropped; the caller's
+    commit makes the change atomic with the write it describes.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(COUNTER_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown stats columns: {sorted(unknown)}")
+
+    table = models.StatsSummary.__table__
+    owner_ids = [GLOBAL_OWNER_ID] if owner_id in (None, GLOBAL_OWNER_ID) else [GLOBAL_OWNER_ID, owner_id]
+    stmt = dialect_insert(db, table).values([{"owner_id": oid, **deltas} for oid in owner_ids])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id"],
+        set_={column: table.c[column] + stmt.excluded[column] for column in deltas},
+    )
+    db.execute(stmt)
+
+
+# --- Write-path hooks -----------------------------------------------------------
+
+def podcast_created(db: Session, podcast: models.Podcast):
+    bump(db, podcast.owner_id, podcast_count=1)
+
+def podcast_deleted(db: Session, podcast: models.Podcast):
+    bump(
+        db,
+        podcast.owner_id,
+        podcast_count=-1,
+        total_views=-(podcast.views or 0),
+        total_plays=-(podcast.plays or 0),
+    )
+
+def podcast_viewed(db: Session, podcast: models.Podcast, count: int = 1):
+    bump(db, podcast.owner_id, total_views=count)
+
+def podcast_played(db: Session, podcast: models.Podcast, count: int = 1):
+    bump(db, podcast.owner_id, total_plays=count)
+
+def live_stream_created(db: Session, live_stream: models.LiveStream):
+    bump(db, live_stream.host_id, live_stream_count=1)
+
+def live_stream_deleted(db: Session, live_stream: models.LiveStream):
+    bump(
+        db,
+        live_stream.host_id,
+        live_stream_count=-1,
+        current_viewers=-(live_stream.current_viewers or 0),
+        total_live_views=-(live_stream.total_views or 0),
+    )
+
+def live_viewers_changed(db: Session, live_stream: models.LiveStream, viewer_delta: int, view_delta: int = 0):
+    bump(db, live_stream.host_id, current_viewers=viewer_delta, total_live_views=view_delta)
+
+
+# --- Full reconcile ---------------------------------------------------------------
+
+def reconcile(db: Session):
+    """
+    Rebuilds stats_summary from the source tables with two GROUP BY queries.
+    Corrects any drift from crashes between a write and its hook, manual SQL
+    edits, or rows created before this table existed.
+    """
+    rows = {}
+
+    def row_for(owner_id):
+        return rows.setdefault(owner_id, {column: 0 for column in COUNTER_COLUMNS})
+
+    podcast_totals = db.query(
+        models.Podcast.owner_id,
+        func.count(models.Podcast.id),
+        func.coalesce(func.sum(models.Podcast.views), 0),
+        func.coalesce(func.sum(models.Podcast.plays), 0),
+    ).group_by(models.Podcast.owner_id)
+    for owner_id, count, views, plays in podcast_totals:
+        for target in (row_for(owner_id), row_for(GLOBAL_OWNER_ID)):
+            target["podcast_count"] += count
+            target["total_views"] += views
+            target["total_plays"] += plays
+
+    live_totals = db.query(
+        models.LiveStream.host_id,
+        func.count(models.LiveStream.id),
+        func.coalesce(func.sum(models.LiveStream.current_viewers), 0),
+        func.coalesce(func.sum(models.LiveStream.total_views), 0),
+    ).group_by(models.LiveStream.host_id)
+    for host_id, count, viewers, views in live_totals:
+        for target in (row_for(host_id), row_for(GLOBAL_OWNER_ID)):
+            target["live_stream_count"] += count
+            target["current_viewers"] += viewers
+            target["total_live_views"] += views
+
+    row_for(GLOBAL_OWNER_ID)
+    now = datetime.now(timezone.utc)
+    db.query(models.StatsSummary).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        models.StatsSummary,
+        [{"owner_id": owner_id, "reconciled_at": now, **counters} for owner_id, counters in rows.items()],
+    )
+    db.commit()
+    return len(rows)
+
+
+def _reconcile_job():
+    db = SessionLocal()
+    try:
+        owners = reconcile(db)
+        logger.info("Reconciled admin stats for %d owners", owners - 1)
+    finally:
+        db.close()
+
+
+reconcile_task = register(PeriodicTask("stats-reconcile", RECONCILE_INTERVAL_SECONDS, _reconcile_job, singleton=True))
@@ -0,0 +1,131 @@
+# backend/services/storage.py
+
+import hashlib
+import os
+import shutil
+from typing import Optional, Tuple
+from uuid import uuid4
+
+# Directory uploaded media is written to, and the URL prefix it is served under
+# (see the StaticFiles mount in main.py).
+UPLOAD_DIRECTORY = "./backend/uploads"
+URL_PATH_PREFIX = "/uploads"
+LIVE_UPLOAD_DIRECTORY = os.path.join(UPLOAD_DIRECTORY, "live")
+# HLS renditions (services/hls.py): one directory per packaging run, served
+# under their own prefix with immutable cache headers (see main.py).
+HLS_DIRECTORY = os.path.join(UPLOAD_DIRECTORY, "hls")
+HLS_URL_PATH_PREFIX = "/hls"
+
+# New files go into two levels of hashed fan-out directories ("ab/cd/<name>"),
+# i.e. 65,536 leaf directories, so no directory grows past a few entries per
+# thousand files. Files from before the sharded layout sit directly in
+# UPLOAD_DIRECTORY and keep working; see services/storage_migration.py.
+SHARD_LEVELS = 2
+
+
+def relative_path_for_url(url: Optional[str]) -> Optional[str]:
+    """
+    Maps a stored media URL to a path relative to UPLOAD_DIRECTORY, using '/'
+    separators. Handles current URLs ('/uploads/x.mp3') as well as legacy
+    local paths ('./backend/uploads\\\\x.mp3') still present in old rows.
+    Returns None for external URLs and anything that would escape the
+    upload directory.
+    """
+    if not url:
+        return None
+    if url.startswith(URL_PATH_PREFIX + "/"):
+        relative = url[len(URL_PATH_PREFIX) + 1:]
+    elif "\\" in url or url.startswith("."):
+        relative = os.path.basename(url.replace("\\", "/"))
+    else:
+        return None
+    relative = os.path.normpath(relative).replace(os.sep, "/")
+    if relative.startswith("../") or relative in ("", ".", "..") or os.path.isabs(relative):
+        return None
+    return relative
+
+
+def shard_for(name: str) -> str:
+    """Deterministic fan-out prefix for a file name, e.g. 'ab/cd'."""
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return "/".join(digest[2 * level:2 * level + 2] for level in range(SHARD_LEVELS))
+
+
+def sharded_relative_path(name: str) -> str:
+    return f"{shard_for(name)}/{name}"
+
+
+def is_sharded(relative: str) -> bool:
+    return relative.count("/") >= SHARD_LEVELS and not relative.startswith("live/")
+
+
+def new_media_path(original_filename: Optional[str]) -> Tuple[str, str]:
+    """
+    Allocates a unique location for a new upload in the sharded layout.
+    Returns (filesystem path, URL to store in the database); the parent
+    directories are created.
+    """
+    safe_name = os.path.basename((original_filename or "upload").replace("\\", "/")) or "upload"
+    relative = sharded_relative_path(f"{uuid4()}_{safe_name}")
+    path = os.path.join(UPLOAD_DIRECTORY, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path, url_for_relative_path(relative)
+
+
+# Widths of the downscaled cover art copies stored next to the original as
+# "<stem>.w<width>.jpg". They are derived data: not tracked in the database.
+COVER_VARIANT_WIDTHS = (150, 300, 600)
+
+
+def cover_variant_relative_path(relative: str, width: int) -> str:
+    stem, _ = os.path.splitext(relative)
+    return f"{stem}.w{width}.jpg"
+
+
+def is_cover_variant(relative: str) -> bool:
+    return any(relative.endswith(f".w{width}.jpg") for width in COVER_VARIANT_WIDTHS)
+
+
+def path_for_url(url: Optional[str]) -> Optional[str]:
+    relative = relative_path_for_url(url)
+    return os.path.join(UPLOAD_DIRECTORY, relative) if relative else None
+
+
+def url_for_relative_path(relative: str) -> str:
+    return f"{URL_PATH_PREFIX}/{relative}"
+
+
+def hls_directory_for_url(url: Optional[str]) -> Optional[str]:
+    """Directory holding the renditions of an HLS master playlist URL."""
+    if not url or not url.startswith(HLS_URL_PATH_PREFIX + "/"):
+        return None
+    relative = os.path.normpath(os.path.dirname(url[len(HLS_URL_PATH_PREFIX) + 1:])).replace(os.sep, "/")
+    if relative.startswith("../") or relative in ("", ".", "..") or os.path.isabs(relative):
+        return None
+    return os.path.join(HLS_DIRECTORY, relative)
+
+
+def remove_media(url: Optional[str]) -> bool:
+    """
+    Deletes the file behind a media URL (and any cover variants derived from
+    it) if it exists; for an HLS master playlist, its whole directory.
+    Returns True if the file itself was removed.
+    """
+    hls_directory = hls_directory_for_url(url)
+    if hls_directory is not None:
+        if os.path.isdir(hls_directory):
+            shutil.rmtree(hls_directory, ignore_errors=True)
+            return True
+        return False
+    relative = relative_path_for_url(url)
+    if relative is None:
+        return False
+    for width in COVER_VARIANT_WIDTHS:
+        variant = os.path.join(UPLOAD_DIRECTORY, cover_variant_relative_path(relative, width))
+        if os.path.isfile(variant):
+            os.remove(variant)
+    path = os.path.join(UPLOAD_DIRECTORY, relative)
+    if os.path.isfile(path):
+        os.remove(path)
+        return True
+    return False
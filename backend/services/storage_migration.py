@@ -0,0 +1,167 @@
+# backend/services/storage_migration.py
+#
+# Moves files from the old flat upload layout into the sharded layout.
+# Runs in the background on startup and can also be run by hand:
+#   python -m backend.services.storage_migration [--batch-size 200]
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import entity_cache, media_gc, storage, sync
+from backend.services.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+# Pause between batches so the migration never monopolizes disk or the DB writer.
+BATCH_PAUSE_SECONDS = 0.5
+# Re-check periodically in case older app versions wrote flat files meanwhile.
+MIGRATION_INTERVAL_SECONDS = 60 * 60
+
+_URL_COLUMNS = ("audio_file_url", "cover_art_url")
+# Derived rows that record which audio file they were computed from; they go
+# stale when that URL changes, so a move carries the new URL over to them.
+_AUDIO_DERIVED_MODELS = (models.PodcastFingerprint, models.PodcastSeekIndex)
+
+
+def _place(relative: str) -> Optional[str]:
+    """
+    Hard-links (or copies, across filesystems) a flat file to its sharded
+    location and returns the new relative path. The old file stays in place
+    until the database change is committed, so readers never see a dangling URL.
+    The new path gets a fresh mtime, so the media reconciler's grace period
+    covers it until the rewrite is committed.
+    """
+    source = os.path.join(storage.UPLOAD_DIRECTORY, relative)
+    target_relative = storage.sharded_relative_path(os.path.basename(relative))
+    target = os.path.join(storage.UPLOAD_DIRECTORY, target_relative)
+    if not os.path.isfile(source):
+        # Already moved for another row that shared the same file.
+        return target_relative if os.path.isfile(target) else None
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if not os.path.exists(target):
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy(source, target)
+    # A hard link shares the old file's inode and mtime.
+    os.utime(target)
+    return target_relative
+
+
+def migrate_batch(db: Session, after_id: int, batch_size: int = BATCH_SIZE) -> Dict:
+    """
+    Migrates the next batch of podcasts (by id, after `after_id`) and commits
+    their URL rewrites in one transaction. Old files are removed only after
+    the commit; a crash at any point leaves at worst an unreferenced copy for
+    the media reconciler, never a broken URL.
+    """
+    with media_gc.lock:
+        return _migrate_batch(db, after_id, batch_size)
+
+
+def _migrate_batch(db: Session, after_id: int, batch_size: int) -> Dict:
+    podcasts = (
+        db.query(models.Podcast)
+        .filter(models.Podcast.id > after_id)
+        .order_by(models.Podcast.id)
+        .limit(batch_size)
+        .all()
+    )
+    moved: List[str] = []
+    changed_ids = set()
+    missing = 0
+    for podcast in podcasts:
+        for column in _URL_COLUMNS:
+            relative = storage.relative_path_for_url(getattr(podcast, column))
+            if relative is None or storage.is_sharded(relative):
+                continue
+            new_relative = _place(relative)
+            if new_relative is None:
+                missing += 1
+                continue
+            old_url, new_url = getattr(podcast, column), storage.url_for_relative_path(new_relative)
+            setattr(podcast, column, new_url)
+            if column == "audio_file_url":
+                for model in _AUDIO_DERIVED_MODELS:
+                    db.query(model).filter(model.podcast_id == podcast.id, model.audio_file_url == old_url).update(
+                        {model.audio_file_url: new_url}, synchronize_session=False
+                    )
+            sync.touch(podcast)
+            moved.append(relative)
+            changed_ids.add(podcast.id)
+    db.commit()
+    for podcast_id in changed_ids:
+        entity_cache.podcast_removed(podcast_id)
+
+    for relative in moved:
+        try:
+            os.remove(os.path.join(storage.UPLOAD_DIRECTORY, relative))
+        except FileNotFoundError:
+            pass
+    return {
+        "last_id": podcasts[-1].id if podcasts else None,
+        "scanned": len(podcasts),
+        "moved": len(moved),
+        "missing": missing,
+    }
+
+
+def migrate_all(batch_size: int = BATCH_SIZE, pause: float = BATCH_PAUSE_SECONDS) -> Dict:
+    """
+    Walks the whole catalog in id order. Progress is implied by the data
+    itself (already-sharded URLs are skipped), so an interrupted run simply
+    resumes on the next call.
+    """
+    totals = {"scanned": 0, "moved": 0, "missing": 0}
+    after_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            result = migrate_batch(db, after_id, batch_size)
+        finally:
+            db.close()
+        if result["last_id"] is None:
+            break
+        after_id = result["last_id"]
+        for key in totals:
+            totals[key] += result[key]
+        if result["moved"]:
+            time.sleep(pause)
+    if totals["moved"] or totals["missing"]:
+        logger.info(
+            "Upload layout migration: %d podcasts scanned, %d files moved, %d files missing",
+            totals["scanned"], totals["moved"], totals["missing"],
+        )
+    return totals
+
+
+migration_task = register(PeriodicTask(
+    "upload-layout-migration",
+    MIGRATION_INTERVAL_SECONDS,
+    migrate_all,
+    run_on_start=True,
+    singleton=True,
+))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move flat upload files into the sharded layout.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=BATCH_PAUSE_SECONDS)
+    args = parser.parse_args(argv)
+    for key, value in migrate_all(args.batch_size, args.pause).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
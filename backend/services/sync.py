@@ -0,0 +1,177 @@
+# backend/services/sync.py
+#
+# Delta sync for mobile/offline clients: rows changed or deleted since an
+# opaque token, read through the updated_at / deleted_at indexes so the cost
+# of a sync follows churn, not catalog size.
+
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+PODCAST = "podcast"
+LIVE_STREAM = "live_stream"
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# Rows newer than this are held back until the next sync. A transaction can
+# stamp updated_at and commit a moment later; without the lag a client could
+# move its high-water mark past a row that was not yet visible and miss it.
+SETTLE_SECONDS = 5
+# Clients that have not synced for longer than this must start over, because
+# the tombstones they would need may have been pruned.
+TOMBSTONE_RETENTION_DAYS = 90
+PRUNE_INTERVAL_SECONDS = 24 * 60 * 60
+
+TOKEN_VERSION = 1
+
+Cursor = Tuple[datetime, int] # (timestamp, id) of the last row a client has seen
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ExpiredToken(ValueError):
+    pass
+
+
+def touch(entity):
+    """Marks a podcast or live stream as changed for sync (before commit)."""
+    entity.updated_at = models.utcnow()
+
+
+def record_deletion(db: Session, entity_type: str, entity_id: int):
+    """Writes a tombstone in the deleting transaction."""
+    db.add(models.SyncTombstone(entity_type=entity_type, entity_id=entity_id))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; every stored value is UTC.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def encode_token(cursors: Dict[str, Cursor]) -> str:
+    payload = {"v": TOKEN_VERSION}
+    for name, (timestamp, row_id) in cursors.items():
+        payload[name] = [_as_utc(timestamp).isoformat(), row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> Dict[str, Cursor]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        version = payload.get("v")
+        cursors = {
+            name: (datetime.fromisoformat(payload[name][0]), int(payload[name][1]))
+            for name in ("podcasts", "live_streams", "deleted")
+        }
+    except (binascii.Error, UnicodeDecodeError, AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+        raise InvalidToken("Malformed sync token") from e
+    if version != TOKEN_VERSION:
+        raise InvalidToken("Unsupported sync token version")
+    return cursors
+
+
+def _page(query, column, id_column, cursor: Cursor, cutoff: datetime, limit: int):
+    """Keyset page over (column, id) strictly after cursor and before cutoff."""
+    timestamp, row_id = cursor
+    rows = (
+        query.filter(
+            column < cutoff,
+            or_(column > timestamp, and_(column == timestamp, id_column > row_id)),
+        )
+        .order_by(column, id_column)
+        .limit(limit + 1)
+        .all()
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def changes_since(db: Session, token: Optional[str], limit: int = DEFAULT_PAGE_SIZE) -> Dict:
+    """
+    Returns up to `limit` changed podcasts, live streams and tombstones each,
+    plus the token to pass next time. Without a token the client gets every
+    current row (paged) and no tombstone history. Keep calling while
+    `has_more` is true.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=SETTLE_SECONDS)
+    if token:
+        cursors = decode_token(token)
+        if _as_utc(cursors["deleted"][0]) < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+            raise ExpiredToken("Sync token expired; start a full sync")
+    else:
+        cursors = {"podcasts": (_EPOCH, 0), "live_streams": (_EPOCH, 0), "deleted": (cutoff, 0)}
+
+    podcasts, more_podcasts = _page(
+        db.query(models.Podcast), models.Podcast.updated_at, models.Podcast.id,
+        cursors["podcasts"], cutoff, limit,
+    )
+    live_streams, more_live = _page(
+        db.query(models.LiveStream), models.LiveStream.updated_at, models.LiveStream.id,
+        cursors["live_streams"], cutoff, limit,
+    )
+    tombstones, more_deleted = _page(
+        db.query(models.SyncTombstone), models.SyncTombstone.deleted_at, models.SyncTombstone.id,
+        cursors["deleted"], cutoff, limit,
+    )
+
+    if podcasts:
+        cursors["podcasts"] = (podcasts[-1].updated_at, podcasts[-1].id)
+    if live_streams:
+        cursors["live_streams"] = (live_streams[-1].updated_at, live_streams[-1].id)
+    if tombstones:
+        cursors["deleted"] = (tombstones[-1].deleted_at, tombstones[-1].id)
+    elif not more_deleted and _as_utc(cursors["deleted"][0]) < cutoff:
+        # Nothing deleted lately: advance to the cutoff so an idle client's
+        # token does not age out of the tombstone retention window.
+        cursors["deleted"] = (cutoff, 0)
+
+    return {
+        "podcasts": podcasts,
+        "live_streams": live_streams,
+        "deleted": [
+            {"type": t.entity_type, "id": t.entity_id, "deleted_at": t.deleted_at}
+            for t in tombstones
+        ],
+        "next_token": encode_token(cursors),
+        "has_more": more_podcasts or more_live or more_deleted,
+    }
+
+
+def prune_tombstones(db: Session) -> int:
+    horizon = datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    deleted = (
+        db.query(models.SyncTombstone)
+        .filter(models.SyncTombstone.deleted_at < horizon)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def _prune_job():
+    db = SessionLocal()
+    try:
+        count = prune_tombstones(db)
+        if count:
+            logger.info("Pruned %d sync tombstones", count)
+    finally:
+        db.close()
+
+
+prune_task = register(PeriodicTask("sync-tombstone-prune", PRUNE_INTERVAL_SECONDS, _prune_job, singleton=True))
@@ -0,0 +1,372 @@
+# backend/services/upload_validation.py
+#
+# Checks uploaded media while it streams in, so a bad upload (a video renamed
+# to .mp3, a file over the uploader's size cap, a nearly full disk) is turned
+# away after kilobytes instead of after being written out in full.
+#
+# Two layers:
+#   UploadGuardMiddleware  watches the multipart body of the upload routes as
+#                          it arrives, i.e. before Starlette spools it to a
+#                          temporary file: Content-Length and free disk space
+#                          up front, then the first bytes and running size of
+#                          every file part. A violation answers 413/415/507
+#                          at once and the rest of the body is never read.
+#   save_upload()          repeats the checks while copying a spooled
+#                          UploadFile into the upload directory, with the
+#                          role from the database rather than the token, and
+#                          removes the partial file on failure.
+
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from jose import JWTError, jwt
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from backend.services.storage import UPLOAD_DIRECTORY
+from backend.utils import ALGORITHM, SECRET_KEY
+
+AUDIO = "audio"
+IMAGE = "image"
+
+# Multipart file fields of the upload routes and what they must contain.
+FILE_FIELDS = {"audio_file": AUDIO, "cover_art": IMAGE}
+
+# Largest accepted file per uploader role and kind. Roles not listed cannot
+# upload at all (see get_current_lecturer_or_admin_user).
+MAX_UPLOAD_BYTES: Dict[str, Dict[str, int]] = {
+    "lecturer": {AUDIO: 1024 * 1024 * 1024, IMAGE: 10 * 1024 * 1024},
+    "admin": {AUDIO: 4 * 1024 * 1024 * 1024, IMAGE: 20 * 1024 * 1024},
+}
+# Allowance for the text fields and multipart framing on top of the files.
+MAX_FORM_OVERHEAD_BYTES = 1024 * 1024
+# Uploads are refused when they would leave less than this free on the
+# filesystem holding UPLOAD_DIRECTORY.
+MIN_FREE_DISK_BYTES = 512 * 1024 * 1024
+
+# Bytes of each file looked at by sniff(); covers an MP4 ftyp box with a
+# handful of compatible brands.
+SNIFF_BYTES = 64
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# (method, path) of the routes whose bodies the middleware inspects.
+UPLOAD_ROUTES = [
+    ("POST", re.compile(r"^/api/podcasts/?$")),
+    ("PUT", re.compile(r"^/api/podcasts/[^/]+/?$")),
+]
+
+# ISO base media (MP4) brands that mark an audio-only file; video MP4/MOV
+# files carry isom/avc1/qt brands only.
+AUDIO_MP4_BRANDS = {b"M4A ", b"M4B ", b"M4P ", b"F4A ", b"F4B "}
+
+
+def _sniff_audio(head: bytes) -> Optional[str]:
+    if head.startswith(b"ID3"):
+        return "mp3"
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        # Frame sync: layer bits 00 are ADTS AAC, anything else MPEG audio.
+        return "aac" if head[1] & 0x06 == 0 else "mp3"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head.startswith(b"fLaC"):
+        return "flac"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        # Matroska/WebM (what browsers record audio into).
+        return "webm"
+    if head[4:8] == b"ftyp":
+        box_size = int.from_bytes(head[:4], "big")
+        brands = [head[8:12]] + [head[i:i + 4] for i in range(16, min(box_size, len(head)) - 3, 4)]
+        if AUDIO_MP4_BRANDS.intersection(brands):
+            return "m4a"
+    return None
+
+
+def _sniff_image(head: bytes) -> Optional[str]:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def sniff(head: bytes, kind: str) -> Optional[str]:
+    """
+    Identifies a file from its first SNIFF_BYTES bytes. Returns the format
+    name if it is an accepted one of the given kind, otherwise None.
+    """
+    return _sniff_audio(head) if kind == AUDIO else _sniff_image(head)
+
+
+def max_bytes(role: Optional[str], kind: str) -> int:
+    return MAX_UPLOAD_BYTES.get(role, {}).get(kind, 0)
+
+
+def _too_large(what: str, limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"The {what} exceeds the {limit // (1024 * 1024)} MB limit for your account"
+    )
+
+
+def _unsupported(kind: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported {kind} file type"
+    )
+
+
+def check_free_space(expected_bytes: int):
+    """Raises 507 if writing expected_bytes would leave too little disk free."""
+    free = shutil.disk_usage(UPLOAD_DIRECTORY).free
+    if free - expected_bytes < MIN_FREE_DISK_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Not enough storage space for this upload, please try again later"
+        )
+
+
+def save_upload(upload: UploadFile, path: str, kind: str, role: Optional[str]) -> int:
+    """
+    Copies an uploaded file to path if its content is an accepted type of the
+    given kind and within the role's cap. Raises 413, 415 or 507 otherwise;
+    nothing is left at path then. Returns the number of bytes written.
+    """
+    limit = max_bytes(role, kind)
+    source = upload.file
+    source.seek(0)
+    head = source.read(SNIFF_BYTES)
+    if sniff(head, kind) is None:
+        raise _unsupported(kind)
+    if upload.size is not None and upload.size > limit:
+        raise _too_large(f"{kind} file", limit)
+    check_free_space(upload.size if upload.size is not None else limit)
+
+    written = 0
+    try:
+        with open(path, "wb") as buffer:
+            chunk = head
+            while chunk:
+                written += len(chunk)
+                if written > limit:
+                    raise _too_large(f"{kind} file", limit)
+                buffer.write(chunk)
+                chunk = source.read(COPY_CHUNK_BYTES)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return written
+
+
+def is_upload_route(method: str, path: str) -> bool:
+    return any(method == route_method and pattern.match(path) for route_method, pattern in UPLOAD_ROUTES)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _token_role(scope) -> Tuple[bool, Optional[str]]:
+    """(valid bearer token, role claim). Signature check only, no DB."""
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False, None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False, None
+    return True, payload.get("role")
+
+
+class _FormInspector:
+    """
+    Feeds the request body through a multipart parser alongside Starlette's,
+    tracking the current part. Sets `rejection` to the HTTPException the
+    request should end with; a malformed body is left for Starlette to
+    reject.
+    """
+
+    def __init__(self, boundary: bytes, role: str, content_length: Optional[int]):
+        self.role = role
+        self.rejection: Optional[HTTPException] = None
+        self.body_limit = sum(MAX_UPLOAD_BYTES[role].values()) + MAX_FORM_OVERHEAD_BYTES
+        self.received = 0
+        self.checked_disk = content_length is not None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._kind: Optional[str] = None
+        self._part_bytes = 0
+        self._head: List[bytes] = []
+        self._sniffed = True
+        self.parser: Optional[MultipartParser] = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, chunk: bytes):
+        self.received += len(chunk)
+        try:
+            if self.received > self.body_limit:
+                raise _too_large("upload", self.body_limit)
+            if self.parser is not None:
+                self.parser.write(chunk)
+        except HTTPException as e:
+            self.rejection = e
+        except MultipartParseError:
+            self.parser = None
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._kind = None
+        self._part_bytes = 0
+        self._head = []
+        self._sniffed = True
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        if b"filename" in options and name in FILE_FIELDS:
+            self._kind = FILE_FIELDS[name]
+            self._sniffed = False
+            if not self.checked_disk:
+                # Chunked body: the size is unknown, so require room for the
+                # largest file this role may send.
+                self.checked_disk = True
+                check_free_space(max_bytes(self.role, self._kind))
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._kind is None:
+            return
+        self._part_bytes += end - start
+        limit = max_bytes(self.role, self._kind)
+        if self._part_bytes > limit:
+            raise _too_large(f"{self._kind} file", limit)
+        if not self._sniffed:
+            self._head.append(data[start:end])
+            if self._part_bytes >= SNIFF_BYTES:
+                self._sniff()
+
+    def _on_part_end(self):
+        # Browsers send an empty part for a file input left blank.
+        if not self._sniffed and self._part_bytes > 0:
+            self._sniff()
+
+    def _sniff(self):
+        self._sniffed = True
+        head = b"".join(self._head)[:SNIFF_BYTES]
+        self._head = []
+        if sniff(head, self._kind) is None:
+            raise _unsupported(self._kind)
+
+
+class UploadGuardMiddleware:
+    """
+    Applies the upload checks to the multipart bodies of UPLOAD_ROUTES as
+    they are received. On a violation the app sees a client disconnect and
+    the client gets the rejection; other requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_upload_route(scope["method"], scope["path"]):
+            return await self.app(scope, receive, send)
+        content_type, params = parse_options_header(_header(scope, b"content-type") or "")
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            return await self.app(scope, receive, send)
+
+        # Authentication would only run after the whole body has been read;
+        # refuse uploads that it is bound to reject before accepting any of it.
+        authenticated, role = _token_role(scope)
+        if not authenticated:
+            return await self._reject(send, HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            ))
+        if role not in MAX_UPLOAD_BYTES:
+            return await self._reject(send, HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Operation not permitted: Lecturer or Admin privileges required."
+            ))
+
+        content_length = _header(scope, b"content-length")
+        content_length = int(content_length) if content_length and content_length.isdigit() else None
+        inspector = _FormInspector(boundary, role, content_length)
+        try:
+            if content_length is not None:
+                if content_length > inspector.body_limit:
+                    raise _too_large("upload", inspector.body_limit)
+                check_free_space(content_length)
+        except HTTPException as e:
+            return await self._reject(send, e)
+
+        async def inspected_receive():
+            message = await receive()
+            if message["type"] == "http.request" and inspector.rejection is None:
+                inspector.feed(message.get("body", b""))
+            if inspector.rejection is not None:
+                return {"type": "http.disconnect"}
+            return message
+
+        response_started = False
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Whatever the app makes of the disconnect is replaced by the rejection.
+            if inspector.rejection is None:
+                response_started = True
+                await send(message)
+
+        try:
+            await self.app(scope, inspected_receive, guarded_send)
+        except Exception:
+            if inspector.rejection is None:
+                raise
+        if inspector.rejection is not None and not response_started:
+            await self._reject(send, inspector.rejection)
+
+    @staticmethod
+    async def _reject(send, error: HTTPException):
+        body = json.dumps({"detail": error.detail}).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ]
+        headers += [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in (error.headers or {}).items()]
+        await send({"type": "http.response.start", "status": error.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,90 @@
+# backend/services/view_counts.py
+
+import threading
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import stats
+from backend.services.background import PeriodicTask, register
+from backend.services.bus import publish
+
+# How often buffered view counts are written back to the database.
+FLUSH_INTERVAL_SECONDS = 5
+# Published with the ids of podcasts whose stored view count just changed.
+FLUSHED_CHANNEL = "view_counts.flushed"
+
+
+class ViewCounter:
+    """
+    Buffers podcast detail-page views in memory and adds them to the podcasts
+    and stats tables in one transaction per flush, so a cached detail read
+    needs no write. Views being flushed still count as pending until their
+    commit, so `pending` never dips while a flush is in progress.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._pending: Dict[int, int] = {}
+        self._flushing: Dict[int, int] = {}
+
+    def record(self, podcast_id: int, count: int = 1):
+        with self._lock:
+            self._pending[podcast_id] = self._pending.get(podcast_id, 0) + count
+
+    def pending(self, podcast_id: int) -> int:
+        with self._lock:
+            return self._pending.get(podcast_id, 0) + self._flushing.get(podcast_id, 0)
+
+    def flush(self) -> int:
+        """Writes all buffered views. Returns the number of podcasts updated."""
+        with self._lock:
+            if not self._pending or self._flushing:
+                return 0
+            self._flushing, self._pending = self._pending, {}
+            dirty = self._flushing
+
+        db = self._session_factory()
+        try:
+            written = self._write(db, dirty)
+            db.commit()
+            publish(FLUSHED_CHANNEL, podcast_ids=sorted(dirty))
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for podcast_id, count in dirty.items():
+                    self._pending[podcast_id] = self._pending.get(podcast_id, 0) + count
+            raise
+        finally:
+            with self._lock:
+                self._flushing = {}
+            db.close()
+        return written
+
+    def _write(self, db: Session, dirty: Dict[int, int]) -> int:
+        owners = dict(
+            db.query(models.Podcast.id, models.Podcast.owner_id).filter(models.Podcast.id.in_(dirty))
+        )
+        views_by_owner: Dict[int, int] = {}
+        for podcast_id, owner_id in owners.items():
+            count = dirty[podcast_id]
+            db.query(models.Podcast).filter(models.Podcast.id == podcast_id).update(
+                {models.Podcast.views: models.Podcast.views + count}, synchronize_session=False
+            )
+            views_by_owner[owner_id] = views_by_owner.get(owner_id, 0) + count
+        for owner_id, count in views_by_owner.items():
+            stats.bump(db, owner_id, total_views=count)
+        return len(owners)
+
+
+counter = ViewCounter()
+
+flush_task = register(PeriodicTask(
+    "view-count-flush",
+    FLUSH_INTERVAL_SECONDS,
+    counter.flush,
+    run_on_stop=True,
+))
@@ -2,13 +2,15 @@
 
 import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../../context/AuthContext';
-import type { Podcast, LiveStream } from '../../types'; // Import Podcast and LiveStream types
+import type { Podcast, LiveStream, AdminStats, DuplicateCandidate } from '../../types'; // Import Podcast and LiveStream types
 import { motion } from 'framer-motion';
 
 export default function ContentModeration() {
   const { isAuthenticated, isAdmin, token } = useAuth();
   const [podcasts, setPodcasts] = useState<Podcast[]>([]);
   const [liveStreams, setLiveStreams] = useState<LiveStream[]>([]);
+  const [stats, setStats] = useState<AdminStats | null>(null);
+  const [duplicates, setDuplicates] = useState<DuplicateCandidate[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [message, setMessage] = useState<string | null>(null);
@@ -24,6 +26,22 @@ export default function ContentModeration() {
     setLoading(true);
     setError(null);
     try {
+      // Fetch precomputed dashboard totals
+      const statsResponse = await fetch(`${API_BASE_URL}/api/admin/stats`, {
+        headers: { 'Authorization': `Bearer ${token}` },
+      });
+      if (statsResponse.ok) {
+        setStats(await statsResponse.json());
+      }
+
+      // Fetch likely re-uploads flagged by audio fingerprinting
+      const duplicatesResponse = await fetch(`${API_BASE_URL}/api/admin/duplicates`, {
+        headers: { 'Authorization': `Bearer ${token}` },
+      });
+      if (duplicatesResponse.ok) {
+        setDuplicates(await duplicatesResponse.json());
+      }
+
       // Fetch Podcasts
       // Use API_BASE_URL and explicitly add /api/admin/podcasts
       const podcastsResponse = await fetch(`${API_BASE_URL}/api/admin/podcasts`, {
@@ -97,6 +115,33 @@ export default function ContentModeration() {
     }
   };
 
+  const handleDismissDuplicate = async (candidateId: number, title: string) => {
+    if (!isAuthenticated || !isAdmin || !token) {
+      setMessage('You are not authorized to perform this action.');
+      return;
+    }
+    setMessage(null);
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/admin/duplicates/${candidateId}/dismiss`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` },
+      });
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || 'Failed to dismiss duplicate.');
+      }
+      setMessage(`Duplicate flag on "${title}" dismissed successfully!`);
+      fetchContent();
+    } catch (err) {
+      console.error("Error dismissing duplicate:", err);
+      if (err instanceof Error) {
+        setError(err.message);
+      } else {
+        setError('An unknown error occurred while dismissing duplicate.');
+      }
+    }
+  };
+
   const handleUpdateLiveStreamStatus = async (streamId: number, currentTitle: string, newStatus: string) => {
     if (!isAuthenticated || !isAdmin || !token) {
       setMessage('You are not authorized to perform this action.');
@@ -203,6 +248,77 @@ export default function ContentModeration() {
           </div>
         )}
 
+        {stats && (
+          <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-8">
+            {[
+              ['Podcasts', stats.totals.podcast_count],
+              ['Total Views', stats.totals.total_views],
+              ['Total Plays', stats.totals.total_plays],
+              ['Live Viewers Now', stats.totals.current_viewers],
+            ].map(([label, value]) => (
+              <div key={label} className="p-4 rounded-md bg-gray-100 dark:bg-gray-700 text-center">
+                <p className="text-sm text-gray-500 dark:text-gray-300">{label}</p>
+                <p className="text-2xl font-bold text-crawfordBlue dark:text-crawfordGold">{value}</p>
+              </div>
+            ))}
+          </div>
+        )}
+
+        {duplicates.length > 0 && (
+          <>
+            <h2 className="text-2xl font-bold text-gray-800 dark:text-white mb-4">Possible Duplicates</h2>
+            <div className="overflow-x-auto mb-8">
+              <table className="min-w-full divide-y divide-gray-200 dark:divide-gray-700">
+                <thead className="bg-gray-50 dark:bg-gray-700">
+                  <tr>
+                    <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 dark:text-gray-300 uppercase tracking-wider">
+                      Upload
+                    </th>
+                    <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 dark:text-gray-300 uppercase tracking-wider">
+                      Matches
+                    </th>
+                    <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 dark:text-gray-300 uppercase tracking-wider">
+                      Match
+                    </th>
+                    <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 dark:text-gray-300 uppercase tracking-wider">
+                      Actions
+                    </th>
+                  </tr>
+                </thead>
+                <tbody className="bg-white dark:bg-gray-800 divide-y divide-gray-200 dark:divide-gray-700">
+                  {duplicates.map((duplicate) => (
+                    <tr key={duplicate.id}>
+                      <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900 dark:text-white">
+                        {duplicate.podcast_title} (#{duplicate.podcast_id})
+                      </td>
+                      <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900 dark:text-white">
+                        {duplicate.duplicate_of_title} (#{duplicate.duplicate_of_id})
+                      </td>
+                      <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900 dark:text-white">
+                        {Math.round(duplicate.score * 100)}%
+                      </td>
+                      <td className="px-6 py-4 whitespace-nowrap text-right text-sm font-medium space-x-4">
+                        <button
+                          onClick={() => handleDismissDuplicate(duplicate.id, duplicate.podcast_title)}
+                          className="text-crawfordBlue hover:text-blue-900 dark:text-crawfordGold dark:hover:text-yellow-200"
+                        >
+                          Dismiss
+                        </button>
+                        <button
+                          onClick={() => handleDeletePodcast(duplicate.podcast_id, duplicate.podcast_title)}
+                          className="text-red-600 hover:text-red-900 dark:text-red-400 dark:hover:text-red-200"
+                        >
+                          Delete Upload
+                        </button>
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          </>
+        )}
+
         <h2 className="text-2xl font-bold text-gray-800 dark:text-white mb-4">Podcasts</h2>
         {podcasts.length > 0 ? (
           <div className="overflow-x-auto mb-8">
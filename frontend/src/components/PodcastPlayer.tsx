@@ -12,6 +12,13 @@ import {
 import { MdSkipPrevious, MdSkipNext } from 'react-icons/md';
 import { useAuth } from '../context/AuthContext';
 
+// How far playback must move before the position is reported to the server again.
+const POSITION_REPORT_INTERVAL_SECONDS = 5;
+
+type AudioContextConstructor = typeof AudioContext;
+const AudioContextClass: AudioContextConstructor | undefined =
+  window.AudioContext || (window as unknown as { webkitAudioContext?: AudioContextConstructor }).webkitAudioContext;
+
 interface PodcastPlayerProps {
   podcast: Podcast;
   onNext?: () => void;
@@ -28,6 +35,11 @@ export default function PodcastPlayer({ podcast, onNext, onPrevious }: PodcastPl
   const [currentTime, setCurrentTime] = useState(0);
   const [isSeeking, setIsSeeking] = useState(false);
   const [userInteracted, setUserInteracted] = useState(false);
+  const lastReportedPositionRef = useRef(0);
+  // Loudness normalization: the element plays through a GainNode set from
+  // podcast.replay_gain_db (measured on the server, nothing is re-encoded).
+  const audioContextRef = useRef<AudioContext | null>(null);
+  const gainNodeRef = useRef<GainNode | null>(null);
 
   const { token, isAuthenticated } = useAuth();
   // Define API_BASE_URL based on environment variable
@@ -40,12 +52,30 @@ export default function PodcastPlayer({ podcast, onNext, onPrevious }: PodcastPl
     }
   }, []);
 
+  const reportPosition = useCallback((positionSeconds: number) => {
+    if (!isAuthenticated || !token || !podcast.id) {
+      return;
+    }
+    lastReportedPositionRef.current = positionSeconds;
+    fetch(`${API_BASE_URL}/api/progress/${podcast.id}`, {
+      method: 'PUT',
+      headers: {
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ position_seconds: positionSeconds }),
+    }).catch(error => console.error('PodcastPlayer: Failed to report playback position:', error));
+  }, [isAuthenticated, token, podcast.id, API_BASE_URL]);
+
   const handleTimeUpdate = useCallback(() => {
     if (audioRef.current && !isSeeking) {
       setCurrentTime(audioRef.current.currentTime);
       setProgress((audioRef.current.currentTime / audioRef.current.duration) * 100);
+      if (Math.abs(audioRef.current.currentTime - lastReportedPositionRef.current) >= POSITION_REPORT_INTERVAL_SECONDS) {
+        reportPosition(audioRef.current.currentTime);
+      }
     }
-  }, [isSeeking]);
+  }, [isSeeking, reportPosition]);
 
   const handleEnded = useCallback(() => {
     setIsPlaying(false);
@@ -95,11 +125,52 @@ export default function PodcastPlayer({ podcast, onNext, onPrevious }: PodcastPl
     console.log('PodcastPlayer: Seeking ended.');
   }, []);
 
+  const applyReplayGain = useCallback(() => {
+    if (gainNodeRef.current) {
+      gainNodeRef.current.gain.value = Math.pow(10, (podcast.replay_gain_db ?? 0) / 20);
+    }
+  }, [podcast.replay_gain_db]);
+
+  // Audio contexts may only start after a user gesture, so the graph is
+  // built on the first play.
+  const ensureGainNode = useCallback(() => {
+    if (!audioRef.current || !AudioContextClass) {
+      return;
+    }
+    try {
+      if (!audioContextRef.current) {
+        const context = new AudioContextClass();
+        const gainNode = context.createGain();
+        context.createMediaElementSource(audioRef.current).connect(gainNode).connect(context.destination);
+        audioContextRef.current = context;
+        gainNodeRef.current = gainNode;
+        applyReplayGain();
+      }
+      if (audioContextRef.current.state === 'suspended') {
+        audioContextRef.current.resume();
+      }
+    } catch (error) {
+      console.error('PodcastPlayer: Loudness normalization unavailable:', error);
+    }
+  }, [applyReplayGain]);
+
+  useEffect(() => {
+    applyReplayGain();
+  }, [applyReplayGain]);
+
+  useEffect(() => {
+    return () => {
+      audioContextRef.current?.close();
+    };
+  }, []);
+
   const togglePlayPause = useCallback(async () => {
     if (audioRef.current) {
       setUserInteracted(true);
+      ensureGainNode();
       if (isPlaying) {
         audioRef.current.pause();
+        reportPosition(audioRef.current.currentTime);
         console.log('PodcastPlayer: Paused.');
       } else {
         try {
@@ -131,7 +202,7 @@ export default function PodcastPlayer({ podcast, onNext, onPrevious }: PodcastPl
       }
       setIsPlaying(!isPlaying);
     }
-  }, [isPlaying, isAuthenticated, token, podcast.id, API_BASE_URL]);
+  }, [isPlaying, isAuthenticated, token, podcast.id, API_BASE_URL, reportPosition, ensureGainNode]);
 
   const playNext = useCallback(() => {
     console.log('PodcastPlayer: Next button clicked.');
@@ -152,14 +223,36 @@ export default function PodcastPlayer({ podcast, onNext, onPrevious }: PodcastPl
   useEffect(() => {
     console.log('PodcastPlayer: Podcast prop changed. New podcast:', podcast.title);
     if (audioRef.current) {
+      // Prefer adaptive HLS where the browser plays it natively (Safari, iOS,
+      // Android); everything else gets the original file.
+      const audioUrl = podcast.hls_master_url && audioRef.current.canPlayType('application/vnd.apple.mpegurl')
+        ? podcast.hls_master_url
+        : podcast.audio_file_url;
       // Construct the full URL for the audio file
-      const fullAudioUrl = podcast.audio_file_url.startsWith('http')
-        ? podcast.audio_file_url
-        : `${API_BASE_URL}${podcast.audio_file_url}`;
+      const fullAudioUrl = audioUrl.startsWith('http')
+        ? audioUrl
+        : `${API_BASE_URL}${audioUrl}`;
 
       audioRef.current.src = fullAudioUrl;
       audioRef.current.load();
 
+      // Resume from the last saved position, if any.
+      lastReportedPositionRef.current = 0;
+      if (isAuthenticated && token && podcast.id) {
+        fetch(`${API_BASE_URL}/api/progress/?podcast_ids=${podcast.id}`, {
+          headers: { 'Authorization': `Bearer ${token}` },
+        })
+          .then(response => (response.ok ? response.json() : []))
+          .then((positions: { podcast_id: number; position_seconds: number }[]) => {
+            const saved = positions.find(p => p.podcast_id === podcast.id);
+            if (saved && audioRef.current) {
+              audioRef.current.currentTime = saved.position_seconds;
+              lastReportedPositionRef.current = saved.position_seconds;
+            }
+          })
+          .catch(error => console.error('PodcastPlayer: Failed to load saved position:', error));
+      }
+
       if (userInteracted) {
         audioRef.current.play()
           .then(() => {
@@ -224,7 +317,8 @@ export default function PodcastPlayer({ podcast, onNext, onPrevious }: PodcastPl
       transition={{ type: 'spring', stiffness: 120, damping: 14 }}
       className="fixed bottom-0 left-0 right-0 bg-gray-900 text-white p-4 shadow-lg z-50 flex flex-col md:flex-row items-center justify-between rounded-t-lg"
     >
-      <audio ref={audioRef} />
+      {/* CORS mode, so audio from the API origin can go through Web Audio */}
+      <audio ref={audioRef} crossOrigin="anonymous" />
 
       <div className="flex items-center flex-grow mb-3 md:mb-0 md:mr-4 w-full md:w-1/3">
         <img
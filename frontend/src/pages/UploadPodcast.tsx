@@ -3,9 +3,13 @@
 import { useNavigate } from 'react-router-dom';
 import React, { useCallback, useState } from 'react';
 import { motion } from 'framer-motion';
-import type { Podcast } from "../types";
+import type { DuplicateCandidate, Podcast } from "../types";
 import { useAuth } from '../context/AuthContext';
 
+// Fingerprinting runs in the background after upload; poll this long for its verdict.
+const DUPLICATE_CHECK_INTERVAL_MS = 2000;
+const DUPLICATE_CHECK_ATTEMPTS = 15;
+
 export default function UploadPodcast() {
   const [file, setFile] = useState<File | null>(null); // Audio file
   const [title, setTitle] = useState('');
@@ -17,6 +21,7 @@ export default function UploadPodcast() {
   const [isLoading, setIsLoading] = useState(false);
   const [message, setMessage] = useState('');
   const [uploadedPodcastData, setUploadedPodcastData] = useState<Podcast | null>(null);
+  const [duplicates, setDuplicates] = useState<DuplicateCandidate[]>([]);
 
   const { token, loading, isAuthenticated, isLecturer } = useAuth();
   const navigate = useNavigate();
@@ -68,9 +73,34 @@ export default function UploadPodcast() {
     }
   }, []);
 
+  // Resolves with the earlier podcasts this upload repeats (empty if none, or
+  // if the check did not finish in time).
+  const checkForDuplicates = useCallback(async (podcastId: number): Promise<DuplicateCandidate[]> => {
+    for (let attempt = 0; attempt < DUPLICATE_CHECK_ATTEMPTS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, DUPLICATE_CHECK_INTERVAL_MS));
+      try {
+        const response = await fetch(`${API_BASE_URL}/api/podcasts/${podcastId}/duplicates`, {
+          headers: { 'Authorization': `Bearer ${token}` },
+        });
+        if (!response.ok) {
+          return [];
+        }
+        const result: { checked: boolean; duplicates: DuplicateCandidate[] } = await response.json();
+        if (result.checked) {
+          return result.duplicates;
+        }
+      } catch (error) {
+        console.error('Duplicate check error:', error);
+        return [];
+      }
+    }
+    return [];
+  }, [token, API_BASE_URL]);
+
   const handleSubmit = useCallback(async (e: React.FormEvent) => {
     e.preventDefault();
     setMessage('');
+    setDuplicates([]);
     setIsLoading(true);
 
     if (!file) {
@@ -121,7 +151,12 @@ export default function UploadPodcast() {
         setCoverArtFile(null);
         setAuthor('');
         setDurationMinutes('');
-        setTimeout(() => navigate('/podcasts'), 2000);
+        const found = await checkForDuplicates(data.id);
+        if (found.length > 0) {
+          setDuplicates(found); // stay on the page so the uploader sees the warning
+        } else {
+          navigate('/podcasts');
+        }
       } else {
         const errorData = await response.json();
         setMessage(`Upload failed: ${errorData.detail || 'Unknown error'}`);
@@ -132,7 +167,7 @@ export default function UploadPodcast() {
     } finally {
       setIsLoading(false);
     }
-  }, [file, title, description, coverArtFile, author, durationMinutes, isAuthenticated, isLecturer, token, navigate, API_BASE_URL]); // Added API_BASE_URL to dependencies
+  }, [file, title, description, coverArtFile, author, durationMinutes, isAuthenticated, isLecturer, token, navigate, API_BASE_URL, checkForDuplicates]); // Added API_BASE_URL to dependencies
 
   if (loading) {
     return (
@@ -176,6 +211,27 @@ export default function UploadPodcast() {
             </div>
           )}
 
+          {duplicates.length > 0 && (
+            <div className="p-3 rounded-md text-sm bg-yellow-100 text-yellow-800 dark:bg-yellow-800 dark:text-yellow-100">
+              <p className="font-semibold mb-1">This recording looks like a copy of:</p>
+              <ul className="list-disc list-inside mb-2">
+                {duplicates.map((duplicate) => (
+                  <li key={duplicate.id}>
+                    "{duplicate.duplicate_of_title}" ({Math.round(duplicate.score * 100)}% match)
+                  </li>
+                ))}
+              </ul>
+              <p className="mb-2">If it is, consider replacing the audio of that podcast instead. Admins have been notified.</p>
+              <button
+                type="button"
+                onClick={() => navigate('/podcasts')}
+                className="underline font-medium"
+              >
+                Continue to podcasts
+              </button>
+            </div>
+          )}
+
           {/* Title */}
           <div>
             <label htmlFor="title" className="block text-lg font-medium text-gray-700 dark:text-gray-300 mb-2">Podcast Title</label>
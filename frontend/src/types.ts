@@ -7,12 +7,16 @@ export interface Podcast {
   description: string;
   audio_file_url: string;
   cover_art_url: string | null;
+  hls_master_url?: string | null; // Multi-bitrate HLS; audio_file_url is the fallback
+  replay_gain_db?: number | null; // Loudness normalization gain, applied by PodcastPlayer
   owner_id: number;
   uploaded_at: string; // ISO 8601 string
   author?: string; // Optional, as per backend schema
   duration_minutes?: number; // Optional, as per backend schema
   views: number; // Added views
   plays: number; // Added plays
+  unique_listeners: number; // Approximate distinct listeners
+  updated_at?: string; // Last metadata change (drives /api/sync)
 }
 
 // Define the type for a LiveStream object based on your backend schema
@@ -26,6 +30,9 @@ export interface LiveStream {
   end_time: string | null; // ISO 8601 string
   current_viewers: number;
   total_views: number;
+  unique_viewers: number; // Approximate distinct viewers
+  updated_at?: string; // Last metadata change (drives /api/sync)
+  chat_enabled: boolean; // Chat over WebSocket at /api/live/{id}/chat
   host_id: number;
   // host: UserResponse; // If you want to embed host details, you'd need UserResponse type here
 }
@@ -39,3 +46,34 @@ export interface User {
   is_admin: boolean;
   role: string; // "user", "lecturer", "admin"
 }
+
+// Admin dashboard statistics served by /api/admin/stats
+export interface StatsTotals {
+  podcast_count: number;
+  total_views: number;
+  total_plays: number;
+  live_stream_count: number;
+  current_viewers: number;
+  total_live_views: number;
+}
+
+export interface AdminStats {
+  totals: StatsTotals;
+  lecturers: (StatsTotals & { owner_id: number; username: string | null })[];
+  top_podcasts: { id: number; title: string; owner_id: number; views: number; plays: number }[];
+  live_now: { id: number; title: string; host_id: number; current_viewers: number; start_time: string | null }[];
+  reconciled_at: string | null;
+}
+
+// Upload whose audio largely repeats an earlier one, found by audio fingerprinting
+export interface DuplicateCandidate {
+  id: number;
+  podcast_id: number;
+  podcast_title: string;
+  duplicate_of_id: number;
+  duplicate_of_title: string;
+  score: number; // Share of the shorter recording that matches (0-1)
+  offset_seconds: number; // Where podcast_id starts within duplicate_of_id
+  status: 'open' | 'dismissed';
+  created_at: string; // ISO 8601 string
+}
@@ -15,12 +15,16 @@ export interface Podcast {
   description: string;
   audio_file_url: string;
   cover_art_url: string | null;
+  hls_master_url?: string | null; // Multi-bitrate HLS; audio_file_url is the fallback
+  replay_gain_db?: number | null; // Loudness normalization gain, applied by PodcastPlayer
   owner_id: number; // Matches backend owner_id
   uploaded_at: string; // ISO 8601 string
   author: string | null; // Added from backend
   duration_minutes: number | null; // Added from backend
   views: number; // NEW: Podcast views count
   plays: number; // NEW: Podcast plays count
+  unique_listeners: number; // Approximate distinct listeners
+  updated_at?: string; // Last metadata change (drives /api/sync)
 }
 
 // NEW: Interface for LiveStream
@@ -34,5 +38,21 @@ export interface LiveStream {
   end_time: string | null; // ISO 8601 string, when stream went offline
   current_viewers: number; // Current live viewers
   total_views: number; // Total views across all sessions
+  unique_viewers: number; // Approximate distinct viewers
+  updated_at?: string; // Last metadata change (drives /api/sync)
+  chat_enabled: boolean; // Chat over WebSocket at /api/live/{id}/chat
   host_id: number; // ID of the user hosting the stream
 }
+
+// Upload whose audio largely repeats an earlier one, found by audio fingerprinting
+export interface DuplicateCandidate {
+  id: number;
+  podcast_id: number;
+  podcast_title: string;
+  duplicate_of_id: number;
+  duplicate_of_title: string;
+  score: number; // Share of the shorter recording that matches (0-1)
+  offset_seconds: number; // Where podcast_id starts within duplicate_of_id
+  status: 'open' | 'dismissed';
+  created_at: string; // ISO 8601 string
+}